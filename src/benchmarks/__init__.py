@@ -0,0 +1,4 @@
+"""
+Benchmarks package initialization.
+This package contains performance and parity checks for the startup search index.
+""" 
\ No newline at end of file
@@ -0,0 +1,136 @@
+import sys
+import os
+
+# Add the parent directory (src) to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+import platform
+import logging
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks.search_benchmark import (
+    RECALL_KS,
+    SAMPLE_QUERIES,
+    _git_commit,
+    latency_summary,
+    load_labeled_queries,
+    sample_queries,
+)
+from nlp.impact_index import DEFAULT_BUDGET, ImpactIndex
+from nlp.relevancy_matching import StartupMatcher, _product_idea_query
+
+# Postings budgets compared against exact scoring; 0 means unlimited (quantization loss only)
+BUDGETS = (500, 1000, DEFAULT_BUDGET, 5000, 0)
+
+
+def run_queries(index, queries: List[List[str]], k: int, repeats: int):
+    """Top k of every query, plus one latency sample per call."""
+    samples, results = [], []
+    for _ in range(repeats):
+        results = []
+        for q_tokens in queries:
+            start = time.perf_counter()
+            docs, _ = index.top_k(q_tokens, k)
+            samples.append(time.perf_counter() - start)
+            results.append(set(docs.tolist()))
+    return results, samples
+
+
+def overlap(exact: List[set], approx: List[set]) -> float:
+    """Mean share of the exact top k that the approximate top k also returns."""
+    return round(float(np.mean([len(e & a) / len(e) for e, a in zip(exact, approx) if e])), 4)
+
+
+def labeled_recall(results: List[set], relevant: List[set], k: int) -> float:
+    """Mean |relevant in top k| / min(k, |relevant|), as in search_benchmark.recall_at_k."""
+    scores = [len(found & rel) / min(k, len(rel)) for found, rel in zip(results, relevant) if rel]
+    return round(float(np.mean(scores)), 4) if scores else 0.0
+
+
+def run_suite(data_dir: str, budgets: List[int], repeats: int) -> Dict[str, Any]:
+    """
+    Compare impact-ordered top-k with exact BM25 at several postings budgets.
+
+    Both run at the index level (no phrase boost, no near-duplicate
+    collapsing), so the difference is down to early stopping and impact
+    quantization alone.
+    """
+    matcher = StartupMatcher(yc_data_path=os.path.join(data_dir, "company_details.json"), cache_size=0)
+    exact_index = matcher.bm25
+    labeled = load_labeled_queries()
+    texts = [_product_idea_query(item["product_idea"]) for item in labeled] + sample_queries(matcher, SAMPLE_QUERIES)
+    queries = [matcher.processor.tokenize(text) for text in texts]
+    relevant = [set(matcher.companies.ids_for("url", set(item["relevant"]))) for item in labeled]
+
+    start = time.perf_counter()
+    impacts = ImpactIndex(exact_index)
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "documents": len(matcher.companies),
+            "queries": len(queries),
+            "labeled_queries": len(labeled),
+            "repeats": repeats,
+            "impact_build_s": round(time.perf_counter() - start, 3),
+            "impact_mb": round(impacts.nbytes / 2**20, 2),
+        },
+        "exact": {},
+        "impact": {},
+    }
+    exact = {}
+    for k in RECALL_KS:
+        exact[k], samples = run_queries(exact_index, queries, k, repeats)
+        results["exact"][f"top{k}"] = {
+            **latency_summary(samples),
+            "labeled_recall": labeled_recall(exact[k], relevant, k),
+        }
+    for budget in budgets:
+        impacts.budget = budget or np.iinfo(np.int64).max
+        row = {}
+        for k in RECALL_KS:
+            approx, samples = run_queries(impacts, queries, k, repeats)
+            row[f"top{k}"] = {
+                **latency_summary(samples),
+                "overlap": overlap(exact[k], approx),
+                "labeled_recall": labeled_recall(approx, relevant, k),
+            }
+        results["impact"][f"budget{budget}" if budget else "unlimited"] = row
+    return results
+
+
+def format_table(results: Dict[str, Any]) -> str:
+    """One line per budget and k: latency, overlap with exact top k and labeled recall."""
+    lines = [f"{'setting':<18} {'k':>3} {'p50 ms':>8} {'p95 ms':>8} {'overlap':>8} {'recall':>7}"]
+    for k, row in results["exact"].items():
+        lines.append(f"{'exact':<18} {k[3:]:>3} {row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} "
+                     f"{1.0:>8.3f} {row['labeled_recall']:>7.3f}")
+    for budget, rows in results["impact"].items():
+        for k, row in rows.items():
+            lines.append(f"{budget:<18} {k[3:]:>3} {row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} "
+                         f"{row['overlap']:>8.3f} {row['labeled_recall']:>7.3f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser(description="Recall loss and latency of impact-ordered top-k against exact BM25")
+    p.add_argument("--data-dir", default="data")
+    p.add_argument("--budgets", nargs="+", type=int, default=list(BUDGETS),
+                   help="Postings budgets to try; 0 means unlimited")
+    p.add_argument("--repeats", type=int, default=3, help="Passes over the queries per setting")
+    p.add_argument("--output", help="Write the results as JSON to this file")
+    a = p.parse_args()
+
+    logging.disable(logging.WARNING)
+    results = run_suite(a.data_dir, a.budgets, a.repeats)
+    if a.output:
+        with open(a.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(format_table(results))
@@ -0,0 +1,75 @@
+import sys
+import os
+
+# Add the parent directory (src) to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+import subprocess
+import tempfile
+import logging
+
+from nlp.corpus_loader import discover_ph_files, iter_corpus_records, peak_rss_mb
+from nlp.corpus_store import STORE_PREFIX, CorpusStore
+
+# Runs in this order: the build scenarios leave a snapshot and store in the cache dir
+SCENARIOS = ("eager-parse", "stream-parse", "cold-build", "warm-start", "mmap-store")
+
+
+def run_scenario(name: str, data_dir: str, cache_dir: str) -> dict:
+    """Run one scenario in this process and return its timings and peak RSS."""
+    yc_path = os.path.join(data_dir, "company_details.json")
+    start = time.perf_counter()
+    if name == "eager-parse":
+        # What the loader used to do: materialize every file with json.load
+        records = []
+        for path in [yc_path] + discover_ph_files(None, data_dir):
+            with open(path, "r", encoding="utf-8") as f:
+                records.extend(json.load(f))
+        result = {"records": len(records)}
+    elif name == "stream-parse":
+        records = list(iter_corpus_records(yc_path, discover_ph_files(None, data_dir)))
+        result = {"records": len(records)}
+    elif name == "mmap-store":
+        # Records as a worker sees them: the memory-mapped columnar store
+        names = [n for n in os.listdir(cache_dir) if n.startswith(STORE_PREFIX)]
+        store = CorpusStore.load(os.path.join(cache_dir, names[0]))
+        result = {"records": len(store)}
+    else:
+        from nlp.relevancy_matching import StartupMatcher
+        matcher = StartupMatcher(yc_data_path=yc_path, cache_dir=cache_dir)
+        ready = time.perf_counter()
+        matcher.match("AI assistant for code review", top_n=5)
+        result = {"records": len(matcher.companies), "ready_s": round(ready - start, 3)}
+    result["first_query_s" if name in ("cold-build", "warm-start") else "load_s"] = round(time.perf_counter() - start, 3)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_isolated(name: str, data_dir: str, cache_dir: str) -> dict:
+    """Run a scenario in a fresh interpreter so peak RSS is not shared between runs."""
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--scenario", name, "--data-dir", data_dir, "--cache-dir", cache_dir],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser(description="Corpus load benchmark: peak RSS and time-to-first-query")
+    p.add_argument("--data-dir", default="data")
+    p.add_argument("--cache-dir", default=None, help="Snapshot directory (default: a fresh temporary one)")
+    p.add_argument("--scenario", choices=SCENARIOS, help="Run a single scenario in-process")
+    a = p.parse_args()
+
+    if a.scenario:
+        logging.disable(logging.WARNING)
+        print(json.dumps(run_scenario(a.scenario, a.data_dir, a.cache_dir)))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = a.cache_dir or tmp
+        for name in SCENARIOS:
+            print(f"{name:<13} {json.dumps(run_isolated(name, a.data_dir, cache_dir))}")
@@ -0,0 +1,198 @@
+import sys
+import os
+
+# Add the parent directory (src) to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+import platform
+import subprocess
+import tempfile
+import logging
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks.load_benchmark import run_isolated
+from nlp.corpus_loader import peak_rss_mb
+from nlp.relevancy_matching import StartupMatcher, _product_idea_query
+from nlp.timings import StageStats, format_stats
+
+LABELED_QUERIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "relevance_queries.json")
+TOP_NS = (1, 5, 10, 50)
+RECALL_KS = (5, 10, 20)
+# Sampled record blurbs used as extra latency queries next to the labeled ideas
+SAMPLE_QUERIES = 200
+_SEED = 0
+
+
+def load_labeled_queries(path: str = LABELED_QUERIES) -> List[Dict[str, Any]]:
+    """Read the labeled product ideas; each has an id, a product_idea and relevant urls."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["queries"]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    ms = np.asarray(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+def measure_latency(matcher: StartupMatcher, queries: List[str], top_n: int, mode: str,
+                    repeats: int) -> Dict[str, float]:
+    """Time single match calls; the matcher is built without a result cache."""
+    matcher.match(queries[0], top_n, mode=mode)  # warm-up (builds the semantic index if needed)
+    samples = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            matcher.match(query, top_n, mode=mode)
+            samples.append(time.perf_counter() - start)
+    return latency_summary(samples)
+
+
+def stage_summary(matcher: StartupMatcher) -> Dict[str, Dict[str, float]]:
+    """The matcher's per-stage latency statistics, rounded, keyed by stage."""
+    return {stage: {name: round(value, 3) for name, value in s._asdict().items()}
+            for stage, s in matcher.stats().items()}
+
+
+def recall_at_k(matcher: StartupMatcher, labeled: List[Dict[str, Any]], k: int, mode: str) -> float:
+    """
+    Mean recall@k over the labeled ideas.
+
+    Each idea scores |relevant in top k| / min(k, |relevant|), so an idea
+    with many relevant records is not capped below 1.
+    """
+    scores = []
+    for item in labeled:
+        relevant = set(item["relevant"])
+        if not relevant:
+            continue
+        found = {r.get("url") for r in matcher.match(_product_idea_query(item["product_idea"]), k, mode=mode)}
+        scores.append(len(found & relevant) / min(k, len(relevant)))
+    return round(float(np.mean(scores)), 4) if scores else 0.0
+
+
+def sample_queries(matcher: StartupMatcher, n: int) -> List[str]:
+    """Blurbs of n random records, a stand-in for short free-text ideas."""
+    rng = np.random.default_rng(_SEED)
+    out = []
+    for doc in rng.permutation(len(matcher.companies)).tolist():
+        blurb = matcher.companies.get_field(doc, "blurb")
+        if blurb:
+            out.append(blurb)
+            if len(out) == n:
+                break
+    return out
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(data_dir: str, modes: List[str], repeats: int, isolated: bool = True) -> Dict[str, Any]:
+    """Run every measurement and return the results as one JSON-serializable dict."""
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "modes": modes,
+            "repeats": repeats,
+        },
+    }
+    if isolated:
+        # Build and load in fresh interpreters against an empty cache dir, so neither sees warm pages
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cold = run_isolated("cold-build", data_dir, cache_dir)
+            warm = run_isolated("warm-start", data_dir, cache_dir)
+        results["build"] = {
+            "build_s": cold["ready_s"],
+            "build_peak_rss_mb": cold["peak_rss_mb"],
+            "cold_load_s": warm["ready_s"],
+            "load_peak_rss_mb": warm["peak_rss_mb"],
+        }
+
+    matcher = StartupMatcher(yc_data_path=os.path.join(data_dir, "company_details.json"), cache_size=0,
+                             timings=True)
+    labeled = load_labeled_queries()
+    queries = [_product_idea_query(item["product_idea"]) for item in labeled]
+    queries += sample_queries(matcher, SAMPLE_QUERIES)
+    results["meta"]["documents"] = len(matcher.companies)
+    results["meta"]["latency_queries"] = len(queries)
+    results["meta"]["labeled_queries"] = len(labeled)
+
+    results["latency"], results["stages"] = {}, {}
+    for mode in modes:
+        # Where the time of each mode's latency runs goes, stage by stage
+        matcher.reset_stats()
+        results["latency"][mode] = {
+            f"top{top_n}": measure_latency(matcher, queries, top_n, mode, repeats) for top_n in TOP_NS
+        }
+        results["stages"][mode] = stage_summary(matcher)
+    results["recall"] = {
+        mode: {f"at{k}": recall_at_k(matcher, labeled, k, mode) for k in RECALL_KS}
+        for mode in modes
+    }
+    results["meta"]["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves keyed by dotted path, e.g. latency.bm25.top10.p95_ms."""
+    out = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            out[path] = value
+    return out
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> str:
+    """Side-by-side table of the metrics both runs have."""
+    old, new = flatten(baseline), flatten(current)
+    lines = [f"{'metric':<36} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for key in sorted(set(old) & set(new)):
+        if key.startswith("meta."):
+            continue
+        change = f"{(new[key] - old[key]) / old[key] * 100:+.1f}%" if old[key] else ""
+        lines.append(f"{key:<36} {old[key]:>10} {new[key]:>10} {change:>8}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser(description="Search benchmark: build/load cost, query latency and recall@k")
+    p.add_argument("--data-dir", default="data")
+    p.add_argument("--modes", nargs="+", default=["bm25", "hybrid"], choices=StartupMatcher.RETRIEVAL_MODES)
+    p.add_argument("--repeats", type=int, default=3, help="Passes over the latency queries per setting")
+    p.add_argument("--skip-build", action="store_true", help="Skip the isolated build/load measurements")
+    p.add_argument("--output", help="Write the results as JSON to this file")
+    p.add_argument("--compare", metavar="BASELINE", help="Print a comparison against an earlier results file")
+    a = p.parse_args()
+
+    logging.disable(logging.WARNING)
+    results = run_suite(a.data_dir, a.modes, a.repeats, isolated=not a.skip_build)
+    if a.output:
+        with open(a.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    for mode, stages in results["stages"].items():
+        print(f"\nStages ({mode}):")
+        print(format_stats({stage: StageStats(**s) for stage, s in stages.items()}))
+    if a.compare:
+        with open(a.compare, "r", encoding="utf-8") as f:
+            print(compare(json.load(f), results))
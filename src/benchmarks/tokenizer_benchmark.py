@@ -0,0 +1,61 @@
+import sys
+import os
+
+# Add the parent directory (src) to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import logging
+from typing import List
+
+from nlp.corpus_loader import discover_ph_files, iter_corpus_records
+from nlp.index_cache import TokenizedCorpus
+from nlp.relevancy_matching import StartupMatcher, TextPreprocessor, _cached_stem
+
+
+def load_document_texts(data_dir: str) -> List[str]:
+    """Collect the text indexed for every YC company and Product Hunt launch."""
+    records = iter_corpus_records(os.path.join(data_dir, "company_details.json"), discover_ph_files(None, data_dir))
+    return [StartupMatcher._document_text(rec) for rec in records]
+
+
+def check_parity(texts: List[str]) -> int:
+    """Return the number of documents where the regex and NLTK tokenizers disagree."""
+    fast, reference = TextPreprocessor(mode="regex"), TextPreprocessor(mode="nltk")
+    mismatches = 0
+    for text in texts:
+        if fast.tokenize(text) != reference.tokenize(text):
+            mismatches += 1
+            if mismatches <= 5:
+                logging.error(f"Tokenizer mismatch on: {text[:80]!r}")
+    return mismatches
+
+
+def time_build(texts: List[str], processor: TextPreprocessor) -> float:
+    """Time tokenizing and encoding the corpus, starting from a cold stem cache."""
+    _cached_stem.cache_clear()
+    start = time.perf_counter()
+    TokenizedCorpus.from_token_lists(processor.tokenize(text) for text in texts)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser(description="Tokenizer parity check and index build benchmark")
+    p.add_argument("--data-dir", default="data")
+    a = p.parse_args()
+
+    texts = load_document_texts(a.data_dir)
+    print(f"Documents: {len(texts)}")
+
+    mismatches = check_parity(texts)
+    print(f"Parity: {len(texts) - mismatches}/{len(texts)} documents identical")
+
+    before = time_build(texts, TextPreprocessor(mode="nltk", cache_stems=False))
+    after = time_build(texts, TextPreprocessor(mode="regex"))
+    print(f"Index build (NLTK tokenizer, no stem cache): {before:.2f}s")
+    print(f"Index build (regex tokenizer, stem cache):   {after:.2f}s")
+    print(f"Speed-up: {before / after:.1f}x")
+    print(f"Stem cache: {_cached_stem.cache_info()}")
+
+    sys.exit(1 if mismatches else 0)
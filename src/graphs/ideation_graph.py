@@ -9,7 +9,7 @@ from langgraph.graph import Graph, StateGraph
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_openai import ChatOpenAI
-from nlp.relevancy_matching import find_relevant_companies, StartupMatcher
+from nlp.relevancy_matching import find_relevant_companies, get_matcher, warm_matcher
 import os 
 from dotenv import load_dotenv
 import json
@@ -2717,18 +2717,10 @@ def find_similar_companies(state: IdeationState) -> IdeationState:
     # Find relevant companies based on the branch data
     companies = find_relevant_companies(branch, top_n=5)
     
-    # Initialize matcher for formatting (using the new StartupMatcher class)
-    try:
-        from src.nlp.relevancy_matching import StartupMatcher
-        matcher = StartupMatcher()
-    except ImportError:
-        # Fallback to directly importing if the module structure is different
-        from nlp.relevancy_matching import StartupMatcher
-        matcher = StartupMatcher()
-    
     # If we found companies, add them to the messages
     if companies:
-        formatted_results = matcher.format_results(companies)
+        # Format with the shared matcher that served the search
+        formatted_results = get_matcher().format_results(companies)
         state["messages"].append(AIMessage(content=f"Here are similar startups to product '{branch['heading']}':\n\n{formatted_results}"))
         state["feedback"] = f"Found {len(companies)} similar companies."
 
@@ -2813,6 +2805,9 @@ def run_cli_workflow():
     """Run the ideation workflow as a CLI application."""
     print("\n===== IDEATION WORKFLOW CLI =====\n")
     print("Starting a new ideation session...\n")
+
+    # Build the search index while the user works through the early steps
+    warm_matcher(background=True)
     
     # Initialize state
     state = {
@@ -1,17 +1,28 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
-import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+# Run from src (python main.py, or uvicorn main:app), which puts src on the import
+# path the same way graphs/ideation_graph.py sets it up for itself
+from nlp.relevancy_matching import warm_matcher
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the shared startup index without delaying server start
+    warm_matcher(background=True)
+    yield
+
 # Initialize FastAPI app
-app = FastAPI(title="LLM Ideation App")
+app = FastAPI(title="LLM Ideation App", lifespan=lifespan)
 
 # Initialize the LLM
 llm = ChatOpenAI(
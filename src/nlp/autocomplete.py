@@ -0,0 +1,108 @@
+import re
+from typing import List, Optional
+
+import numpy as np
+
+# Keys are compared on their first KEY_BYTES bytes of UTF-8; longer prefixes are checked afterwards
+KEY_BYTES = 32
+# A title can be completed from its first word and the next few ("meal" finds "Notion Meal Planner")
+MAX_WORD_STARTS = 4
+# Completions from the start of a title rank above those from a later word, whatever their prior
+_START_TIER = 1e6
+# Candidates ranked per prefix before duplicates are dropped
+_CANDIDATES_PER_RESULT = 4
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def normalize_title(text: str) -> str:
+    """Lowercase, with every run of punctuation and spaces turned into one space."""
+    return _NON_WORD_RE.sub(" ", (text or "").lower()).strip()
+
+
+def _normalize_prefix(text: str) -> str:
+    # A trailing separator means the last word is complete: "meal " matches "meal planner", not "mealtime"
+    norm = normalize_title(text)
+    return norm + " " if norm and _NON_WORD_RE.match(text[-1]) else norm
+
+
+class TitleCompleter:
+    """
+    Prefix completion over record titles, as a sorted array of fixed-width keys.
+
+    Each title is keyed from its first word and from each of the next few
+    word starts. The keys are normalized, truncated to KEY_BYTES bytes of
+    UTF-8, and sorted in a single bytes array. A prefix is resolved with two
+    binary searches into a contiguous range. The range's entries are ranked
+    by a per-document prior, with matches at the start of a title first,
+    via one partition. So a keystroke costs O(log n) plus the size of
+    the range, and never a scan of the records.
+    """
+
+    def __init__(self, titles: List[str], prior: np.ndarray, live: Optional[np.ndarray] = None):
+        self.titles = titles
+        self.prior = np.asarray(prior, dtype=np.float64)
+        self._normalized = [normalize_title(title) for title in titles]
+        self.lengths = np.fromiter(map(len, self._normalized), dtype=np.int32, count=len(titles))
+        keys, docs, starts = [], [], []
+        for doc, norm in enumerate(self._normalized):
+            if not norm or (live is not None and not live[doc]):
+                continue
+            word_starts = [0] + [m.end() for m in re.finditer(" ", norm)][:MAX_WORD_STARTS - 1]
+            for start in word_starts:
+                keys.append(norm[start:].encode("utf-8")[:KEY_BYTES])
+                docs.append(doc)
+                starts.append(start)
+        keys = np.array(keys, dtype=f"S{KEY_BYTES}")
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.docs = np.asarray(docs, dtype=np.int32)[order]
+        self.starts = np.asarray(starts, dtype=np.int16)[order]
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.docs.nbytes + self.starts.nbytes + self.prior.nbytes + self.lengths.nbytes
+
+    def complete(self, prefix: str, k: int, allowed: Optional[np.ndarray] = None) -> List[int]:
+        """
+        Doc ids of up to k distinct titles that start with prefix (or have a word that does).
+
+        Title-start matches come first; within each group, higher prior comes
+        first, then shorter title, then lower doc id.
+        """
+        norm = _normalize_prefix(prefix)
+        if not norm or k <= 0:
+            return []
+        key = norm.encode("utf-8")[:KEY_BYTES]
+        lo = np.searchsorted(self.keys, key, side="left")
+        hi = np.searchsorted(self.keys, key + b"\xff", side="left")
+        docs, starts = self.docs[lo:hi], self.starts[lo:hi]
+        if allowed is not None:
+            keep = allowed[docs]
+            docs, starts = docs[keep], starts[keep]
+        if len(key) == KEY_BYTES:
+            # Keys only hold KEY_BYTES bytes, so a longer prefix is confirmed on
+            # the full title before ranking can cut any true match
+            keep = np.fromiter(
+                (self._normalized[d].startswith(norm, s) for d, s in zip(docs.tolist(), starts.tolist())),
+                dtype=bool, count=len(docs),
+            )
+            docs, starts = docs[keep], starts[keep]
+        rank = self.prior[docs] + _START_TIER * (starts == 0)
+        wanted = k * _CANDIDATES_PER_RESULT
+        if len(docs) > wanted:
+            # Keep every entry tied with the last candidate, so ties still go to the shorter title
+            cutoff = np.partition(rank, len(rank) - wanted)[len(rank) - wanted]
+            top = rank >= cutoff
+            docs, rank = docs[top], rank[top]
+        out, seen = [], set()
+        for i in np.lexsort((docs, self.lengths[docs], -rank)).tolist():
+            doc = int(docs[i])
+            title = self._normalized[doc]
+            if title in seen:
+                continue
+            seen.add(title)
+            out.append(doc)
+            if len(out) == k:
+                break
+        return out
@@ -0,0 +1,644 @@
+import copy
+import math
+from itertools import islice
+from typing import List, Tuple, Optional, Iterable, Sequence, Dict, Any, NamedTuple
+
+import numpy as np
+from scipy import sparse
+
+from nlp.index_cache import TokenizedCorpus
+
+
+def _postings_from_tokens(token_ids: np.ndarray, doc_len: np.ndarray, n_terms: int,
+                          doc_base: int = 0, field_len: Optional[np.ndarray] = None):
+    """
+    Group a token stream into (term_ptr, doc ids, tf, field_tf) postings, doc ids ascending per term.
+
+    field_tf (postings x fields) is only computed when field_len is given.
+    """
+    n_docs = len(doc_len)
+    doc_of_token = np.repeat(np.arange(n_docs, dtype=np.int64), doc_len)
+    # Sorting (term, doc) keys groups postings by term with doc ids ascending
+    keys, inverse, tf = np.unique(token_ids.astype(np.int64) * max(n_docs, 1) + doc_of_token,
+                                  return_inverse=True, return_counts=True)
+    terms = keys // max(n_docs, 1)
+    term_ptr = np.zeros(n_terms + 1, dtype=np.int64)
+    np.cumsum(np.bincount(terms, minlength=n_terms), out=term_ptr[1:])
+    docs = (keys % max(n_docs, 1) + doc_base).astype(np.int32)
+
+    field_tf = None
+    if field_len is not None:
+        n_fields = field_len.shape[1]
+        field_of_token = np.repeat(np.tile(np.arange(n_fields), n_docs), field_len.ravel())
+        field_tf = np.bincount(inverse.ravel() * n_fields + field_of_token,
+                               minlength=len(keys) * n_fields).astype(np.uint16).reshape(-1, n_fields)
+    return term_ptr, docs, tf.astype(np.float64), field_tf
+
+
+class WeightedToken(str):
+    """A query token that counts weight times as much as a plain one, e.g. a spelling correction."""
+
+    def __new__(cls, token: str, weight: float):
+        obj = super().__new__(cls, token)
+        obj.weight = weight
+        return obj
+
+    def __reduce__(self):
+        return WeightedToken, (str(self), self.weight)
+
+
+def token_weight(token: str) -> float:
+    return getattr(token, "weight", 1.0)
+
+
+def concat_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Positions starts[i]:starts[i] + lengths[i] for every i, concatenated, without a Python loop."""
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(int(lengths.sum()), dtype=np.int64)
+
+
+class CollectionStats(NamedTuple):
+    """Collection-wide statistics that BM25 scores depend on, over live documents."""
+    n_live: int
+    total_len: int
+    # Document frequency per term id
+    df: np.ndarray
+    # Total length of each field
+    field_len_sum: np.ndarray
+
+
+# --- Inverted BM25 index -----------------------------
+class BM25Index:
+    """
+    Okapi BM25 over per-term postings lists with MaxScore top-k pruning.
+
+    Scores are bit-for-bit identical to rank_bm25.BM25Okapi with the same
+    k1 / b / epsilon: IDF is computed in the same order with the same
+    negative-IDF floor, and final scores are re-summed in query-token order.
+
+    Documents are token lists laid out field after field (see
+    TokenizedCorpus.field_len); plain BM25 scores the concatenation.
+
+    Documents added after construction go to a small delta segment and
+    removed documents are tombstoned; compacted() folds both back into one
+    segment. Updates return a new index that shares the unchanged arrays, so
+    searches running against the old object are never disturbed.
+
+    An index over part of a larger corpus (a shard) can take the whole
+    corpus's statistics via with_shared_stats(), after which it scores its
+    documents exactly as the full index would.
+    """
+
+    # Subclasses that score fields separately keep per-field term frequencies
+    FIELD_POSTINGS = False
+
+    def __init__(self, corpus: TokenizedCorpus, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.corpus = corpus
+        self.vocab = corpus.vocab
+        self.term_to_id = corpus.term_to_id
+        self.n_docs = len(corpus)
+        self.term_ptr, self.post_docs, self.post_tf, self.post_field_tf = _postings_from_tokens(
+            corpus.token_ids, corpus.doc_len, len(corpus.vocab),
+            field_len=corpus.field_len if self.FIELD_POSTINGS else None,
+        )
+        # Delta segment (documents added since the last compaction)
+        self.delta_token_ids = np.zeros(0, dtype=np.int64)
+        self.delta_offsets = np.zeros(1, dtype=np.int64)
+        self.delta_term_ptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        self.delta_docs = np.zeros(0, dtype=np.int32)
+        self.delta_tf = np.zeros(0, dtype=np.float64)
+        self.delta_field_tf = np.zeros((0, corpus.n_fields), dtype=np.uint16)
+        # Tombstones: None while every document is live
+        self.live: Optional[np.ndarray] = None
+        # Statistics of the whole corpus when this index only holds a shard of it
+        self.shared_stats: Optional[CollectionStats] = None
+        self.df = corpus.df.astype(np.int64)
+        self.doc_len = corpus.doc_len.astype(np.float64)
+        self.field_len = corpus.field_len
+        self._compute_stats()
+
+    def _init_kwargs(self) -> Dict[str, Any]:
+        """Constructor settings, reused when compaction builds a fresh index."""
+        return {"k1": self.k1, "b": self.b, "epsilon": self.epsilon}
+
+    # -- statistics -----------------------------------
+    @property
+    def n_live(self) -> int:
+        return self.n_docs if self.live is None else int(self.live.sum())
+
+    @property
+    def n_deleted(self) -> int:
+        return self.n_docs - self.n_live
+
+    @property
+    def n_delta(self) -> int:
+        return len(self.delta_offsets) - 1
+
+    def collection_stats(self) -> CollectionStats:
+        """The statistics scores are computed from: shared ones if set, else this index's own."""
+        if self.shared_stats is not None:
+            return self.shared_stats
+        live_len = self.field_len if self.live is None else self.field_len[self.live]
+        field_len_sum = live_len.sum(axis=0, dtype=np.int64)
+        return CollectionStats(self.n_live, int(field_len_sum.sum()), self.df, field_len_sum)
+
+    def with_shared_stats(self, stats: CollectionStats, live: Optional[np.ndarray] = None) -> "BM25Index":
+        """
+        Return a view that scores with another index's collection statistics.
+
+        The index must use that index's term ids (a prefix of its vocabulary
+        is enough); live gives this index's tombstones.
+        """
+        view = copy.copy(self)
+        view.shared_stats = stats
+        view.live = live
+        view._compute_stats()
+        return view
+
+    def _compute_stats(self) -> None:
+        stats = self.collection_stats()
+        n_live, total = stats.n_live, stats.total_len
+        self.avgdl = total / n_live if n_live else 0.0
+        self.norm = self._length_norm(total)
+
+        # IDF summed in vocabulary (first occurrence) order, as rank_bm25 does;
+        # terms whose every document was removed no longer count
+        present = stats.df > 0
+        idf = [math.log(n_live - df + 0.5) - math.log(df + 0.5) for df in stats.df[present].tolist()]
+        self.average_idf = sum(idf) / len(idf) if idf else 0.0
+        eps = self.epsilon * self.average_idf
+        all_idf = np.zeros(len(stats.df), dtype=np.float64)
+        all_idf[present] = [v if v >= 0 else eps for v in idf]
+        self.prunable = bool(not idf or all_idf[present].min() > 0)
+        # Shared statistics may cover terms added to the corpus after this shard was built
+        self.idf = all_idf[:len(self.vocab)]
+
+        # Per-term upper bound of a single occurrence's contribution
+        self.upper_bound = self.idf * np.maximum(
+            self._max_impact(self.term_ptr, self.post_docs, self.post_tf),
+            self._max_impact(self.delta_term_ptr, self.delta_docs, self.delta_tf),
+        )
+
+    def _length_norm(self, total: int) -> np.ndarray:
+        """Per-document term in the BM25 saturation denominator."""
+        # Same operation order as BM25Okapi so every score matches exactly
+        return self.k1 * (1 - self.b + self.b * self.doc_len / self.avgdl) if total else self.doc_len
+
+    def _max_impact(self, term_ptr: np.ndarray, docs: np.ndarray, tf: np.ndarray) -> np.ndarray:
+        out = np.zeros(len(self.vocab), dtype=np.float64)
+        if not len(docs):
+            return out
+        impacts = tf * (self.k1 + 1) / (tf + self.norm[docs])
+        nonempty = np.flatnonzero(np.diff(term_ptr))
+        out[nonempty] = np.maximum.reduceat(impacts, term_ptr[:-1][nonempty])
+        return out
+
+    # -- scoring helpers ------------------------------
+    def _term_ids(self, q_tokens: List[str]) -> List[int]:
+        """Map query tokens to term ids, dropping tokens outside the vocabulary."""
+        return [self.term_to_id[t] for t in q_tokens if t in self.term_to_id]
+
+    def _query_terms(self, q_tokens: List[str]) -> Tuple[List[int], Optional[List[float]]]:
+        """Term ids of the known query tokens and their weights (None when all weigh 1)."""
+        known = [t for t in q_tokens if t in self.term_to_id]
+        weights = [token_weight(t) for t in known]
+        return [self.term_to_id[t] for t in known], (weights if any(w != 1.0 for w in weights) else None)
+
+    def _postings(self, tid: int) -> Tuple[np.ndarray, np.ndarray]:
+        if tid < len(self.term_ptr) - 1:
+            lo, hi = self.term_ptr[tid], self.term_ptr[tid + 1]
+            docs, tf = self.post_docs[lo:hi], self.post_tf[lo:hi]
+        else:
+            docs, tf = self.post_docs[:0], self.post_tf[:0]
+        dlo, dhi = self.delta_term_ptr[tid], self.delta_term_ptr[tid + 1]
+        if dhi > dlo:
+            # Delta doc ids are all higher than main ones, so the result stays sorted
+            docs = np.concatenate([docs, self.delta_docs[dlo:dhi]])
+            tf = np.concatenate([tf, self.delta_tf[dlo:dhi]])
+        if self.live is not None:
+            keep = self.live[docs]
+            docs, tf = docs[keep], tf[keep]
+        return docs, tf
+
+    def _contribution(self, tid, docs: np.ndarray, tf: np.ndarray) -> np.ndarray:
+        return self.idf[tid] * (tf * (self.k1 + 1) / (tf + self.norm[docs]))
+
+    def _tf_for(self, tid: int, docs: np.ndarray) -> np.ndarray:
+        """Look up the term frequency of tid in each of the given docs."""
+        p_docs, p_tf = self._postings(tid)
+        if not len(p_docs):
+            return np.zeros(len(docs), dtype=np.float64)
+        pos = np.searchsorted(p_docs, docs)
+        pos[pos == len(p_docs)] = 0
+        return np.where(p_docs[pos] == docs, p_tf[pos], 0.0)
+
+    def exact_scores(self, q_ids: List[int], docs: np.ndarray,
+                     weights: Optional[List[float]] = None) -> np.ndarray:
+        """Score the given docs, summing (weighted) contributions in query-token order."""
+        scores = np.zeros(len(docs), dtype=np.float64)
+        for i, tid in enumerate(q_ids):
+            contribution = self._contribution(tid, docs, self._tf_for(tid, docs))
+            scores += contribution if weights is None else weights[i] * contribution
+        return scores
+
+    # -- public API -----------------------------------
+    def get_scores(self, q_tokens: List[str]) -> np.ndarray:
+        """Score every document, like BM25Okapi.get_scores (removed documents score 0)."""
+        scores = np.zeros(self.n_docs, dtype=np.float64)
+        q_ids, weights = self._query_terms(q_tokens)
+        for i, tid in enumerate(q_ids):
+            docs, tf = self._postings(tid)
+            contribution = self._contribution(tid, docs, tf)
+            scores[docs] += contribution if weights is None else weights[i] * contribution
+        return scores
+
+    def top_k(self, q_tokens: List[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the top k (doc ids, scores), ties broken by lower doc id.
+
+        Uses term-at-a-time MaxScore: query terms are visited from the highest
+        to the lowest upper bound, and once the bounds of the remaining terms
+        cannot lift an unseen document past the current k-th score, only the
+        surviving candidates are probed in the remaining postings.
+        """
+        k = min(k, self.n_live)
+        q_ids, weights = self._query_terms(q_tokens)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        if not q_ids:
+            return self._fill(np.zeros(0, dtype=np.int64), np.zeros(0), k)
+        if not self.prunable:
+            return self._exhaustive_top_k(q_ids, k, weights)
+
+        # Group repeated query terms; each repeat adds the same contribution again
+        mult = {}
+        for i, tid in enumerate(q_ids):
+            mult[tid] = mult.get(tid, 0) + (1 if weights is None else weights[i])
+        order = sorted(mult, key=lambda t: mult[t] * self.upper_bound[t], reverse=True)
+        bounds = np.array([mult[t] * self.upper_bound[t] for t in order])
+        remaining = np.concatenate([np.cumsum(bounds[::-1])[::-1], [0.0]])
+
+        acc = np.zeros(self.n_docs, dtype=np.float64)
+        seen = np.zeros(self.n_docs, dtype=bool)
+        candidates: Optional[np.ndarray] = None
+        for i, tid in enumerate(order):
+            if candidates is None:
+                # Union phase: any document may still reach the top k
+                docs, tf = self._postings(tid)
+                acc[docs] += mult[tid] * self._contribution(tid, docs, tf)
+                seen[docs] = True
+                theta = self._kth(acc, seen, k)
+                if theta is not None and remaining[i + 1] < theta * (1 - 1e-9):
+                    candidates = np.flatnonzero(seen)
+            else:
+                # Candidate phase: only probe documents that can still qualify
+                tf = self._tf_for(tid, candidates)
+                acc[candidates] += mult[tid] * self._contribution(tid, candidates, tf)
+            if candidates is not None:
+                theta = self._kth(acc, seen, k, candidates)
+                keep = acc[candidates] + remaining[i + 1] >= theta * (1 - 1e-9)
+                candidates = candidates[keep]
+
+        pool = candidates if candidates is not None else np.flatnonzero(seen)
+        return self._select(q_ids, pool, acc[pool], k, weights)
+
+    def top_k_many(self, queries: List[List[str]], k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Run top_k for each tokenized query."""
+        return [self.top_k(q_tokens, k) for q_tokens in queries]
+
+    def restricted(self, allowed: np.ndarray) -> "BM25Index":
+        """
+        Return a view that only ranks the documents where allowed is True.
+
+        Collection statistics stay those of the full index, so scores are
+        unchanged; the mask is applied like tombstones, while postings are
+        read, and pruning works on the smaller candidate set.
+        """
+        view = copy.copy(self)
+        view.live = allowed if self.live is None else self.live & allowed
+        return view
+
+    # -- top-k selection ------------------------------
+    @staticmethod
+    def _kth(acc: np.ndarray, seen: np.ndarray, k: int,
+             candidates: Optional[np.ndarray] = None) -> Optional[float]:
+        vals = acc[candidates] if candidates is not None else acc[seen]
+        if len(vals) < k:
+            return None if candidates is None else 0.0
+        return float(np.partition(vals, len(vals) - k)[len(vals) - k])
+
+    def _select(self, q_ids: List[int], pool: np.ndarray, approx: np.ndarray,
+                k: int, weights: Optional[List[float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        if len(pool) > k:
+            # Keep everything within rounding distance of the k-th score, then
+            # rescore those exactly so near-ties resolve as BM25Okapi would
+            kth = np.partition(approx, len(approx) - k)[len(approx) - k]
+            pool = pool[approx >= kth - 1e-9 * max(abs(kth), 1.0)]
+        scores = self.exact_scores(q_ids, pool, weights)
+        order = np.lexsort((pool, -scores))[:k]
+        return self._fill(pool[order], scores[order], k)
+
+    def _exhaustive_top_k(self, q_ids: List[int], k: int,
+                          weights: Optional[List[float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        scores = np.zeros(self.n_docs, dtype=np.float64)
+        for i, tid in enumerate(q_ids):
+            docs, tf = self._postings(tid)
+            contribution = self._contribution(tid, docs, tf)
+            scores[docs] += contribution if weights is None else weights[i] * contribution
+        docs = np.arange(self.n_docs) if self.live is None else np.flatnonzero(self.live)
+        order = np.lexsort((docs, -scores[docs]))[:k]
+        return docs[order], scores[docs[order]]
+
+    def _fill(self, docs: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Pad with zero-score documents in index order, as a stable full sort would."""
+        if len(docs) >= k:
+            return docs, scores
+        taken = set(docs.tolist())
+        live = self.live
+        extra = list(islice(
+            (d for d in range(self.n_docs) if d not in taken and (live is None or live[d])),
+            k - len(docs),
+        ))
+        return (np.concatenate([docs, np.asarray(extra, dtype=docs.dtype)]),
+                np.concatenate([scores, np.zeros(len(extra))]))
+
+    # -- incremental updates --------------------------
+    def doc_token_ids(self, doc: int) -> np.ndarray:
+        """Global term ids of a document, in text order."""
+        n_main = len(self.corpus)
+        if doc < n_main:
+            return self.corpus.token_ids[self.corpus.doc_offsets[doc]:self.corpus.doc_offsets[doc + 1]]
+        d = doc - n_main
+        return self.delta_token_ids[self.delta_offsets[d]:self.delta_offsets[d + 1]]
+
+    def with_documents(self, docs: Iterable[List[List[str]]]) -> "BM25Index":
+        """
+        Return an index that also contains the given documents (one token list per field).
+
+        New documents get the next doc ids. Only their tokens are processed:
+        the delta postings are regrouped, and df, avgdl and the derived
+        arrays are refreshed with vectorised passes.
+        """
+        new = copy.copy(self)
+        new.vocab = list(self.vocab)
+        new.term_to_id = dict(self.term_to_id)
+        ids: List[int] = []
+        field_len: List[List[int]] = []
+        for fields in docs:
+            for tokens in fields:
+                for tok in tokens:
+                    tid = new.term_to_id.get(tok)
+                    if tid is None:
+                        tid = new.term_to_id[tok] = len(new.vocab)
+                        new.vocab.append(tok)
+                    ids.append(tid)
+            field_len.append([len(tokens) for tokens in fields])
+        if not field_len:
+            return self
+        added_ids = np.asarray(ids, dtype=np.int64)
+        added_field_len = np.asarray(field_len, dtype=np.int32).reshape(len(field_len), -1)
+        added_len = added_field_len.sum(axis=1).astype(np.int64)
+
+        new.delta_token_ids = np.concatenate([self.delta_token_ids, added_ids])
+        new.delta_offsets = np.concatenate([self.delta_offsets, self.delta_offsets[-1] + np.cumsum(added_len)])
+        new.field_len = np.concatenate([self.field_len, added_field_len])
+        new.delta_term_ptr, new.delta_docs, new.delta_tf, delta_field_tf = _postings_from_tokens(
+            new.delta_token_ids, np.diff(new.delta_offsets), len(new.vocab), doc_base=len(self.corpus),
+            field_len=new.field_len[len(self.corpus):] if self.FIELD_POSTINGS else None,
+        )
+        if delta_field_tf is not None:
+            new.delta_field_tf = delta_field_tf
+        new.doc_len = np.concatenate([self.doc_len, added_len.astype(np.float64)])
+        new.n_docs = self.n_docs + len(field_len)
+        if self.live is not None:
+            new.live = np.concatenate([self.live, np.ones(len(field_len), dtype=bool)])
+
+        # Each added document raises df once per distinct term it contains
+        new.df = np.zeros(len(new.vocab), dtype=np.int64)
+        new.df[:len(self.df)] = self.df
+        added_term_ptr = _postings_from_tokens(added_ids, added_len, len(new.vocab))[0]
+        new.df += np.diff(added_term_ptr)
+        new._compute_stats()
+        return new
+
+    def without_documents(self, doc_ids: Iterable[int]) -> "BM25Index":
+        """Return an index where the given documents are tombstoned."""
+        live = np.ones(self.n_docs, dtype=bool) if self.live is None else self.live.copy()
+        doc_ids = sorted({int(d) for d in doc_ids if 0 <= int(d) < self.n_docs and live[int(d)]})
+        if not doc_ids:
+            return self
+        new = copy.copy(self)
+        live[doc_ids] = False
+        new.live = live
+        new.df = self.df.copy()
+        for d in doc_ids:
+            new.df[np.unique(self.doc_token_ids(d))] -= 1
+        new._compute_stats()
+        return new
+
+    def compacted(self) -> Tuple["BM25Index", np.ndarray]:
+        """
+        Fold the delta segment into the main one and drop tombstoned documents.
+
+        Returns:
+            The compacted index and, for each new doc id i, its old doc id kept[i]
+        """
+        kept = np.arange(self.n_docs) if self.live is None else np.flatnonzero(self.live)
+        parts = [self.doc_token_ids(d) for d in kept.tolist()]
+        lengths = np.fromiter((len(p) for p in parts), dtype=np.int64, count=len(parts))
+        token_ids = np.concatenate(parts).astype(np.int64) if parts else np.zeros(0, dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        corpus = TokenizedCorpus.from_global_ids(self.vocab, token_ids, offsets, field_len=self.field_len[kept])
+        return type(self)(corpus, **self._init_kwargs()), kept
+
+
+# --- BM25F field weighting ---------------------------
+class BM25FMixin:
+    """
+    BM25F scoring over the same postings, with a boost and length
+    normalisation per field (Robertson & Zaragoza's simple BM25F):
+
+        tf~(t, d) = sum_f  w_f * tf_f(t, d) / ((1 - b_f) + b_f * len_f(d) / avglen_f)
+        score     = sum_t  idf(t) * tf~ * (k1 + 1) / (tf~ + k1)
+
+    Each posting keeps its per-field term frequencies; the field-weighted
+    pseudo frequency is folded into the postings whenever collection
+    statistics change, so a query costs exactly as much as plain BM25.
+    """
+
+    FIELD_POSTINGS = True
+
+    def __init__(self, corpus: TokenizedCorpus, field_weights: Optional[Sequence[float]] = None,
+                 field_b: Optional[Sequence[float]] = None, **kwargs):
+        n_fields = corpus.n_fields
+        self.field_weights = np.asarray(field_weights if field_weights is not None else [1.0] * n_fields,
+                                        dtype=np.float64)
+        self.field_b = np.asarray(field_b if field_b is not None else [kwargs.get("b", 0.75)] * n_fields,
+                                  dtype=np.float64)
+        if len(self.field_weights) != n_fields or len(self.field_b) != n_fields:
+            raise ValueError(f"Expected {n_fields} field weights and b values")
+        super().__init__(corpus, **kwargs)
+
+    def _init_kwargs(self) -> Dict[str, Any]:
+        kwargs = super()._init_kwargs()
+        kwargs.update(field_weights=self.field_weights.tolist(), field_b=self.field_b.tolist())
+        return kwargs
+
+    def _compute_stats(self) -> None:
+        stats = self.collection_stats()
+        avg_len = stats.field_len_sum / stats.n_live if stats.n_live else np.ones(self.field_len.shape[1])
+        avg_len[avg_len == 0] = 1.0
+        field_norm = (1 - self.field_b) + self.field_b * self.field_len / avg_len
+        # post_tf / delta_tf hold the pseudo frequency; raw counts stay in *_field_tf
+        self.post_tf = self._pseudo_tf(self.post_field_tf, self.post_docs, field_norm)
+        self.delta_tf = self._pseudo_tf(self.delta_field_tf, self.delta_docs, field_norm)
+        super()._compute_stats()
+
+    def _pseudo_tf(self, field_tf: np.ndarray, docs: np.ndarray, field_norm: np.ndarray) -> np.ndarray:
+        return (field_tf * (self.field_weights / field_norm[docs])).sum(axis=1)
+
+    def _length_norm(self, total: int) -> np.ndarray:
+        # Length normalisation already happened per field inside the pseudo frequency
+        return np.full(self.n_docs, self.k1)
+
+
+class BM25FIndex(BM25FMixin, BM25Index):
+    """BM25F with MaxScore pruning."""
+
+
+# --- Sparse-matrix BM25 backend ----------------------
+class SparseBM25Index(BM25Index):
+    """
+    BM25 as a CSR term-document matrix of precomputed per-posting weights.
+
+    Row t of the matrix holds idf(t) * tf * (k1 + 1) / (tf + norm(d)) for every
+    document d containing t, so a query (or a batch of queries) is scored with
+    one sparse product. The CSR arrays reuse the postings layout directly.
+    Rankings agree with BM25Index; scores may differ in the last bits because
+    repeated query terms are summed as a weighted product. The matrix is
+    rebuilt after incremental updates, since the weights depend on avgdl.
+    """
+
+    def _compute_stats(self) -> None:
+        super()._compute_stats()
+        self._build_matrix()
+
+    def _build_matrix(self) -> None:
+        n_terms = len(self.vocab)
+        indptr, docs, tf = self.term_ptr, self.post_docs, self.post_tf
+        if self.n_delta:
+            # Interleave the delta postings so each term's row stays contiguous
+            main_terms = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+            delta_terms = np.repeat(np.arange(n_terms), np.diff(self.delta_term_ptr))
+            terms = np.concatenate([main_terms, delta_terms])
+            docs = np.concatenate([docs, self.delta_docs])
+            tf = np.concatenate([tf, self.delta_tf])
+            order = np.lexsort((docs, terms))
+            docs, tf = docs[order], tf[order]
+            indptr = np.zeros(n_terms + 1, dtype=np.int64)
+            np.cumsum(np.bincount(terms, minlength=n_terms), out=indptr[1:])
+        term_of_posting = np.repeat(np.arange(n_terms), np.diff(indptr))
+        weights = self._contribution(term_of_posting, docs, tf)
+        if self.live is not None:
+            weights = np.where(self.live[docs], weights, 0.0)
+        self.matrix = sparse.csr_matrix((weights, docs, indptr), shape=(n_terms, self.n_docs))
+        self.matrix.eliminate_zeros()
+
+    def _query_matrix(self, queries: List[List[str]]) -> sparse.csr_matrix:
+        rows, cols, data = [], [], []
+        for row, q_tokens in enumerate(queries):
+            ids, weights = self._query_terms(q_tokens)
+            rows.extend([row] * len(ids))
+            cols.extend(ids)
+            data.extend(weights or [1.0] * len(ids))
+        # Duplicate (row, term) entries are summed, giving the (weighted) term multiplicity
+        data = np.asarray(data, dtype=np.float64)
+        return sparse.csr_matrix((data, (rows, cols)), shape=(len(queries), self.matrix.shape[0]))
+
+    def get_scores(self, q_tokens: List[str]) -> np.ndarray:
+        scores = self._query_matrix([q_tokens]) @ self.matrix
+        return scores.toarray().ravel()
+
+    def top_k(self, q_tokens: List[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.top_k_many([q_tokens], k)[0]
+
+    def top_k_many(self, queries: List[List[str]], k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Score all queries with one sparse matrix-matrix product."""
+        k = min(k, self.n_live)
+        if not queries:
+            return []
+        if k <= 0:
+            return [(np.zeros(0, dtype=np.int64), np.zeros(0)) for _ in queries]
+        scores = (self._query_matrix(queries) @ self.matrix).tocsr()
+        scores.sort_indices()
+
+        results = []
+        for row in range(scores.shape[0]):
+            lo, hi = scores.indptr[row], scores.indptr[row + 1]
+            docs = scores.indices[lo:hi].astype(np.int64)
+            vals = scores.data[lo:hi]
+            if self.live is not None:
+                # Removed documents already weigh 0; this drops filtered-out ones
+                keep = self.live[docs]
+                docs, vals = docs[keep], vals[keep]
+            if len(vals) > k:
+                # argpartition finds the k-th score; keep ties so doc id can break them
+                kth = vals[np.argpartition(vals, len(vals) - k)[len(vals) - k]]
+                mask = vals >= kth
+                docs, vals = docs[mask], vals[mask]
+            order = np.lexsort((docs, -vals))[:k]
+            results.append(self._fill(docs[order], vals[order], k))
+        return results
+
+
+class SparseBM25FIndex(BM25FMixin, SparseBM25Index):
+    """BM25F weights in a CSR matrix."""
+
+
+# --- Boosted re-ranking ------------------------------
+def boosted_top_k_many(lexical, queries: List[List[str]], k: int,
+                       boost_fn, max_factor: float, min_fetch: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Top k per query after multiplying each candidate's score by a boost factor.
+
+    Only the lexical top min_fetch (or k) candidates are boosted. Since no
+    factor exceeds max_factor, once the k-th boosted score beats the last
+    candidate's score times max_factor no unseen document can enter the top
+    k; until then more candidates are fetched. The result is the same as
+    boosting every document. Scores must be non-negative, as BM25 scores are.
+
+    Args:
+        lexical: Retriever with top_k_many(queries, k)
+        queries: Tokenized queries
+        k: Results per query
+        boost_fn: boost_fn(i, docs) -> factor per candidate of query i, each >= 1
+        max_factor: Upper bound on any factor boost_fn returns
+        min_fetch: Candidates fetched per query in the first round
+
+    Returns:
+        (doc ids, boosted scores) per query, ties broken by lower doc id
+    """
+    results: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * len(queries)
+    pending = list(range(len(queries)))
+    fetch = max(k, min_fetch)
+    while pending:
+        retry = []
+        for i, (docs, scores) in zip(pending, lexical.top_k_many([queries[i] for i in pending], fetch)):
+            boosted = scores * boost_fn(i, docs)
+            order = np.lexsort((docs, -boosted))[:k]
+            # Unseen documents score at most scores[-1] * max_factor; once that is 0, the
+            # candidates already end in the zero-score fill, which no boost can reorder
+            exact = len(docs) < fetch or scores[-1] <= 0 or (
+                len(order) == k and boosted[order[-1]] > scores[-1] * max_factor)
+            if exact:
+                results[i] = (docs[order], boosted[order])
+            else:
+                retry.append(i)
+        pending = retry
+        fetch *= 4
+    return results
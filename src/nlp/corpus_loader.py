@@ -0,0 +1,172 @@
+import os
+import glob
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+
+# Per-month Product Hunt files written by product_hunt_scraper.py, e.g. data/2024_01.json
+PH_MONTHLY_PATTERN = "[0-9][0-9][0-9][0-9]_[0-9][0-9].json"
+PH_COMBINED_FILE = "producthunt_all_years.json"
+# YC batch membership written by yc_scraper.py, e.g. data/batch_urls/W24_urls.json
+YC_BATCH_PATTERN = os.path.join("batch_urls", "*_urls.json")
+
+_decoder = json.JSONDecoder()
+
+
+# --- Streaming JSON ----------------------------------
+def iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array without loading the whole file.
+
+    The file is read in chunks and each element is decoded as soon as it is
+    complete, so memory holds one element (plus one chunk) at a time.
+
+    Raises:
+        ValueError: If the file is not a well-formed JSON array
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+        # What the next token must be: the opening "[", a value or "]" right
+        # after it, a value after a comma, or a comma or "]" after a value
+        expect = "open"
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf):
+                char = buf[pos]
+                if expect == "open":
+                    if char != "[":
+                        raise ValueError(f"{path} does not contain a JSON array")
+                    expect, pos = "first", pos + 1
+                    continue
+                if expect == "separator":
+                    if char == "]":
+                        return
+                    if char != ",":
+                        raise ValueError(f"Missing comma between elements of the JSON array in {path}")
+                    expect, pos = "value", pos + 1
+                    continue
+                if char == "]" and expect == "first":
+                    return
+                if char in ",]":
+                    raise ValueError(f"Empty element in the JSON array in {path}")
+                try:
+                    value, end = _decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    value, end = None, -1
+                # Only trust an element once the separator after it has been read,
+                # since a value cut at the chunk boundary can decode short
+                nxt = end
+                while 0 <= nxt < len(buf) and buf[nxt].isspace():
+                    nxt += 1
+                if 0 <= nxt < len(buf) and buf[nxt] in ",]":
+                    yield value
+                    expect, pos = "separator", end
+                    continue
+            if eof:
+                raise ValueError(f"Malformed or truncated JSON array in {path}")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+
+
+def iter_json_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of a scraper output file.
+
+    Top-level arrays are streamed; the legacy combined Product Hunt file (a
+    dict of period -> list) is small enough per period but has no streaming
+    form, so it is loaded whole.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        head = f.read(64).lstrip()
+    if head.startswith("["):
+        records = iter_json_array(path)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        records = (record for group in data.values() for record in group)
+    for record in records:
+        if isinstance(record, dict):
+            yield record
+
+
+# --- Corpus discovery --------------------------------
+def discover_ph_files(ph_data_path: Optional[str], data_dir: str) -> List[str]:
+    """
+    Resolve which Product Hunt files feed the index.
+
+    Args:
+        ph_data_path: A combined file, a directory of per-month files, or
+            None to use the per-month files in data_dir
+        data_dir: Directory holding the YC data
+
+    Returns:
+        Product Hunt data files in chronological order
+    """
+    if ph_data_path and os.path.isfile(ph_data_path):
+        return [ph_data_path]
+    directory = ph_data_path or data_dir
+    monthly = sorted(glob.glob(os.path.join(directory, PH_MONTHLY_PATTERN)))
+    if monthly:
+        return monthly
+    # Fall back to the combined file when no per-month files exist
+    combined = os.path.join(directory, PH_COMBINED_FILE)
+    return [combined] if os.path.isfile(combined) else []
+
+
+def discover_batch_files(data_dir: str) -> List[str]:
+    """Return the YC batch url lists in data_dir, sorted by file name."""
+    return sorted(glob.glob(os.path.join(data_dir, YC_BATCH_PATTERN)))
+
+
+def load_yc_batches(batch_paths: List[str]) -> Dict[str, str]:
+    """Map each YC company url to its batch (e.g. 'W24'), from the batch url lists."""
+    batches = {}
+    for path in batch_paths:
+        batch = os.path.basename(path)[:-len("_urls.json")]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for url in json.load(f):
+                    batches[url] = batch
+        except (OSError, ValueError) as e:
+            logging.warning(f"Skipping unreadable batch file {path}: {e}")
+    return batches
+
+
+def iter_corpus_records(yc_data_path: str, ph_paths: List[str],
+                        yc_batches: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream normalized YC and Product Hunt records in index order.
+
+    Every record gets a 'source' field, and YC records get their 'batch'
+    from yc_batches when they don't carry one. Unreadable files are logged
+    and skipped, so one bad month doesn't keep the rest of the corpus out.
+    """
+    sources = [(yc_data_path, "yc")] + [(path, "producthunt") for path in ph_paths]
+    for path, source in sources:
+        if not os.path.isfile(path):
+            logging.warning(f"Data file not found: {path}")
+            continue
+        count = 0
+        try:
+            for record in iter_json_records(path):
+                record['source'] = record.get('source', source)
+                if yc_batches and source == "yc" and "batch" not in record and record.get("url") in yc_batches:
+                    record['batch'] = yc_batches[record["url"]]
+                count += 1
+                yield record
+        except (ValueError, OSError) as e:
+            logging.error(f"Failed to read {path} after {count} records: {e}")
+        logging.debug(f"Loaded {count} {source} records from {path}")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
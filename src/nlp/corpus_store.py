@@ -0,0 +1,384 @@
+import os
+import re
+import json
+import shutil
+import logging
+import tempfile
+import zipfile
+from array import array
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+STORE_FORMAT_VERSION = 1
+STORE_PREFIX = "corpus_"
+
+# Fields kept in typed arrays so they can be filtered and ranked without decoding records
+CATEGORICAL_FIELDS = ("source", "batch")
+INT_FIELDS = ("period", "votes")
+TYPED_FIELDS = CATEGORICAL_FIELDS + INT_FIELDS
+MISSING = -1
+
+_PERIOD_RE = re.compile(r"^(\d{4})/(\d{2})$")
+_ABSENT = object()
+
+
+def _encode_int(name: str, value: Any) -> Optional[int]:
+    """Typed form of period ("2024/01" -> 202401) and votes, or None if the value doesn't fit."""
+    if name == "period":
+        m = _PERIOD_RE.match(value) if isinstance(value, str) else None
+        return int(m.group(1)) * 100 + int(m.group(2)) if m else None
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value < 2 ** 31:
+        return value
+    return None
+
+
+def _decode_int(name: str, value: int) -> Any:
+    return f"{value // 100:04d}/{value % 100:02d}" if name == "period" else value
+
+
+# --- Records -----------------------------------------
+class CompanyRecord(MutableMapping):
+    """
+    Dict-like view of one stored company/product.
+
+    Fields are decoded from the store only when read. Writes (such as the
+    relevance score attached to search results) go to a small overlay and
+    never touch the shared store.
+    """
+
+    __slots__ = ("_store", "_doc", "_overlay")
+
+    def __init__(self, store: "CorpusStore", doc: int):
+        self._store = store
+        self._doc = doc
+        self._overlay: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._overlay.get(key, _ABSENT)
+        if value is _ABSENT:
+            value = self._store.get_field(self._doc, key, _ABSENT)
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._overlay[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._overlay[key] = _ABSENT
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._store.fields_of(self._doc):
+            if self._overlay.get(key) is not _ABSENT:
+                yield key
+        for key, value in self._overlay.items():
+            if value is not _ABSENT and not self._store.has_field(self._doc, key):
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __repr__(self) -> str:
+        return f"CompanyRecord({dict(self)!r})"
+
+
+# --- Store -------------------------------------------
+class CorpusStore:
+    """
+    Columnar, read-only storage for the indexed records.
+
+    String fields live in one UTF-8 buffer per field with an offsets array
+    (document i's value is data[offsets[i]:offsets[i + 1]]); source, batch,
+    period and votes live in typed arrays (MISSING when absent). Values that
+    fit neither layout (lists, None, odd periods) are kept in a small
+    per-document side table. Loaded stores are memory-mapped, so forked
+    workers share the pages instead of each holding a heap of dicts.
+
+    Records added after the store was built are kept as plain dicts in a
+    tail segment until the next compaction rebuilds the columns.
+    """
+
+    def __init__(self, n_docs: int, field_order: List[str], text: Dict[str, tuple], typed: Dict[str, np.ndarray],
+                 categories: Dict[str, List[str]], extras: Dict[int, Dict[str, Any]]):
+        self.n_base = n_docs
+        self.field_order = field_order
+        self._text = text
+        self._typed = typed
+        self._categories = categories
+        self._category_codes = {name: {c: i for i, c in enumerate(cats)} for name, cats in categories.items()}
+        self._extras = extras
+        self._tail: List[Dict[str, Any]] = []
+        self._lookup: Dict[str, Dict[Any, List[int]]] = {}
+
+    def __len__(self) -> int:
+        return self.n_base + len(self._tail)
+
+    def __getitem__(self, doc: int) -> CompanyRecord:
+        return self.record(doc)
+
+    def __iter__(self) -> Iterator[CompanyRecord]:
+        return (self.record(i) for i in range(len(self)))
+
+    # -- field access ---------------------------------
+    def record(self, doc: int) -> CompanyRecord:
+        if not -len(self) <= doc < len(self):
+            raise IndexError(doc)
+        return CompanyRecord(self, doc % len(self))
+
+    def get_field(self, doc: int, name: str, default: Any = None) -> Any:
+        if doc >= self.n_base:
+            return self._tail[doc - self.n_base].get(name, default)
+        extra = self._extras.get(doc)
+        if extra is not None and name in extra:
+            return extra[name]
+        column = self._text.get(name)
+        if column is not None:
+            data, offsets, present = column
+            if present is not None and not present[doc]:
+                return default
+            return bytes(data[offsets[doc]:offsets[doc + 1]]).decode("utf-8")
+        values = self._typed.get(name)
+        if values is not None and values[doc] != MISSING:
+            value = int(values[doc])
+            return self._categories[name][value] if name in self._categories else _decode_int(name, value)
+        return default
+
+    def has_field(self, doc: int, name: str) -> bool:
+        return self.get_field(doc, name, _ABSENT) is not _ABSENT
+
+    def fields_of(self, doc: int) -> List[str]:
+        if doc >= self.n_base:
+            return list(self._tail[doc - self.n_base])
+        return [name for name in self.field_order if self.has_field(doc, name)]
+
+    def materialize(self, doc: int, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Decode a record into a plain dict, limited to the given fields if any."""
+        names = self.fields_of(doc) if fields is None else fields
+        out = {}
+        for name in names:
+            value = self.get_field(doc, name, _ABSENT)
+            if value is not _ABSENT:
+                out[name] = value
+        return out
+
+    def column(self, name: str) -> np.ndarray:
+        """Typed values of a field for every document (category codes for categorical fields)."""
+        return self._typed[name]
+
+    def categories(self, name: str) -> List[str]:
+        return self._categories[name]
+
+    def ids_for(self, name: str, values: Iterable[Any]) -> List[int]:
+        """Doc ids whose field equals one of the values, via a lookup table built on first use."""
+        table = self._lookup.get(name)
+        if table is None:
+            table = {}
+            for doc in range(len(self)):
+                table.setdefault(self.get_field(doc, name), []).append(doc)
+            self._lookup[name] = table
+        return sorted(doc for value in set(values) for doc in table.get(value, []))
+
+    # -- updates (copy-on-write) ----------------------
+    def extended(self, records: List[Dict[str, Any]]) -> "CorpusStore":
+        """Return a store with the records appended; this store is left untouched."""
+        new = object.__new__(CorpusStore)
+        new.__dict__.update(self.__dict__)
+        new._tail = self._tail + [dict(record) for record in records]
+        new._lookup = {}
+        base = len(self)
+        new._typed = dict(self._typed)
+        new._categories = {name: list(cats) for name, cats in self._categories.items()}
+        new._category_codes = {name: dict(codes) for name, codes in self._category_codes.items()}
+        for name in TYPED_FIELDS:
+            added = np.full(len(records), MISSING, dtype=np.int32)
+            for i, record in enumerate(records):
+                added[i] = new._typed_code(name, record.get(name, _ABSENT))
+            new._typed[name] = np.concatenate([self._typed[name][:base], added])
+        return new
+
+    def _typed_code(self, name: str, value: Any) -> int:
+        if value is _ABSENT:
+            return MISSING
+        if name in CATEGORICAL_FIELDS:
+            if not isinstance(value, str):
+                return MISSING
+            codes = self._category_codes[name]
+            if value not in codes:
+                codes[value] = len(self._categories[name])
+                self._categories[name].append(value)
+            return codes[value]
+        code = _encode_int(name, value)
+        return MISSING if code is None else code
+
+    def take(self, doc_ids: Iterable[int]) -> "CorpusStore":
+        """Build a compact store holding only the given documents, in order."""
+        builder = CorpusStoreBuilder()
+        for doc in doc_ids:
+            builder.append(self.materialize(int(doc)))
+        return builder.build()
+
+    # -- persistence ----------------------------------
+    def save(self, path: str) -> None:
+        """
+        Write the store as a directory of .npy arrays plus metadata.
+
+        The directory is written under a unique temporary name next to path
+        and renamed, so a crash mid-write never leaves a partial store behind
+        and processes saving the same store at once never mix their files.
+        """
+        if self._tail:
+            raise ValueError("Only compacted stores can be saved")
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+        # Dot-prefixed, so another process's stale-store cleanup never matches it
+        tmp = tempfile.mkdtemp(dir=parent, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            self._write(tmp)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            # Another process published the same store in between; its copy is as good as ours
+            if not os.path.isdir(path):
+                raise
+
+    def _write(self, tmp: str) -> None:
+        """Write the arrays and metadata into the directory tmp."""
+        text_names = list(self._text)
+        for i, name in enumerate(text_names):
+            data, offsets, present = self._text[name]
+            np.save(os.path.join(tmp, f"text_{i}_data.npy"), np.asarray(data))
+            np.save(os.path.join(tmp, f"text_{i}_offsets.npy"), np.asarray(offsets))
+            if present is not None:
+                np.save(os.path.join(tmp, f"text_{i}_present.npy"), np.asarray(present))
+        for name in TYPED_FIELDS:
+            np.save(os.path.join(tmp, f"typed_{name}.npy"), np.asarray(self._typed[name]))
+        meta = {
+            "format": STORE_FORMAT_VERSION,
+            "n_docs": self.n_base,
+            "field_order": self.field_order,
+            "text_fields": text_names,
+            "categories": self._categories,
+            "extras": {str(doc): values for doc, values in self._extras.items()},
+        }
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> Optional["CorpusStore"]:
+        """Load a saved store (memory-mapped by default), or None if it is missing or unreadable."""
+        if not os.path.isdir(path):
+            return None
+        mode = "r" if mmap else None
+        try:
+            with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("format") != STORE_FORMAT_VERSION:
+                return None
+            text = {}
+            for i, name in enumerate(meta["text_fields"]):
+                present_path = os.path.join(path, f"text_{i}_present.npy")
+                text[name] = (
+                    np.load(os.path.join(path, f"text_{i}_data.npy"), mmap_mode=mode),
+                    np.load(os.path.join(path, f"text_{i}_offsets.npy"), mmap_mode=mode),
+                    np.load(present_path, mmap_mode=mode) if os.path.isfile(present_path) else None,
+                )
+            typed = {name: np.load(os.path.join(path, f"typed_{name}.npy"), mmap_mode=mode) for name in TYPED_FIELDS}
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+            logging.warning(f"Ignoring unreadable corpus store {path}: {e}")
+            return None
+        extras = {int(doc): values for doc, values in meta["extras"].items()}
+        return cls(meta["n_docs"], meta["field_order"], text, typed, meta["categories"], extras)
+
+
+class CorpusStoreBuilder:
+    """Accumulate records one at a time into the columnar layout of CorpusStore."""
+
+    def __init__(self):
+        self.n_docs = 0
+        self.field_order: List[str] = []
+        self._text: Dict[str, list] = {}
+        self._typed = {name: array("i") for name in TYPED_FIELDS}
+        self._categories: Dict[str, Dict[str, int]] = {name: {} for name in CATEGORICAL_FIELDS}
+        self._extras: Dict[int, Dict[str, Any]] = {}
+
+    def append(self, record: Dict[str, Any]) -> None:
+        doc = self.n_docs
+        extra = {}
+        for name, value in record.items():
+            if name not in self.field_order:
+                self.field_order.append(name)
+            if name in TYPED_FIELDS:
+                code = self._typed_code(name, value)
+                if code == MISSING:
+                    extra[name] = value
+                self._typed[name].append(code)
+            elif isinstance(value, str):
+                column = self._text.get(name)
+                if column is None:
+                    # [data, ends, present], back-filled for the documents seen so far
+                    column = self._text[name] = [bytearray(), array("q", [0] * (doc + 1)), bytearray(doc)]
+                column[0] += value.encode("utf-8")
+                column[1].append(len(column[0]))
+                column[2].append(1)
+            else:
+                extra[name] = value
+        for name in TYPED_FIELDS:
+            if len(self._typed[name]) == doc:
+                self._typed[name].append(MISSING)
+        for data, ends, present in self._text.values():
+            if len(present) == doc:
+                ends.append(len(data))
+                present.append(0)
+        if extra:
+            self._extras[doc] = extra
+        self.n_docs += 1
+
+    def _typed_code(self, name: str, value: Any) -> int:
+        if name in CATEGORICAL_FIELDS:
+            if not isinstance(value, str):
+                return MISSING
+            return self._categories[name].setdefault(value, len(self._categories[name]))
+        code = _encode_int(name, value)
+        return MISSING if code is None else code
+
+    def build(self) -> CorpusStore:
+        text = {}
+        for name, (data, ends, present) in self._text.items():
+            mask = np.frombuffer(bytes(present), dtype=bool)
+            text[name] = (
+                np.frombuffer(bytes(data), dtype=np.uint8),
+                np.frombuffer(ends, dtype=np.int64).copy(),
+                None if mask.all() else mask,
+            )
+        typed = {name: np.frombuffer(values, dtype=np.int32).copy() for name, values in self._typed.items()}
+        categories = {name: list(codes) for name, codes in self._categories.items()}
+        return CorpusStore(self.n_docs, self.field_order, text, typed, categories, self._extras)
+
+
+# --- Cache location ----------------------------------
+def store_path(cache_dir: str, fingerprint: str) -> str:
+    return os.path.join(cache_dir, f"{STORE_PREFIX}{fingerprint[:24]}")
+
+
+def save_store(path: str, store: CorpusStore) -> bool:
+    """Persist a store next to the index snapshot and drop stores built from older data."""
+    try:
+        store.save(path)
+    except OSError as e:
+        logging.warning(f"Could not write corpus store {path}: {e}")
+        return False
+    cache_dir = os.path.dirname(path)
+    for name in os.listdir(cache_dir):
+        stale = os.path.join(cache_dir, name)
+        if name.startswith(STORE_PREFIX) and stale != path:
+            shutil.rmtree(stale, ignore_errors=True)
+    logging.info(f"Saved corpus store to {path}")
+    return True
@@ -0,0 +1,171 @@
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# 128 hash functions split into 32 bands of 4 rows: pairs with Jaccard
+# similarity around 0.5 or more share a band with high probability. Fewer
+# hash functions make the estimate noisy enough that unrelated records
+# (Jaccard ~0.3) occasionally pass THRESHOLD
+NUM_PERM = 128
+BANDS = 32
+# Estimated Jaccard similarity (shared stemmed terms) above which two records are the same startup
+THRESHOLD = 0.5
+# Records with fewer distinct terms carry too little text to compare
+MIN_TERMS = 5
+_SEED = 1234
+_EMPTY = np.iinfo(np.uint32).max
+
+
+def _hash_params(num_perm: int) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(_SEED)
+    a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+    return a, b
+
+
+def term_hashes(vocab: List[str]) -> np.ndarray:
+    """Stable 32-bit hash per term, so signatures don't depend on term id assignment."""
+    return np.fromiter((zlib.crc32(term.encode("utf-8")) for term in vocab), dtype=np.uint64, count=len(vocab))
+
+
+def minhash_signatures(token_ids: np.ndarray, doc_offsets: np.ndarray, hashes: np.ndarray,
+                       num_perm: int = NUM_PERM) -> np.ndarray:
+    """
+    MinHash signatures of each document's set of distinct terms.
+
+    Uses multiply-shift hashing h(x) = ((a * x + b) mod 2^64) >> 32, one
+    pass over the (doc, term) pairs per hash function. Documents with fewer
+    than MIN_TERMS distinct terms get an all-_EMPTY signature.
+
+    Returns:
+        (n_docs, num_perm) uint32 array
+    """
+    n_docs = len(doc_offsets) - 1
+    sig = np.full((n_docs, num_perm), _EMPTY, dtype=np.uint32)
+    if not len(token_ids):
+        return sig
+    n_terms = len(hashes)
+    doc_of_token = np.repeat(np.arange(n_docs, dtype=np.int64), np.diff(doc_offsets))
+    pairs = np.unique(doc_of_token * n_terms + token_ids.astype(np.int64))
+    docs = pairs // n_terms
+    counts = np.bincount(docs, minlength=n_docs)
+    eligible = counts >= MIN_TERMS
+    if not eligible.any():
+        return sig
+    keep = eligible[docs]
+    x = hashes[pairs[keep] % n_terms]
+    starts = np.concatenate([[0], np.cumsum(counts[eligible])[:-1]])
+    a, b = _hash_params(num_perm)
+    for i in range(num_perm):
+        h = ((a[i] * x + b[i]) >> np.uint64(32)).astype(np.uint32)
+        sig[eligible, i] = np.minimum.reduceat(h, starts)
+    return sig
+
+
+def cluster_signatures(sig: np.ndarray, bands: int = BANDS, threshold: float = THRESHOLD) -> np.ndarray:
+    """
+    Group near-duplicate documents with banded LSH over MinHash signatures.
+
+    Within each band, documents whose rows hash alike land in one bucket.
+    Each bucket member is verified against the bucket's first document
+    only, so the work stays linear in the number of documents rather than
+    quadratic in bucket size. Verified pairs are merged with union-find.
+
+    Returns:
+        canonical[i]: the lowest doc id in document i's cluster (i itself if unique)
+    """
+    n_docs, num_perm = sig.shape
+    canonical = np.arange(n_docs, dtype=np.int64)
+    ids = np.flatnonzero(sig[:, 0] != _EMPTY)
+    if len(ids) < 2:
+        return canonical
+    rows = num_perm // bands
+    firsts, members = [], []
+    for band in range(bands):
+        key = np.zeros(len(ids), dtype=np.uint64)
+        for r in range(band * rows, (band + 1) * rows):
+            key = key * np.uint64(1000003) + sig[ids, r].astype(np.uint64)
+        order = np.argsort(key, kind="stable")
+        sorted_key = key[order]
+        new_bucket = np.concatenate([[True], sorted_key[1:] != sorted_key[:-1]])
+        bucket_start = np.maximum.accumulate(np.where(new_bucket, np.arange(len(order)), 0))
+        firsts.append(ids[order[bucket_start[~new_bucket]]])
+        members.append(ids[order[~new_bucket]])
+    a = np.concatenate(firsts)
+    b = np.concatenate(members)
+    pairs = np.unique(np.minimum(a, b) * n_docs + np.maximum(a, b))
+    a, b = pairs // n_docs, pairs % n_docs
+    similar = (sig[a] == sig[b]).mean(axis=1) >= threshold
+
+    # Union-find, always keeping the lower doc id as root
+    parent = list(range(n_docs))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for x, y in zip(a[similar].tolist(), b[similar].tolist()):
+        rx, ry = find(x), find(y)
+        if rx != ry:
+            parent[max(rx, ry)] = min(rx, ry)
+    return np.fromiter((find(x) for x in range(n_docs)), dtype=np.int64, count=n_docs)
+
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures and cluster labels for every indexed document.
+
+    canonical[i] is the id of the first document of i's cluster and only
+    labels it: collapse() keeps whichever member ranks best for the query,
+    so a Product Hunt launch can stand in for its company's YC entry.
+    Updates return new objects and recluster from the stored signatures,
+    which is cheap next to hashing.
+    """
+
+    def __init__(self, signatures: np.ndarray, hashes: np.ndarray):
+        self.signatures = signatures
+        self.hashes = hashes
+        self.canonical = cluster_signatures(signatures)
+
+    @classmethod
+    def from_index(cls, index, signatures: Optional[np.ndarray] = None) -> "NearDuplicateIndex":
+        """Hash every document of a BM25 index (main and delta segments)."""
+        hashes = term_hashes(index.vocab)
+        if signatures is None:
+            corpus = index.corpus
+            signatures = minhash_signatures(corpus.token_ids, corpus.doc_offsets, hashes)
+            if index.n_delta:
+                signatures = np.concatenate([
+                    signatures, minhash_signatures(index.delta_token_ids, index.delta_offsets, hashes)
+                ])
+        return cls(signatures, hashes)
+
+    @property
+    def n_clusters(self) -> int:
+        return int(np.count_nonzero(self.canonical == np.arange(len(self.canonical))))
+
+    def extended(self, index) -> "NearDuplicateIndex":
+        """Hash the documents the index gained since this object was built."""
+        n_old = len(self.signatures)
+        hashes = self.hashes
+        if len(index.vocab) > len(hashes):
+            hashes = np.concatenate([hashes, term_hashes(index.vocab[len(hashes):])])
+        # New documents all live in the delta segment, after the main one
+        first = n_old - len(index.corpus)
+        offsets = index.delta_offsets[first:]
+        tokens = index.delta_token_ids[offsets[0]:offsets[-1]]
+        added = minhash_signatures(tokens, offsets - offsets[0], hashes)
+        return NearDuplicateIndex(np.concatenate([self.signatures, added]), hashes)
+
+    def take(self, kept: np.ndarray, index) -> "NearDuplicateIndex":
+        """Keep the signatures of the given documents, renumbered to match a compacted index."""
+        return NearDuplicateIndex(self.signatures[kept], term_hashes(index.vocab))
+
+    def collapse(self, docs: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Keep the best-ranked document of each cluster, up to k, in rank order."""
+        _, first = np.unique(self.canonical[docs], return_index=True)
+        keep = np.sort(first)[:k]
+        return docs[keep], scores[keep]
@@ -0,0 +1,128 @@
+from typing import Tuple
+
+import numpy as np
+
+from nlp.bm25_index import concat_ranges
+
+# Candidates re-ranked per query: the diversified top k is drawn from the relevance top this many
+DIVERSITY_CANDIDATES = 30
+# Terms kept per document signature, highest tf-idf first; the rest barely move a cosine
+SIGNATURE_TERMS = 32
+
+
+class TermSignatures:
+    """
+    Compact sparse tf-idf vectors of the indexed documents, for comparing search results.
+
+    Each document keeps only its SIGNATURE_TERMS heaviest terms by
+    (1 + log tf) * idf, L2-normalised, as one row of a hand-rolled CSR
+    layout (ptr, terms, weights). The cosine similarity of every pair among
+    a few dozen candidates is then one gather into a small dense block and
+    one matrix product, tens of microseconds. Each document is weighted with
+    the idf of the generation it was signed in, so signing documents added
+    later leaves the existing rows alone.
+    """
+
+    def __init__(self, ptr: np.ndarray, terms: np.ndarray, weights: np.ndarray):
+        self.ptr = ptr
+        self.terms = terms
+        self.weights = weights
+
+    @classmethod
+    def from_index(cls, index) -> "TermSignatures":
+        """Sign every document of a BM25 index, main segment and delta."""
+        token_ids = np.concatenate([index.corpus.token_ids, index.delta_token_ids])
+        doc_len = np.concatenate([np.diff(index.corpus.doc_offsets), np.diff(index.delta_offsets)])
+        return cls(*cls._sign(token_ids, doc_len, cls._idf(index)))
+
+    def extended(self, index) -> "TermSignatures":
+        """Also sign the documents the BM25 index gained since this was built."""
+        first = len(self.ptr) - 1 - len(index.corpus)
+        offsets = index.delta_offsets[first:]
+        if len(offsets) <= 1:
+            return self
+        ptr, terms, weights = self._sign(index.delta_token_ids[offsets[0]:offsets[-1]], np.diff(offsets),
+                                         self._idf(index))
+        return TermSignatures(np.concatenate([self.ptr, self.ptr[-1] + ptr[1:]]),
+                              np.concatenate([self.terms, terms]), np.concatenate([self.weights, weights]))
+
+    @staticmethod
+    def _idf(index) -> np.ndarray:
+        return np.log((1.0 + index.n_docs) / (1.0 + index.df))
+
+    @staticmethod
+    def _sign(token_ids: np.ndarray, doc_len: np.ndarray,
+              idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """CSR rows (ptr, terms, weights) of the documents given as term ids and lengths."""
+        n_docs, n_terms = len(doc_len), len(idf)
+        docs = np.repeat(np.arange(n_docs, dtype=np.int64), doc_len)
+        pairs, tf = np.unique(docs * n_terms + token_ids.astype(np.int64), return_counts=True)
+        docs, terms = pairs // n_terms, pairs % n_terms
+        weights = (1.0 + np.log(tf)) * idf[terms]
+        # Rank terms within each document by weight and keep the first SIGNATURE_TERMS
+        order = np.lexsort((-weights, docs))
+        docs, terms, weights = docs[order], terms[order], weights[order]
+        keep = np.arange(len(docs)) - np.searchsorted(docs, np.arange(n_docs))[docs] < SIGNATURE_TERMS
+        docs, terms, weights = docs[keep], terms[keep], weights[keep]
+        norms = np.sqrt(np.bincount(docs, weights=weights ** 2, minlength=n_docs))
+        # Documents whose terms all have zero idf (in every document) keep all-zero rows
+        weights = weights / np.where(norms > 0, norms, 1.0)[docs]
+        ptr = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(docs, minlength=n_docs), out=ptr[1:])
+        return ptr, terms.astype(np.int32), weights
+
+    @property
+    def nbytes(self) -> int:
+        return self.weights.nbytes + self.terms.nbytes + self.ptr.nbytes
+
+    def similarities(self, docs: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every pair of the given documents (0 for documents without terms)."""
+        starts = self.ptr[docs]
+        lengths = self.ptr[docs + 1] - starts
+        pos = concat_ranges(starts, lengths)
+        terms, column = np.unique(self.terms[pos], return_inverse=True)
+        dense = np.zeros((len(docs), len(terms)))
+        dense[np.repeat(np.arange(len(docs)), lengths), column.ravel()] = self.weights[pos]
+        return np.clip(dense @ dense.T, 0.0, 1.0)
+
+
+def mmr_rerank(docs: np.ndarray, scores: np.ndarray, similarity: np.ndarray, k: int,
+               diversity: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Maximal marginal relevance: greedily pick k candidates trading relevance for novelty.
+
+    Each step takes the candidate maximising
+    (1 - diversity) * relevance - diversity * (similarity to the closest pick so far),
+    with relevance the scores min-max scaled over the candidates, so the
+    trade-off means the same for BM25, cosine and fused scores. Ties go to
+    the better-ranked candidate. Candidates scoring 0 or less (padding from
+    retrievers that matched fewer documents, last since candidates come best
+    first) only fill the places left after the others, in their order.
+
+    Args:
+        docs: Candidate doc ids, best first
+        scores: Their relevance scores
+        similarity: (len(docs), len(docs)) pairwise similarities in [0, 1]
+        k: Number of results to pick
+        diversity: 0 keeps the relevance order; 1 only avoids similar results
+
+    Returns:
+        (doc ids, relevance scores) of the picks, in pick order
+    """
+    n = int(np.count_nonzero(scores > 0))
+    if n <= 1 or diversity <= 0:
+        return docs[:k], scores[:k]
+    matched = scores[:n]
+    spread = matched.max() - matched.min()
+    relevance = (matched - matched.min()) / spread if spread > 0 else np.ones(n)
+    closest = np.zeros(n)
+    available = np.ones(n, dtype=bool)
+    picks = []
+    for _ in range(min(k, n)):
+        gain = np.where(available, (1.0 - diversity) * relevance - diversity * closest, -np.inf)
+        pick = int(np.argmax(gain))
+        picks.append(pick)
+        available[pick] = False
+        np.maximum(closest, similarity[pick, :n], out=closest)
+    picks = np.concatenate([np.asarray(picks, dtype=np.int64), np.arange(n, len(docs))])[:k]
+    return docs[picks], scores[picks]
@@ -0,0 +1,119 @@
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from nlp.corpus_store import CATEGORICAL_FIELDS, MISSING, CorpusStore
+
+# Accepted filter keys: categorical fields take one value or a list of values,
+# range bounds are inclusive and only match documents that have the field
+FILTER_KEYS = ("source", "batch", "period_from", "period_to", "min_votes", "max_votes")
+
+_PERIOD_BOUND_RE = re.compile(r"^(\d{4})(?:[/-](\d{1,2}))?$")
+
+
+def _period_bound(value: Any, upper: bool) -> int:
+    """Parse 2023, "2023" or "2023/05" into YYYYMM; a bare year spans the whole year."""
+    m = _PERIOD_BOUND_RE.match(str(value).strip())
+    if not m:
+        raise ValueError(f"Invalid period '{value}', expected YYYY or YYYY/MM")
+    month = int(m.group(2)) if m.group(2) else (12 if upper else 1)
+    return int(m.group(1)) * 100 + month
+
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> Tuple:
+    """
+    Validate filters and return a hashable canonical form (empty when nothing filters).
+
+    Raises:
+        ValueError: On unknown keys or malformed values
+    """
+    if not filters:
+        return ()
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown filters {sorted(unknown)}, expected some of {list(FILTER_KEYS)}")
+    out = []
+    for key in FILTER_KEYS:
+        value = filters.get(key)
+        if value is None:
+            continue
+        if key in CATEGORICAL_FIELDS:
+            values = [value] if isinstance(value, str) else value
+            if not isinstance(values, (list, tuple, set, frozenset)) or not all(isinstance(v, str) for v in values):
+                raise ValueError(f"Invalid {key} filter {value!r}, expected a string or a list of strings")
+            value = tuple(sorted({v.upper() if key == "batch" else v.lower() for v in values}))
+        elif key.startswith("period"):
+            value = _period_bound(value, upper=key == "period_to")
+        else:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid {key} filter {value!r}, expected an integer") from None
+        out.append((key, value))
+    return tuple(out)
+
+
+class FacetIndex:
+    """
+    Precomputed document bitmaps for filtering by source, batch, period and votes.
+
+    Each source/batch value has a packed bitmap (one bit per document), and
+    period/votes are kept sorted with their doc ids so a range becomes one
+    slice. A filter is the AND of the packed bitmaps of its clauses, so
+    combining clauses touches n_docs / 8 bytes each.
+    """
+
+    def __init__(self, store: CorpusStore):
+        self.n_docs = len(store)
+        self._bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        for name in CATEGORICAL_FIELDS:
+            codes = store.column(name)
+            self._bitmaps[name] = {
+                value: np.packbits(codes == code)
+                for code, value in enumerate(store.categories(name))
+            }
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for name in ("period", "votes"):
+            values = store.column(name)
+            order = np.argsort(values, kind="stable")
+            self._sorted[name] = (values[order], order)
+
+    def _category_bitmap(self, name: str, values: Iterable[str]) -> np.ndarray:
+        bitmap = np.zeros((self.n_docs + 7) // 8, dtype=np.uint8)
+        for stored, bits in self._bitmaps[name].items():
+            key = stored.upper() if name == "batch" else stored.lower()
+            if key in values:
+                bitmap |= bits
+        return bitmap
+
+    def _range_bitmap(self, name: str, lo: Optional[int], hi: Optional[int]) -> np.ndarray:
+        values, order = self._sorted[name]
+        start = np.searchsorted(values, max(lo if lo is not None else 0, MISSING + 1), side="left")
+        stop = np.searchsorted(values, hi, side="right") if hi is not None else len(values)
+        mask = np.zeros(self.n_docs, dtype=bool)
+        mask[order[start:stop]] = True
+        return np.packbits(mask)
+
+    def mask(self, filters: Tuple) -> Optional[np.ndarray]:
+        """
+        Boolean mask over doc ids for normalized filters (see normalize_filters).
+
+        Returns:
+            The mask, or None when the filters are empty
+        """
+        if not filters:
+            return None
+        clauses = dict(filters)
+        bitmaps = []
+        for name in CATEGORICAL_FIELDS:
+            if name in clauses:
+                bitmaps.append(self._category_bitmap(name, clauses[name]))
+        if "period_from" in clauses or "period_to" in clauses:
+            bitmaps.append(self._range_bitmap("period", clauses.get("period_from"), clauses.get("period_to")))
+        if "min_votes" in clauses or "max_votes" in clauses:
+            bitmaps.append(self._range_bitmap("votes", clauses.get("min_votes"), clauses.get("max_votes")))
+        combined = bitmaps[0]
+        for bits in bitmaps[1:]:
+            combined = combined & bits
+        return np.unpackbits(combined, count=self.n_docs).astype(bool)
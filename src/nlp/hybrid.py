@@ -0,0 +1,107 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Stage sizes and fusion settings for hybrid retrieval; any subset can be overridden per call
+DEFAULT_FUSION = {
+    # BM25 candidates re-ranked by the semantic index
+    "candidates": 200,
+    # "rrf" (reciprocal rank fusion) or "weighted" (sum of max-normalized scores)
+    "method": "rrf",
+    # Share of the fused score given to semantic similarity, in [0, 1]
+    "semantic_weight": 0.5,
+    # RRF damping constant: larger values flatten the gap between top ranks
+    "rrf_k": 60,
+}
+FUSION_METHODS = ("rrf", "weighted")
+
+
+def normalize_fusion(fusion: Optional[Dict[str, Any]]) -> Tuple:
+    """
+    Validate fusion settings, fill in defaults and return a hashable canonical form.
+
+    Raises:
+        ValueError: On unknown keys or out-of-range values
+    """
+    unknown = set(fusion or {}) - set(DEFAULT_FUSION)
+    if unknown:
+        raise ValueError(f"Unknown fusion settings {sorted(unknown)}, expected some of {list(DEFAULT_FUSION)}")
+    cfg = {**DEFAULT_FUSION, **{k: v for k, v in (fusion or {}).items() if v is not None}}
+    if cfg["method"] not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method '{cfg['method']}', expected one of {list(FUSION_METHODS)}")
+    cfg["candidates"] = int(cfg["candidates"])
+    cfg["semantic_weight"] = float(cfg["semantic_weight"])
+    cfg["rrf_k"] = int(cfg["rrf_k"])
+    if cfg["candidates"] <= 0 or cfg["rrf_k"] < 0 or not 0.0 <= cfg["semantic_weight"] <= 1.0:
+        raise ValueError(f"Invalid fusion settings {cfg}")
+    return tuple((key, cfg[key]) for key in DEFAULT_FUSION)
+
+
+def _ranks(scores: np.ndarray, docs: np.ndarray) -> np.ndarray:
+    """1-based rank of each entry by descending score, ties broken by lower doc id."""
+    ranks = np.empty(len(scores), dtype=np.float64)
+    ranks[np.lexsort((docs, -scores))] = np.arange(1, len(scores) + 1)
+    return ranks
+
+
+def _max_normalized(scores: np.ndarray) -> np.ndarray:
+    clipped = np.maximum(scores, 0.0)
+    top = clipped.max() if len(clipped) else 0.0
+    return clipped / top if top > 0 else clipped
+
+
+def fuse_scores(docs: np.ndarray, lexical: np.ndarray, semantic: np.ndarray,
+                method: str, semantic_weight: float, rrf_k: int) -> np.ndarray:
+    """
+    Combine BM25 scores and cosine similarities of the same candidates into one score.
+
+    Candidates without a BM25 match (score 0) get no lexical contribution.
+    """
+    if method == "rrf":
+        lexical_part = np.where(lexical > 0, 1.0 / (rrf_k + _ranks(lexical, docs)), 0.0)
+        semantic_part = 1.0 / (rrf_k + _ranks(semantic, docs))
+    else:
+        lexical_part = _max_normalized(lexical)
+        semantic_part = _max_normalized(semantic)
+    return (1.0 - semantic_weight) * lexical_part + semantic_weight * semantic_part
+
+
+class HybridIndex:
+    """
+    Two-stage retrieval: BM25 candidate generation, then semantic re-ranking.
+
+    Stage one takes the BM25 top "candidates" documents; stage two computes
+    their cosine similarity to the query (one small dot product, never a
+    scan of the corpus) and fuses both rankings. When BM25 matches fewer
+    than k documents, the semantic index's own nearest neighbours fill the
+    candidate set, so queries phrased in other words still get results.
+
+    Both inner indexes are expected to be restricted to the same documents.
+    """
+
+    def __init__(self, lexical, semantic, fusion: Tuple):
+        self.lexical = lexical
+        self.semantic = semantic
+        self.fusion = dict(fusion)
+
+    def top_k_many(self, queries: List[List[str]], k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        cfg = self.fusion
+        results = []
+        stage_one = self.lexical.top_k_many(queries, max(cfg["candidates"], k))
+        for q_tokens, (docs, scores) in zip(queries, stage_one):
+            # BM25 pads with zero-score documents; those are not candidates
+            matched = scores > 0
+            docs, scores = docs[matched], scores[matched]
+            if len(docs) < k:
+                extra, _ = self.semantic.top_k(q_tokens, k)
+                extra = extra[~np.isin(extra, docs)]
+                docs = np.concatenate([docs, extra])
+                scores = np.concatenate([scores, np.zeros(len(extra))])
+            similarities = self.semantic.similarities(q_tokens, docs)
+            fused = fuse_scores(docs, scores, similarities, cfg["method"], cfg["semantic_weight"], cfg["rrf_k"])
+            order = np.lexsort((docs, -fused))[:k]
+            results.append((docs[order], fused[order]))
+        return results
+
+    def top_k(self, q_tokens: List[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.top_k_many([q_tokens], k)[0]
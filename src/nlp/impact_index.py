@@ -0,0 +1,150 @@
+import copy
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from nlp.bm25_index import concat_ranges
+
+# Quantized impacts are 1..IMPACT_LEVELS (uint8)
+IMPACT_LEVELS = 255
+# Postings scored per query before stopping early; typical queries touch a few thousand
+DEFAULT_BUDGET = 2000
+
+
+class ImpactIndex:
+    """
+    Impact-ordered BM25 postings for fixed-cost, approximate top-k.
+
+    Every posting's BM25 contribution (idf times the saturated term
+    frequency) is precomputed and quantized to a uint8 impact on one
+    corpus-wide scale. Each term's postings are grouped into runs of equal
+    impact, highest first, so a query walks the runs of all its terms in
+    descending impact order (score-at-a-time) and stops once it has scored
+    a fixed budget of postings: the postings that matter most come first
+    and the work per query is bounded however common its terms are.
+
+    The documents left in the accumulator are ranked by their quantized
+    score and the top k are then re-scored exactly, so returned scores are
+    true BM25 scores; only which documents make the top k is approximate.
+    The index is a snapshot of one BM25 generation and reads tombstones
+    and filters like BM25Index.restricted. Postings of masked-out documents
+    are skipped without counting against the budget, so a narrow filter
+    still gets a full budget of the postings it can rank.
+    """
+
+    def __init__(self, index, budget: int = DEFAULT_BUDGET):
+        self.index = index
+        self.term_to_id = index.term_to_id
+        self.budget = budget
+        self.live: Optional[np.ndarray] = index.live
+        n_terms = len(index.vocab)
+
+        terms, docs, tf = self._all_postings(index)
+        weights = index._contribution(terms, docs, tf)
+        positive = weights > 0
+        terms, docs, weights = terms[positive], docs[positive], weights[positive]
+        self.scale = IMPACT_LEVELS / weights.max() if len(weights) else 1.0
+        impacts = np.clip(np.rint(weights * self.scale), 1, IMPACT_LEVELS).astype(np.uint8)
+
+        # Order postings by term, impact descending, then doc id
+        order = np.lexsort((docs, -impacts.astype(np.int16), terms))
+        terms, impacts = terms[order], impacts[order]
+        self.docs = docs[order].astype(np.int32)
+        new_run = np.ones(len(order), dtype=bool)
+        new_run[1:] = (terms[1:] != terms[:-1]) | (impacts[1:] != impacts[:-1])
+        starts = np.flatnonzero(new_run)
+        self.run_ptr = np.append(starts, len(order)).astype(np.int64)
+        self.run_impact = impacts[starts]
+        self.term_runs = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms[starts], minlength=n_terms), out=self.term_runs[1:])
+
+    @staticmethod
+    def _all_postings(index) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(term, doc, tf) of every posting in the main and delta segments."""
+        main_terms = np.repeat(np.arange(len(index.term_ptr) - 1), np.diff(index.term_ptr))
+        delta_terms = np.repeat(np.arange(len(index.delta_term_ptr) - 1), np.diff(index.delta_term_ptr))
+        return (np.concatenate([main_terms, delta_terms]),
+                np.concatenate([index.post_docs, index.delta_docs]).astype(np.int64),
+                np.concatenate([index.post_tf, index.delta_tf]))
+
+    @property
+    def nbytes(self) -> int:
+        return self.docs.nbytes + self.run_ptr.nbytes + self.run_impact.nbytes + self.term_runs.nbytes
+
+    def _runs(self, q_ids: List[int],
+              weights: Optional[List[float]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Start, length and query-weighted impact of every run of the query terms, best first."""
+        mult: Dict[int, float] = {}
+        for i, tid in enumerate(q_ids):
+            mult[tid] = mult.get(tid, 0) + (1 if weights is None else weights[i])
+        runs = [np.arange(self.term_runs[tid], self.term_runs[tid + 1]) for tid in mult]
+        runs = np.concatenate(runs) if runs else np.zeros(0, dtype=np.int64)
+        # A term repeated in the query counts its impact that many times; corrected terms count less
+        weight = np.repeat([mult[tid] for tid in mult], [self.term_runs[t + 1] - self.term_runs[t] for t in mult])
+        impact = self.run_impact[runs] * weight
+        order = np.argsort(-impact, kind="stable")
+        runs = runs[order]
+        return self.run_ptr[runs], self.run_ptr[runs + 1] - self.run_ptr[runs], impact[order]
+
+    def _accumulate(self, starts: np.ndarray, lengths: np.ndarray,
+                    impact: np.ndarray) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """
+        Quantized scores of the documents in the first budget allowed postings of the runs.
+
+        Runs are read in order in windows that double in size until the
+        budget is spent, so masked-out postings cost a gather but no score.
+
+        Returns:
+            (doc ids ascending, their quantized scores, whether every run was read)
+        """
+        offsets = np.cumsum(lengths) - lengths
+        total = int(lengths.sum())
+        lo, window, left = 0, self.budget, self.budget
+        doc_parts, impact_parts = [], []
+        while lo < total and left > 0:
+            hi = min(total, lo + window)
+            # Score-at-a-time: whole runs in impact order, the last one cut at the window end
+            run_lo = np.clip(lo - offsets, 0, lengths)
+            taken = np.clip(hi - offsets, 0, lengths) - run_lo
+            docs = self.docs[concat_ranges(starts + run_lo, taken)]
+            weights = np.repeat(impact, taken)
+            if self.live is not None:
+                allowed = self.live[docs]
+                docs, weights = docs[allowed], weights[allowed]
+            doc_parts.append(docs[:left])
+            impact_parts.append(weights[:left])
+            left -= len(doc_parts[-1])
+            lo, window = hi, 2 * window
+        if not doc_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0), True
+        docs, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+        return docs, np.bincount(inverse.ravel(), weights=np.concatenate(impact_parts)), lo >= total
+
+    def top_k(self, q_tokens: List[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top k (doc ids, exact BM25 scores), ties broken by lower doc id."""
+        index = self.index if self.live is None else self.index.restricted(self.live)
+        k = min(k, index.n_live)
+        q_ids, weights = index._query_terms(q_tokens)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        starts, lengths, impact = self._runs(q_ids, weights)
+        docs, acc, exhausted = self._accumulate(starts, lengths, impact)
+        if len(docs) < k and not exhausted:
+            # Too few allowed documents within the budget to rank; score the query exactly
+            return index.top_k(q_tokens, k)
+        if len(docs) > k:
+            # Keep quantization ties with the k-th document; exact scores decide between them
+            kth = np.partition(acc, len(acc) - k)[len(acc) - k]
+            docs = docs[acc >= kth]
+        scores = index.exact_scores(q_ids, docs, weights)
+        order = np.lexsort((docs, -scores))[:k]
+        return index._fill(docs[order].astype(np.int64), scores[order], k)
+
+    def top_k_many(self, queries: List[List[str]], k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        return [self.top_k(q_tokens, k) for q_tokens in queries]
+
+    def restricted(self, allowed: np.ndarray) -> "ImpactIndex":
+        """Return a view that only ranks the documents where allowed is True."""
+        view = copy.copy(self)
+        view.live = allowed if self.live is None else self.live & allowed
+        return view
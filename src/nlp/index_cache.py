@@ -0,0 +1,275 @@
+import os
+import hashlib
+import logging
+import tempfile
+import zipfile
+from typing import List, Dict, Optional, Iterable, Tuple
+
+import numpy as np
+
+# Bump whenever the snapshot layout changes so old files are never misread
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_PREFIX = "bm25_"
+SNAPSHOT_SUFFIX = ".npz"
+
+
+# --- Tokenized corpus --------------------------------
+class TokenizedCorpus:
+    """
+    Tokenized documents stored as one flat array of term ids.
+
+    Document i owns token_ids[doc_offsets[i]:doc_offsets[i + 1]], and term id j
+    is vocab[j]. Each document's tokens are laid out field after field, with
+    field_len[i, f] tokens in field f. Document frequencies and lengths are
+    kept alongside so the ranking index can be rebuilt without touching the
+    raw text again.
+    """
+
+    def __init__(self, vocab: List[str], token_ids: np.ndarray, doc_offsets: np.ndarray,
+                 df: Optional[np.ndarray] = None, field_len: Optional[np.ndarray] = None):
+        self.vocab = vocab
+        self.token_ids = token_ids
+        self.doc_offsets = doc_offsets
+        self.term_to_id = {term: i for i, term in enumerate(vocab)}
+        self.doc_len = np.diff(doc_offsets).astype(np.int32)
+        self.df = self._document_frequencies() if df is None else df
+        self.field_len = self.doc_len[:, None] if field_len is None else field_len.astype(np.int32)
+
+    @property
+    def n_fields(self) -> int:
+        return self.field_len.shape[1]
+
+    @classmethod
+    def from_token_lists(cls, docs: Iterable[List[str]]) -> "TokenizedCorpus":
+        """Encode single-field token lists, assigning term ids in order of first occurrence."""
+        return cls.from_field_token_lists([tokens] for tokens in docs)
+
+    @classmethod
+    def from_field_token_lists(cls, docs: Iterable[List[List[str]]]) -> "TokenizedCorpus":
+        """Encode documents given as one token list per field (same field count for all)."""
+        term_to_id: Dict[str, int] = {}
+        flat: List[int] = []
+        offsets = [0]
+        field_len: List[List[int]] = []
+        for fields in docs:
+            for tokens in fields:
+                for tok in tokens:
+                    tid = term_to_id.get(tok)
+                    if tid is None:
+                        tid = term_to_id[tok] = len(term_to_id)
+                    flat.append(tid)
+            field_len.append([len(tokens) for tokens in fields])
+            offsets.append(len(flat))
+        vocab = list(term_to_id)
+        n_fields = len(field_len[0]) if field_len else 1
+        return cls(vocab, np.asarray(flat, dtype=_id_dtype(len(vocab))), np.asarray(offsets, dtype=np.int64),
+                   field_len=np.asarray(field_len, dtype=np.int32).reshape(-1, n_fields))
+
+    @classmethod
+    def merge(cls, parts: List[Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]]) -> "TokenizedCorpus":
+        """
+        Concatenate corpus chunks tokenized independently (e.g. in worker processes).
+
+        Each part is (vocab, token_ids, doc_offsets, df, field_len) with chunk-local term
+        ids. Chunk vocabularies are folded in order, so global ids follow the
+        same first-occurrence order as a serial build and the result is identical.
+        """
+        term_to_id: Dict[str, int] = {}
+        id_parts, offset_parts, df_parts, field_parts = [], [np.zeros(1, dtype=np.int64)], [], []
+        base = 0
+        for vocab, token_ids, doc_offsets, df, field_len in parts:
+            remap = np.empty(len(vocab), dtype=np.int64)
+            for local_id, term in enumerate(vocab):
+                gid = term_to_id.get(term)
+                if gid is None:
+                    gid = term_to_id[term] = len(term_to_id)
+                remap[local_id] = gid
+            id_parts.append(remap[token_ids])
+            offset_parts.append(doc_offsets[1:].astype(np.int64) + base)
+            df_parts.append((remap, df))
+            field_parts.append(field_len)
+            base += int(doc_offsets[-1])
+
+        vocab = list(term_to_id)
+        merged_df = np.zeros(len(vocab), dtype=np.int32)
+        for remap, df in df_parts:
+            np.add.at(merged_df, remap, df)
+        token_ids = np.concatenate(id_parts) if id_parts else np.zeros(0)
+        field_len = np.concatenate(field_parts) if field_parts else None
+        return cls(vocab, token_ids.astype(_id_dtype(len(vocab))), np.concatenate(offset_parts), merged_df,
+                   field_len=field_len)
+
+    @classmethod
+    def from_global_ids(cls, vocab: List[str], token_ids: np.ndarray, doc_offsets: np.ndarray,
+                        field_len: Optional[np.ndarray] = None) -> "TokenizedCorpus":
+        """
+        Re-encode documents given as ids into a larger vocabulary.
+
+        Unused terms are dropped and ids are reassigned in first-occurrence
+        order, matching what from_token_lists would produce for the same text.
+        """
+        used, first_pos, inverse = np.unique(token_ids, return_index=True, return_inverse=True)
+        by_first = np.argsort(first_pos, kind="stable")
+        rank = np.empty(len(used), dtype=np.int64)
+        rank[by_first] = np.arange(len(used))
+        new_vocab = [vocab[t] for t in used[by_first].tolist()]
+        return cls(new_vocab, rank[inverse.ravel()].astype(_id_dtype(len(new_vocab))), doc_offsets,
+                   field_len=field_len)
+
+    def to_parts(self) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Plain-array form used to ship a chunk between processes."""
+        return self.vocab, self.token_ids, self.doc_offsets, self.df, self.field_len
+
+    def _document_frequencies(self) -> np.ndarray:
+        n_docs = len(self.doc_offsets) - 1
+        if not len(self.token_ids):
+            return np.zeros(len(self.vocab), dtype=np.int32)
+        doc_of_token = np.repeat(np.arange(n_docs, dtype=np.int64), self.doc_len)
+        pairs = np.unique(doc_of_token * len(self.vocab) + self.token_ids)
+        return np.bincount(pairs % len(self.vocab), minlength=len(self.vocab)).astype(np.int32)
+
+    def __len__(self) -> int:
+        return len(self.doc_offsets) - 1
+
+    def doc_tokens(self, i: int) -> List[str]:
+        """Return the stemmed tokens of document i."""
+        ids = self.token_ids[self.doc_offsets[i]:self.doc_offsets[i + 1]]
+        return [self.vocab[t] for t in ids.tolist()]
+
+    def token_lists(self) -> List[List[str]]:
+        """Decode every document back into a list of tokens."""
+        vocab = np.asarray(self.vocab, dtype=object)
+        return [vocab[part].tolist() for part in np.split(self.token_ids, self.doc_offsets[1:-1])]
+
+
+def _id_dtype(vocab_size: int):
+    return np.uint16 if vocab_size <= np.iinfo(np.uint16).max else np.uint32
+
+
+# --- Cache keys --------------------------------------
+def corpus_fingerprint(data_paths: List[str], tokenizer_signature: str) -> str:
+    """
+    Hash the content of the input data files together with the tokenizer config.
+
+    Args:
+        data_paths: Data files feeding the index (missing files are skipped)
+        tokenizer_signature: Stable description of the tokenizer settings
+
+    Returns:
+        Hex digest identifying this exact corpus + tokenizer combination
+    """
+    h = hashlib.sha256()
+    h.update(f"format={SNAPSHOT_FORMAT_VERSION}\n".encode())
+    h.update(tokenizer_signature.encode("utf-8"))
+    for path in sorted(data_paths):
+        if not os.path.isfile(path):
+            continue
+        h.update(f"\n{os.path.basename(path)}\n".encode("utf-8"))
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_file_path(cache_dir: str, prefix: str, fingerprint: str) -> str:
+    return os.path.join(cache_dir, f"{prefix}{fingerprint[:24]}{SNAPSHOT_SUFFIX}")
+
+
+def snapshot_path(cache_dir: str, fingerprint: str) -> str:
+    return cache_file_path(cache_dir, SNAPSHOT_PREFIX, fingerprint)
+
+
+# --- Save / load -------------------------------------
+def save_arrays(path: str, fingerprint: str, arrays: Dict[str, np.ndarray], prefix: str) -> bool:
+    """
+    Write named arrays to an .npz cache file tagged with a fingerprint.
+
+    The file is written to a unique temporary name in the same directory
+    and then renamed, so a crash mid-write never leaves a truncated file
+    behind and processes warming the same cache at once never interleave
+    their writes. Other files with the same prefix were built from older
+    data or settings and are removed.
+
+    Returns:
+        Whether the file was written
+    """
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = None
+    try:
+        # Dot-prefixed, so another process's stale-file cleanup never matches it
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, fingerprint=np.array(fingerprint), **arrays)
+        os.replace(tmp, path)
+    except OSError as e:
+        logging.warning(f"Could not write cache file {path}: {e}")
+        if tmp is not None and os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+
+    for name in os.listdir(cache_dir):
+        stale = os.path.join(cache_dir, name)
+        if name.startswith(prefix) and name.endswith(SNAPSHOT_SUFFIX) and stale != path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return True
+
+
+def load_arrays(path: str, fingerprint: str) -> Optional[Dict[str, np.ndarray]]:
+    """Load the arrays of a cache file, or None when it is missing, stale or unreadable."""
+    if not os.path.isfile(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data["fingerprint"]) != fingerprint:
+                return None
+            return {name: data[name] for name in data.files if name != "fingerprint"}
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+        logging.warning(f"Ignoring unreadable cache file {path}: {e}")
+        return None
+
+
+def save_snapshot(path: str, corpus: TokenizedCorpus, fingerprint: str) -> None:
+    """Write the tokenized corpus to a binary snapshot, replacing stale ones."""
+    vocab_blob = np.frombuffer("\n".join(corpus.vocab).encode("utf-8"), dtype=np.uint8)
+    arrays = {
+        "vocab": vocab_blob,
+        "token_ids": corpus.token_ids,
+        "doc_offsets": corpus.doc_offsets,
+        "df": corpus.df,
+        "doc_len": corpus.doc_len,
+        "field_len": corpus.field_len,
+    }
+    if save_arrays(path, fingerprint, arrays, SNAPSHOT_PREFIX):
+        logging.info(f"Saved index snapshot to {path}")
+
+
+def load_snapshot(path: str, fingerprint: str) -> Optional[TokenizedCorpus]:
+    """
+    Load a snapshot if it exists and was built from the same fingerprint.
+
+    Returns:
+        The tokenized corpus, or None when the snapshot is missing or stale
+    """
+    snap = load_arrays(path, fingerprint)
+    if snap is None:
+        return None
+    try:
+        blob = snap["vocab"].tobytes().decode("utf-8")
+        vocab = blob.split("\n") if blob else []
+        corpus = TokenizedCorpus.__new__(TokenizedCorpus)
+        corpus.vocab = vocab
+        corpus.term_to_id = {term: i for i, term in enumerate(vocab)}
+        corpus.token_ids = snap["token_ids"]
+        corpus.doc_offsets = snap["doc_offsets"]
+        corpus.df = snap["df"]
+        corpus.doc_len = snap["doc_len"]
+        corpus.field_len = snap["field_len"]
+    except (KeyError, UnicodeDecodeError) as e:
+        logging.warning(f"Ignoring unreadable index snapshot {path}: {e}")
+        return None
+    logging.info(f"Loaded index snapshot from {path}")
+    return corpus
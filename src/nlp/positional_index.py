@@ -0,0 +1,231 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from nlp.bm25_index import boosted_top_k_many
+
+# Positions jump by this much between fields, so a phrase never spans a field boundary
+FIELD_GAP = 8
+# Query terms this many positions apart or closer still count as near each other
+PROXIMITY_WINDOW = 4
+# BM25 candidates re-scored per query before the exactness check (at least k)
+PHRASE_CANDIDATES = 50
+
+
+class _PositionSegment:
+    """
+    Positional postings of one run of documents.
+
+    Postings are ordered by term, then doc id. Each posting's positions are
+    stored as gaps from the previous position (the first as-is) in a single
+    uint16 array; pos_ptr[p]:pos_ptr[p + 1] is posting p's slice.
+    """
+
+    def __init__(self, token_ids: np.ndarray, doc_offsets: np.ndarray, field_len: np.ndarray,
+                 n_terms: int, doc_base: int = 0):
+        n_docs = len(doc_offsets) - 1
+        lengths = np.diff(doc_offsets)
+        doc_of_token = np.repeat(np.arange(n_docs, dtype=np.int64), lengths)
+        position = np.arange(len(token_ids), dtype=np.int64) - np.repeat(doc_offsets[:-1], lengths)
+        n_fields = field_len.shape[1]
+        field_of_token = np.repeat(np.tile(np.arange(n_fields), n_docs), field_len.ravel())
+        position += field_of_token * FIELD_GAP
+
+        # Tokens are in (doc, position) order already, so a stable sort on term finishes the job
+        order = np.argsort(token_ids, kind="stable")
+        terms = token_ids[order].astype(np.int64)
+        docs = doc_of_token[order]
+        position = position[order]
+        new_posting = np.ones(len(order), dtype=bool)
+        new_posting[1:] = (terms[1:] != terms[:-1]) | (docs[1:] != docs[:-1])
+        starts = np.flatnonzero(new_posting)
+
+        gaps = position.copy()
+        gaps[1:] -= position[:-1]
+        gaps[starts] = position[starts]
+        self.gaps = gaps.astype(np.uint16 if position.max(initial=0) < 2 ** 16 else np.uint32)
+        self.pos_ptr = np.append(starts, len(order)).astype(np.int64)
+        self.docs = (docs[starts] + doc_base).astype(np.int32)
+        self.term_ptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms[starts], minlength=n_terms), out=self.term_ptr[1:])
+
+    @property
+    def nbytes(self) -> int:
+        return self.gaps.nbytes + self.pos_ptr.nbytes + self.docs.nbytes + self.term_ptr.nbytes
+
+    def postings_for(self, tid: int, docs: np.ndarray) -> np.ndarray:
+        """Posting number of (tid, doc) for each of the sorted docs, -1 where the term is absent."""
+        out = np.full(len(docs), -1, dtype=np.int64)
+        if tid >= len(self.term_ptr) - 1:
+            return out
+        lo, hi = self.term_ptr[tid], self.term_ptr[tid + 1]
+        idx = np.searchsorted(self.docs[lo:hi], docs)
+        found = idx < hi - lo
+        found[found] = self.docs[lo:hi][idx[found]] == docs[found]
+        out[found] = lo + idx[found]
+        return out
+
+    def occurrences(self, postings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Number of positions and first position of each posting (0, 0 where posting is -1)."""
+        found = postings >= 0
+        start = self.pos_ptr[postings[found]]
+        counts = np.zeros(len(postings), dtype=np.int64)
+        first = np.zeros(len(postings), dtype=np.int64)
+        counts[found] = self.pos_ptr[postings[found] + 1] - start
+        first[found] = self.gaps[start]
+        return counts, first
+
+    def positions(self, posting: int) -> List[int]:
+        gaps = self.gaps[self.pos_ptr[posting]:self.pos_ptr[posting + 1]].tolist()
+        for i in range(1, len(gaps)):
+            gaps[i] += gaps[i - 1]
+        return gaps
+
+
+def _pair_scores(gap: np.ndarray) -> np.ndarray:
+    """Vectorized _pair_score for documents where each term occurs once, given pos(b) - pos(a)."""
+    near = (gap != 0) & (np.abs(gap) <= PROXIMITY_WINDOW)
+    weight = np.where(gap > 0, 1.0, 0.5)
+    return np.where(gap == 1, 1.0, np.where(near, weight / np.maximum(np.abs(gap), 1), 0.0))
+
+
+def _pair_score(first: List[int], second: List[int]) -> float:
+    """1 for an exact bigram, 1/gap for the closest pair within PROXIMITY_WINDOW, else 0."""
+    best = 0.0
+    j = 0
+    for p in first:
+        # Both lists are ascending; walk second alongside first
+        while j < len(second) and second[j] <= p - PROXIMITY_WINDOW:
+            j += 1
+        for q in second[j:]:
+            gap = q - p
+            if gap > PROXIMITY_WINDOW:
+                break
+            if gap == 1:
+                return 1.0
+            if gap != 0:
+                # Reversed order still counts as proximity, at half weight
+                best = max(best, (1.0 if gap > 0 else 0.5) / abs(gap))
+    return best
+
+
+class PositionalIndex:
+    """
+    Term positions for every document, used to reward phrase and proximity matches.
+
+    Built from a BM25 index: the main segment covers its corpus and a delta
+    segment the documents added since, mirroring the BM25 index itself.
+    Tombstoned documents need no handling since they never become
+    candidates.
+    """
+
+    def __init__(self, main: _PositionSegment, delta: Optional[_PositionSegment], n_main: int):
+        self.main = main
+        self.delta = delta
+        self.n_main = n_main
+
+    @classmethod
+    def from_index(cls, index, main: Optional[_PositionSegment] = None) -> "PositionalIndex":
+        corpus = index.corpus
+        n_main = len(corpus)
+        if main is None:
+            main = _PositionSegment(corpus.token_ids, corpus.doc_offsets, corpus.field_len, len(corpus.vocab))
+        delta = None
+        if index.n_delta:
+            delta = _PositionSegment(index.delta_token_ids, index.delta_offsets, index.field_len[n_main:],
+                                     len(index.vocab), doc_base=n_main)
+        return cls(main, delta, n_main)
+
+    def extended(self, index) -> "PositionalIndex":
+        """Re-index the delta segment of an updated BM25 index; the main segment is shared."""
+        return PositionalIndex.from_index(index, self.main)
+
+    @property
+    def nbytes(self) -> int:
+        return self.main.nbytes + (self.delta.nbytes if self.delta is not None else 0)
+
+    def _segments(self, docs: np.ndarray):
+        """(segment, mask of docs it holds) pairs for sorted docs."""
+        in_main = docs < self.n_main
+        yield self.main, in_main
+        if self.delta is not None:
+            yield self.delta, ~in_main
+
+    def _postings_for(self, tid: int, docs: np.ndarray) -> np.ndarray:
+        """Posting number of tid in each of the sorted docs (-1 if absent), in its doc's segment."""
+        out = np.full(len(docs), -1, dtype=np.int64)
+        for segment, mask in self._segments(docs):
+            out[mask] = segment.postings_for(tid, docs[mask])
+        return out
+
+    def proximity(self, q_ids: List[int], docs: np.ndarray) -> np.ndarray:
+        """
+        Phrase/proximity score in [0, 1] of each document for the query's adjacent term pairs.
+
+        Each pair of consecutive distinct query terms scores 1 for an exact
+        bigram match and less for nearby occurrences (see _pair_score); the
+        document's score is the mean over the pairs. Postings are located
+        with one vectorized search per term; documents where both terms occur
+        once are scored in bulk and only the rest decode their positions.
+        """
+        pairs = [(a, b) for a, b in zip(q_ids, q_ids[1:]) if a != b]
+        if not pairs or not len(docs):
+            return np.zeros(len(docs))
+        sorted_docs, rows = np.unique(docs, return_inverse=True)
+        postings, counts, firsts = {}, {}, {}
+        for tid in {t for pair in pairs for t in pair}:
+            postings[tid] = self._postings_for(tid, sorted_docs)
+            counts[tid] = np.zeros(len(sorted_docs), dtype=np.int64)
+            firsts[tid] = np.zeros(len(sorted_docs), dtype=np.int64)
+            for segment, mask in self._segments(sorted_docs):
+                counts[tid][mask], firsts[tid][mask] = segment.occurrences(postings[tid][mask])
+
+        scores = np.zeros(len(sorted_docs))
+        for a, b in pairs:
+            single = (counts[a] == 1) & (counts[b] == 1)
+            scores[single] += _pair_scores(firsts[b][single] - firsts[a][single])
+            for i in np.flatnonzero((counts[a] > 0) & (counts[b] > 0) & ~single).tolist():
+                segment = self.main if sorted_docs[i] < self.n_main else self.delta
+                scores[i] += _pair_score(segment.positions(int(postings[a][i])),
+                                         segment.positions(int(postings[b][i])))
+        return scores[rows.ravel()] / len(pairs)
+
+
+class PhraseBoostIndex:
+    """
+    BM25 ranking with a phrase/proximity boost applied to the pruned candidates.
+
+    Each candidate's BM25 score is multiplied by 1 + weight * proximity.
+    Only the BM25 top PHRASE_CANDIDATES documents are re-scored, fetching
+    more while the boost could still reorder the rest (boosted_top_k_many),
+    so the result is the same as boosting every document.
+    """
+
+    def __init__(self, lexical, positions: PositionalIndex, weight: float):
+        self.lexical = lexical
+        self.positions = positions
+        self.weight = weight
+
+    def _q_ids(self, q_tokens: List[str]) -> List[int]:
+        term_to_id = self.lexical.term_to_id
+        return [term_to_id[t] for t in q_tokens if t in term_to_id]
+
+    def top_k_many(self, queries: List[List[str]], k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        q_ids = [self._q_ids(q_tokens) for q_tokens in queries]
+        results: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * len(queries)
+        # Queries without two distinct known terms have nothing to boost
+        plain = [i for i, ids in enumerate(q_ids) if len(set(ids)) < 2]
+        for i, hit in zip(plain, self.lexical.top_k_many([queries[i] for i in plain], k)):
+            results[i] = hit
+        pending = [i for i, ids in enumerate(q_ids) if len(set(ids)) >= 2]
+        hits = boosted_top_k_many(
+            self.lexical, [queries[i] for i in pending], k,
+            lambda j, docs: 1.0 + self.weight * self.positions.proximity(q_ids[pending[j]], docs),
+            1.0 + self.weight, PHRASE_CANDIDATES,
+        )
+        for i, hit in zip(pending, hits):
+            results[i] = hit
+        return results
+
+    def top_k(self, q_tokens: List[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.top_k_many([q_tokens], k)[0]
@@ -0,0 +1,124 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from nlp.bm25_index import boosted_top_k_many
+from nlp.corpus_store import MISSING, CorpusStore
+
+# Static document priors, each in [0, 1]: how recent a record is, and how popular
+PRIOR_NAMES = ("recency", "popularity")
+# Recency halves for every RECENCY_HALF_LIFE years a record predates the newest one
+RECENCY_HALF_LIFE = 3.0
+# Candidates fetched per query before checking whether the boost could reorder the rest
+PRIOR_CANDIDATES = 50
+# First month of each YC batch season: Winter, Spring, Summer, Fall
+_SEASON_MONTH = {"W": 1, "X": 4, "S": 6, "F": 9}
+_BATCH_RE = re.compile(r"^([A-Z]+)(\d{2})$")
+
+
+def normalize_priors(priors: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    """Prior weights for every name in PRIOR_NAMES (0 when not given), checked."""
+    priors = priors or {}
+    unknown = set(priors) - set(PRIOR_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown priors {sorted(unknown)}, expected some of {list(PRIOR_NAMES)}")
+    weights = {name: float(priors.get(name, 0.0)) for name in PRIOR_NAMES}
+    for name, weight in weights.items():
+        if weight < 0:
+            raise ValueError(f"Prior weight '{name}' must be non-negative, got {weight}")
+    return weights
+
+
+def batch_period(batch: str) -> int:
+    """First month of a YC batch as YYYYMM ("W24" -> 202401), or MISSING if unrecognised."""
+    m = _BATCH_RE.match(batch)
+    if not m:
+        return MISSING
+    return (2000 + int(m.group(2))) * 100 + _SEASON_MONTH.get(m.group(1)[0], 6)
+
+
+def document_periods(store: CorpusStore) -> np.ndarray:
+    """YYYYMM per document: the Product Hunt launch month, else the YC batch's first month."""
+    periods = np.asarray(store.column("period"), dtype=np.int64)
+    codes = np.asarray(store.column("batch"), dtype=np.int64)
+    batch_periods = np.array([batch_period(b) for b in store.categories("batch")] + [MISSING], dtype=np.int64)
+    # Category code MISSING (-1) picks the trailing MISSING entry
+    return np.where(periods != MISSING, periods, batch_periods[codes])
+
+
+def recency_prior(periods: np.ndarray, half_life: float = RECENCY_HALF_LIFE) -> np.ndarray:
+    """1 for the newest month, halving every half_life years before it; 0 when the date is unknown."""
+    known = periods != MISSING
+    if not known.any():
+        return np.zeros(len(periods))
+    months = (periods // 100) * 12 + periods % 100
+    age_years = (months[known].max() - months) / 12.0
+    return np.where(known, 0.5 ** (age_years / half_life), 0.0)
+
+
+def vote_prior(votes: np.ndarray) -> np.ndarray:
+    """
+    log1p(votes) per document.
+
+    Records without votes (YC companies, MISSING in the store) count as a
+    median Product Hunt launch, so they neither lead nor trail every list.
+    """
+    votes = np.asarray(votes, dtype=np.float64)
+    present = votes >= 0
+    fallback = np.median(votes[present]) if present.any() else 0.0
+    return np.log1p(np.where(present, votes, fallback))
+
+
+def popularity_prior(votes: np.ndarray) -> np.ndarray:
+    """vote_prior scaled to [0, 1] by the most-voted record."""
+    prior = vote_prior(votes)
+    top = prior.max() if len(prior) else 0.0
+    return prior / top if top > 0 else prior
+
+
+def prior_boost(store: CorpusStore, weights: Dict[str, float]) -> np.ndarray:
+    """
+    Per-document boost: the weighted sum of the priors.
+
+    Args:
+        store: Records of the index generation, in doc id order
+        weights: Weight per name in PRIOR_NAMES, as from normalize_priors
+
+    Returns:
+        float64 array; a document's score is multiplied by 1 + its boost
+    """
+    boost = np.zeros(len(store))
+    if weights.get("recency"):
+        boost += weights["recency"] * recency_prior(document_periods(store))
+    if weights.get("popularity"):
+        boost += weights["popularity"] * popularity_prior(store.column("votes"))
+    return boost
+
+
+class PriorBoostIndex:
+    """
+    Ranking with every score multiplied by 1 + a precomputed per-document boost.
+
+    The boost is a static array, so re-ranking a query's candidates is one
+    gather and one multiply. Pruning in the wrapped retriever is kept: its
+    top PRIOR_CANDIDATES are boosted, fetching more while the boost could
+    still reorder the rest (boosted_top_k_many), so the result is the same
+    as boosting every document.
+    """
+
+    def __init__(self, lexical, boost: np.ndarray):
+        self.lexical = lexical
+        self.boost = boost
+        self.max_boost = float(boost.max()) if len(boost) else 0.0
+
+    @property
+    def term_to_id(self) -> Dict[str, int]:
+        return self.lexical.term_to_id
+
+    def top_k_many(self, queries: List[List[str]], k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        return boosted_top_k_many(self.lexical, queries, k, lambda i, docs: 1.0 + self.boost[docs],
+                                  1.0 + self.max_boost, PRIOR_CANDIDATES)
+
+    def top_k(self, q_tokens: List[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.top_k_many([q_tokens], k)[0]
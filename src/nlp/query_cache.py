@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+    version: int
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of search results tied to one index version.
+
+    Entries are only valid for the index generation they were computed on:
+    looking up or storing with a newer version drops every entry first, so a
+    hot-swapped or updated index never serves stale results. A search still
+    running on an older generation misses and its results are not kept, so
+    it never evicts the entries of the current one.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._version = -1
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _sync_version(self, version: int) -> bool:
+        # Whether version is (now) the cached generation; older ones never are
+        if version > self._version:
+            self._entries.clear()
+            self._version = version
+        return version == self._version
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            value = self._entries.get(key) if self._sync_version(version) else None
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, version: int, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            # Results computed on an older generation are simply not kept
+            if not self._sync_version(version):
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries), self._version)
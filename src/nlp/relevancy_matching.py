@@ -1,8 +1,17 @@
+import asyncio
 import os
 import json
 import logging
 import re
-from typing import List, Dict, Any, Optional
+import threading
+import time
+import weakref
+from collections import Counter, deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Iterable, NamedTuple, Union
+
+import numpy as np
 
 # Import NLTK components
 import nltk
@@ -10,8 +19,39 @@ from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from nltk.stem import PorterStemmer
 
-# Import BM25 for relevancy matching
-from rank_bm25 import BM25Okapi
+from nlp.autocomplete import TitleCompleter
+from nlp.bm25_index import BM25Index, SparseBM25Index, BM25FIndex, SparseBM25FIndex, WeightedToken
+from nlp.corpus_store import CorpusStore, CorpusStoreBuilder, save_store, store_path
+from nlp.corpus_loader import (
+    discover_batch_files,
+    discover_ph_files,
+    iter_corpus_records,
+    iter_json_records,
+    load_yc_batches,
+    peak_rss_mb,
+)
+from nlp.dedup import NUM_PERM, NearDuplicateIndex
+from nlp.diversity import DIVERSITY_CANDIDATES, TermSignatures, mmr_rerank
+from nlp.facets import FacetIndex, normalize_filters
+from nlp.hybrid import HybridIndex, normalize_fusion
+from nlp.impact_index import DEFAULT_BUDGET, ImpactIndex
+from nlp.positional_index import PhraseBoostIndex, PositionalIndex
+from nlp.priors import PriorBoostIndex, normalize_priors, prior_boost, vote_prior
+from nlp.query_cache import CacheInfo, QueryCache
+from nlp.semantic_index import SemanticIndex
+from nlp.sharding import ShardedIndex, ShardPool
+from nlp.spelling import MIN_CORRECT_LEN, SpellCorrector
+from nlp.timings import StageStats, StageTimer, TimingHook, json_log_hook
+from nlp.index_cache import (
+    TokenizedCorpus,
+    corpus_fingerprint,
+    load_snapshot,
+    save_snapshot,
+    cache_file_path,
+    load_arrays,
+    save_arrays,
+    snapshot_path,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -32,8 +72,39 @@ for pkg, path in [
         nltk.download(pkg)
 
 # --- Text preprocessing helper -----------------------
+# Porter stemming is deterministic, so one bounded cache is shared by every
+# preprocessor; the corpus only has a few tens of thousands of distinct words.
+STEM_CACHE_SIZE = 100_000
+_porter = PorterStemmer()
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def _cached_stem(word: str) -> str:
+    return _porter.stem(word)
+
+
+# Once punctuation is stripped, the Treebank tokenizer only splits on
+# whitespace plus these fused words, which the regex mode reproduces.
+_FUSED_WORDS = {
+    "cannot": ("can", "not"),
+    "gimme": ("gim", "me"),
+    "gonna": ("gon", "na"),
+    "gotta": ("got", "ta"),
+    "lemme": ("lem", "me"),
+    "wanna": ("wan", "na"),
+}
+
+
 class TextPreprocessor:
-    def __init__(self):
+    # Bump when tokenize() changes output so cached index snapshots are rebuilt
+    VERSION = 1
+    MODES = ("regex", "nltk")
+
+    def __init__(self, mode: str = "regex", cache_stems: bool = True):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown tokenizer mode '{mode}', expected one of {list(self.MODES)}")
+        self.mode = mode
+        self.cache_stems = cache_stems
         self.stop_words = set(stopwords.words("english"))
         self.stemmer = PorterStemmer()
         # only keep letters & numbers
@@ -42,109 +113,931 @@ class TextPreprocessor:
     def tokenize(self, text: str) -> List[str]:
         text = text or ""
         text = self.clean_re.sub("", text.lower())
-        tokens = word_tokenize(text)
+        tokens = word_tokenize(text) if self.mode == "nltk" else self._split(text)
+        stem = _cached_stem if self.cache_stems else self.stemmer.stem
         return [
-            self.stemmer.stem(tok)
+            stem(tok)
             for tok in tokens
             if tok not in self.stop_words and tok.isalpha()
         ]
 
+    @staticmethod
+    def _split(text: str) -> List[str]:
+        """Whitespace split matching word_tokenize on punctuation-free text."""
+        tokens = []
+        for tok in text.split():
+            fused = _FUSED_WORDS.get(tok)
+            if fused:
+                tokens.extend(fused)
+            else:
+                tokens.append(tok)
+        return tokens
+
+    def signature(self) -> str:
+        """Describe the tokenizer settings that affect its output."""
+        return "|".join([
+            f"v{self.VERSION}",
+            self.mode,
+            self.clean_re.pattern,
+            type(self.stemmer).__name__,
+            ",".join(sorted(self.stop_words)),
+        ])
+
+# --- Parallel corpus tokenization --------------------
+# Documents per worker task; below two chunks, process start-up costs more than it saves
+MIN_DOCS_PER_BUILD_WORKER = 2000
+
+
+def _tokenize_chunk(docs: List[List[str]], mode: str):
+    """Worker entry point: tokenize a slice of the corpus with chunk-local term ids."""
+    processor = TextPreprocessor(mode=mode)
+    chunk = TokenizedCorpus.from_field_token_lists(
+        [processor.tokenize(text) for text in fields] for fields in docs
+    )
+    return chunk.to_parts()
+
+
+def _chunks(docs: Iterable[List[str]], size: int) -> Iterable[List[List[str]]]:
+    chunk = []
+    for doc in docs:
+        chunk.append(doc)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def tokenize_corpus_parallel(docs: Iterable[List[str]], mode: str, workers: int) -> TokenizedCorpus:
+    """
+    Tokenize a stream of documents across a process pool and merge the chunks in order.
+
+    Documents are consumed as they arrive, and only a couple of chunks per
+    worker are in flight, so the raw text is never held all at once. A
+    corpus that fits in one chunk is tokenized in-process. Workers return
+    chunk-local vocabularies, term ids and document frequencies; merging
+    them in chunk order gives exactly the corpus a serial build would produce.
+
+    Args:
+        docs: Per-field document texts in index order
+        mode: TextPreprocessor mode used by the workers
+        workers: Number of worker processes
+
+    Returns:
+        The merged tokenized corpus
+    """
+    chunks = _chunks(docs, MIN_DOCS_PER_BUILD_WORKER)
+    first = next(chunks, [])
+    second = next(chunks, None)
+    if second is None:
+        return TokenizedCorpus.merge([_tokenize_chunk(first, mode)])
+
+    parts = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(_tokenize_chunk, chunk, mode) for chunk in (first, second))
+        for chunk in chunks:
+            if len(pending) >= 2 * workers:
+                parts.append(pending.popleft().result())
+            pending.append(pool.submit(_tokenize_chunk, chunk, mode))
+        parts.extend(future.result() for future in pending)
+    return TokenizedCorpus.merge(parts)
+
+
+def _default_build_workers() -> int:
+    """Worker count from INDEX_BUILD_WORKERS (0 means one per CPU core)."""
+    try:
+        workers = int(os.getenv("INDEX_BUILD_WORKERS", "1"))
+    except ValueError:
+        logging.warning("Ignoring non-integer INDEX_BUILD_WORKERS")
+        return 1
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def _default_timings() -> bool:
+    """Whether MATCHER_TIMINGS asks for per-stage timings (off unless set to 1/true/yes/json)."""
+    return os.getenv("MATCHER_TIMINGS", "").strip().lower() in ("1", "true", "yes", "json")
+
+
+def _default_timing_hook() -> Optional[TimingHook]:
+    """With MATCHER_TIMINGS=json, every timing sample is also logged as one JSON line."""
+    return json_log_hook() if os.getenv("MATCHER_TIMINGS", "").strip().lower() == "json" else None
+
+
 # --- BM25 matcher ------------------------------------
+class _SearchState(NamedTuple):
+    """Index and records published together, so a search never mixes generations."""
+    index: Optional[BM25Index]
+    companies: Optional[CorpusStore]
+    version: int
+    facets: Optional[FacetIndex] = None
+    duplicates: Optional[NearDuplicateIndex] = None
+    semantic: Optional[SemanticIndex] = None
+    positions: Optional[PositionalIndex] = None
+    shards: Optional[ShardedIndex] = None
+    impacts: Optional[ImpactIndex] = None
+    speller: Optional[SpellCorrector] = None
+    completer: Optional[TitleCompleter] = None
+    priors: Optional[np.ndarray] = None
+    signatures: Optional[TermSignatures] = None
+
+
 class StartupMatcher:
+    # "inverted" prunes per query; "sparse" scores batches with one matrix product
+    BACKENDS = {"inverted": BM25Index, "sparse": SparseBM25Index}
+    # "bm25f" weights matches per field; "bm25" scores the concatenated text (BM25Okapi)
+    SCORINGS = {
+        "bm25": BACKENDS,
+        "bm25f": {"inverted": BM25FIndex, "sparse": SparseBM25FIndex},
+    }
+    # Indexed fields, in the order their tokens are laid out in each document
+    FIELDS = ("title", "blurb", "description", "features")
+    # A title hit says more than a description hit; short fields are normalised less
+    DEFAULT_FIELD_WEIGHTS = {"title": 3.0, "blurb": 1.5, "description": 1.0, "features": 1.0}
+    DEFAULT_FIELD_B = {"title": 0.5, "blurb": 0.75, "description": 0.75, "features": 0.75}
+    # Compact once this share of documents is tombstoned or sits in the delta segment
+    COMPACT_DELETED_RATIO = 0.2
+    COMPACT_DELTA_RATIO = 0.25
+    FILTER_MASK_CACHE_SIZE = 64
+    MINHASH_PREFIX = "minhash_"
+    # "bm25" ranks by keyword overlap; "semantic" by LSA cosine, so related vocabulary matches too;
+    # "hybrid" re-ranks the BM25 candidates semantically and fuses both rankings;
+    # "impact" is approximate BM25 over impact-ordered postings, at a fixed cost per query
+    RETRIEVAL_MODES = ("bm25", "semantic", "hybrid", "impact")
+    SEMANTIC_MODES = ("semantic", "hybrid")
+    LSA_PREFIX = "lsa_"
+
     def __init__(self, 
                  yc_data_path: str = "data/company_details.json", 
-                 ph_data_path: str = "data/producthunt_all_years.json"):
+                 ph_data_path: Optional[str] = None,
+                 cache_dir: Optional[str] = None,
+                 use_snapshot: bool = True,
+                 backend: str = "inverted",
+                 build_workers: Optional[int] = None,
+                 scoring: str = "bm25f",
+                 field_weights: Optional[Dict[str, float]] = None,
+                 field_b: Optional[Dict[str, float]] = None,
+                 cache_size: int = 1024,
+                 dedup: bool = True,
+                 retrieval: str = "bm25",
+                 timings: Optional[bool] = None,
+                 timing_hook: Optional[TimingHook] = None,
+                 phrase_boost: float = 0.3,
+                 shards: int = 1,
+                 impact_budget: int = DEFAULT_BUDGET,
+                 typo_weight: float = 0.5,
+                 priors: Optional[Dict[str, float]] = None,
+                 diversity: float = 0.0,
+                 search_workers: int = 2):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown matcher backend '{backend}', expected one of {sorted(self.BACKENDS)}")
+        if scoring not in self.SCORINGS:
+            raise ValueError(f"Unknown scoring '{scoring}', expected one of {sorted(self.SCORINGS)}")
+        self._check_mode(retrieval)
+        if phrase_boost < 0:
+            raise ValueError(f"phrase_boost must be non-negative, got {phrase_boost}")
+        if shards < 1:
+            raise ValueError(f"shards must be at least 1, got {shards}")
+        if search_workers < 1:
+            raise ValueError(f"search_workers must be at least 1, got {search_workers}")
+        if impact_budget < 1:
+            raise ValueError(f"impact_budget must be at least 1, got {impact_budget}")
+        if not 0.0 <= typo_weight <= 1.0:
+            raise ValueError(f"typo_weight must be between 0 and 1, got {typo_weight}")
+        prior_weights = normalize_priors(priors)
+        self._check_diversity(diversity)
+        for overrides in (field_weights, field_b):
+            unknown = set(overrides or {}) - set(self.FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown fields {sorted(unknown)}, expected some of {list(self.FIELDS)}")
         self.yc_data_path = yc_data_path
         self.ph_data_path = ph_data_path
+        # Per-month Product Hunt files next to the YC data unless told otherwise
+        self.ph_paths = discover_ph_files(ph_data_path, os.path.dirname(yc_data_path))
+        self.batch_paths = discover_batch_files(os.path.dirname(yc_data_path))
+        # Snapshots live next to the data files unless told otherwise
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(yc_data_path), ".index_cache")
+        self.use_snapshot = use_snapshot
+        self.backend = backend
+        self.scoring = scoring
+        self.field_weights = {**self.DEFAULT_FIELD_WEIGHTS, **(field_weights or {})}
+        self.field_b = {**self.DEFAULT_FIELD_B, **(field_b or {})}
+        self.build_workers = build_workers if build_workers is not None else _default_build_workers()
+        # Cluster near-duplicate records (a YC company and its PH launches) and show one per cluster
+        self.dedup = dedup
+        # Default retrieval mode; the semantic index is built up front only when the default needs it
+        self.retrieval = retrieval
+        # BM25 scores of documents matching query words in order or close together are
+        # multiplied by up to 1 + phrase_boost; 0 disables it and skips the positional index
+        self.phrase_boost = phrase_boost
+        # With more than one shard, BM25 scoring is spread over that many worker processes
+        self.shards = shards
+        self._shard_pool = ShardPool(shards) if shards > 1 else None
+        if self._shard_pool is not None:
+            weakref.finalize(self, self._shard_pool.close)
+        # Postings scored per query in "impact" mode before it stops early
+        self.impact_budget = impact_budget
+        # Query words missing from the vocabulary are replaced by the nearest terms, which count
+        # typo_weight per edit (0.5: one edit counts half a typed word); 0 turns correction off
+        self.typo_weight = typo_weight
+        # Lexical scores are multiplied by 1 + the weighted recency/popularity priors of each
+        # document (see nlp.priors), e.g. {"recency": 0.5, "popularity": 0.2}; all 0 by default
+        self.priors = prior_weights
+        # Default trade-off of the MMR re-rank (see match); 0 keeps the relevance order
+        self.diversity = diversity
+        # amatch/amatch_many run on this many dedicated threads, never on the event loop; the
+        # scoring is numpy (or shard processes), which releases the GIL for most of the work
+        self.search_workers = search_workers
+        self._search_pool = ThreadPoolExecutor(max_workers=search_workers, thread_name_prefix="matcher-search")
+        weakref.finalize(self, self._search_pool.shutdown, wait=False, cancel_futures=True)
+        # Cancellation flag of the async search running on the current search thread, if any
+        self._search_local = threading.local()
         self.processor = TextPreprocessor()
-        self._load_data()
-        self._build_index()
+        self._update_lock = threading.Lock()
+        # Results per (sorted query tokens, top_n), dropped whenever the index version changes
+        self._cache = QueryCache(cache_size)
+        # Document masks per filter combination, for the current index version
+        self._filter_masks = QueryCache(self.FILTER_MASK_CACHE_SIZE)
+        self._state = _SearchState(None, None, 0)
+        # The semantic index is fitted on the snapshot corpus and cached under its fingerprint
+        self._fingerprint: Optional[str] = None
+        self._base_corpus: Optional[TokenizedCorpus] = None
+        # Per-stage latency histograms (see stats()); a hook receives every sample as a dict,
+        # and MATCHER_TIMINGS=json logs each one as JSON when no hook is given
+        if timing_hook is None:
+            timing_hook = _default_timing_hook()
+        if timings is None:
+            timings = timing_hook is not None or _default_timings()
+        self._timer = StageTimer(enabled=timings, hook=timing_hook)
+        with self._timer.time("build_index"):
+            self._build_index()
 
-    def _load_data(self) -> None:
-        # Initialize companies list
-        self.companies = []
-        
-        # Load YC data
-        if os.path.isfile(self.yc_data_path):
-            try:
-                with open(self.yc_data_path, "r", encoding="utf-8") as f:
-                    yc_companies = json.load(f)
-                
-                # Ensure each company has a source field
-                for company in yc_companies:
-                    company['source'] = company.get('source', 'yc')
-                
-                self.companies.extend(yc_companies)
-                logging.info(f"Loaded {len(yc_companies)} YC companies from {self.yc_data_path}")
-            except json.JSONDecodeError:
-                logging.error(f"Failed to parse JSON from {self.yc_data_path}")
-        else:
-            logging.warning(f"YC data file not found: {self.yc_data_path}")
+    @property
+    def companies(self) -> CorpusStore:
+        return self._state.companies
+
+    @property
+    def bm25(self) -> BM25Index:
+        return self._state.index
+
+    @property
+    def version(self) -> int:
+        """Incremented every time a new index generation is published."""
+        return self._state.version
+
+    def _stream_documents(self, builder: CorpusStoreBuilder) -> Iterable[List[str]]:
+        """
+        Stream every record into the columnar store while yielding its field texts.
+
+        Records are normalized and encoded as they are parsed, so the corpus
+        is never held as a list of dicts.
+        """
+        yc_batches = load_yc_batches(self.batch_paths)
+        records = iter_corpus_records(self.yc_data_path, self.ph_paths, yc_batches)
+        # Only the parsing is timed as "load"; tokenizing the yielded texts happens in between
+        for record in self._timer.timed_iter("load", records):
+            builder.append(record)
+            yield self._document_fields(record)
+
+    @staticmethod
+    def _document_fields(comp: Dict[str, Any]) -> List[str]:
+        """Return the indexed text of a record, one string per entry of FIELDS."""
+        # Check for different field names that might exist
+        name = comp.get("name", comp.get("title", ""))
+        blurb = comp.get("blurb", "")
+        description = comp.get("description", "")
         
-        # Load ProductHunt data
-        if os.path.isfile(self.ph_data_path):
-            try:
-                with open(self.ph_data_path, "r", encoding="utf-8") as f:
-                    ph_data = json.load(f)
-                    
-                # ProductHunt data is stored by year, flatten it
-                ph_companies = []
-                for year, companies in ph_data.items():
-                    for company in companies:
-                        # Ensure source field
-                        company['source'] = company.get('source', 'producthunt')
-                        ph_companies.append(company)
-                
-                self.companies.extend(ph_companies)
-                logging.info(f"Loaded {len(ph_companies)} ProductHunt products from {self.ph_data_path}")
-            except json.JSONDecodeError:
-                logging.error(f"Failed to parse JSON from {self.ph_data_path}")
-        else:
-            logging.warning(f"ProductHunt data file not found: {self.ph_data_path}")
+        # For ProductHunt data, we might have 'features' as a list
+        features = ""
+        if isinstance(comp.get("features", ""), list):
+            features = " ".join(comp.get("features", []))
         
+        return [name, blurb, description, features]
+
+    @classmethod
+    def _document_text(cls, comp: Dict[str, Any]) -> str:
+        return " ".join(cls._document_fields(comp))
+
+    def _tokenize_fields(self, comp: Dict[str, Any]) -> List[List[str]]:
+        return [self.processor.tokenize(text) for text in self._document_fields(comp)]
+
+    def _make_index(self, corpus: TokenizedCorpus) -> BM25Index:
+        index_cls = self.SCORINGS[self.scoring][self.backend]
+        if self.scoring == "bm25f":
+            return index_cls(
+                corpus,
+                field_weights=[self.field_weights[f] for f in self.FIELDS],
+                field_b=[self.field_b[f] for f in self.FIELDS],
+            )
+        return index_cls(corpus)
+
+    def _build_index(self) -> None:
+        start = time.perf_counter()
+        builder = CorpusStoreBuilder()
+        docs = self._stream_documents(builder)
+        corpus, companies = None, None
+        stored = False
+        if self.use_snapshot:
+            # Key the snapshot on the raw data and tokenizer so stale ones are never reused
+            fingerprint = corpus_fingerprint(
+                [self.yc_data_path] + self.ph_paths + self.batch_paths,
+                f"{self.processor.signature()}|fields={','.join(self.FIELDS)}",
+            )
+            path = snapshot_path(self.cache_dir, fingerprint)
+            with self._timer.time("load"):
+                corpus = load_snapshot(path, fingerprint)
+                companies = CorpusStore.load(store_path(self.cache_dir, fingerprint))
+            stored = companies is not None
+            if corpus is not None and companies is None:
+                # Only the records are needed; their tokens come from the snapshot
+                for _ in docs:
+                    pass
+                companies = builder.build()
+            if corpus is not None and len(corpus) != len(companies):
+                logging.warning("Index snapshot does not match loaded data, rebuilding")
+                corpus = None
+
+        if corpus is None:
+            # Tokenize records while they are still being parsed
+            builder = CorpusStoreBuilder()
+            docs = self._stream_documents(builder)
+            if self.build_workers > 1:
+                corpus = tokenize_corpus_parallel(docs, self.processor.mode, self.build_workers)
+                logging.info(f"Tokenized corpus with up to {self.build_workers} worker processes")
+            else:
+                corpus = TokenizedCorpus.from_field_token_lists(
+                    [self.processor.tokenize(text) for text in fields] for fields in docs
+                )
+            companies = builder.build()
+            if self.use_snapshot:
+                save_snapshot(path, corpus, fingerprint)
+        if self.use_snapshot and companies.n_base and not stored:
+            # Missing or unreadable on disk. Serve records from the memory-mapped
+            # copy so worker processes share its pages
+            if save_store(store_path(self.cache_dir, fingerprint), companies):
+                companies = CorpusStore.load(store_path(self.cache_dir, fingerprint)) or companies
+
         # Check if we have any data to work with
-        if not self.companies:
+        if not len(companies):
             logging.error("No company data found in either source")
             raise FileNotFoundError("No company data available")
-            
-        logging.info(f"Combined dataset contains {len(self.companies)} companies/products")
-
-    def _build_index(self) -> None:
-        # combine and preprocess each company's text
-        self.docs = []
-        for comp in self.companies:
-            # Check for different field names that might exist
-            name = comp.get("name", comp.get("title", ""))
-            blurb = comp.get("blurb", "")
-            description = comp.get("description", "")
-            
-            # For ProductHunt data, we might have 'features' as a list
-            features = ""
-            if isinstance(comp.get("features", ""), list):
-                features = " ".join(comp.get("features", []))
-            
-            raw = " ".join([name, blurb, description, features])
-            tokens = self.processor.tokenize(raw)
-            self.docs.append(tokens)
+        source = companies.column("source")
+        counts = Counter(companies.categories("source")[code] for code in source[source >= 0].tolist())
+        logging.info(f"Combined dataset contains {len(companies)} companies/products ({dict(counts)})")
 
         # build BM25
-        self.bm25 = BM25Okapi(self.docs)
-        logging.info("BM25 index built.")
+        index = self._make_index(corpus)
+        self._fingerprint = fingerprint if self.use_snapshot else None
+        self._base_corpus = corpus
+        duplicates = None
+        if self.dedup:
+            duplicates = self._build_duplicates(index, self._fingerprint)
+            logging.info(f"Near-duplicate clustering: {len(companies)} records in {duplicates.n_clusters} clusters")
+        semantic = self._build_semantic(index) if self.retrieval in self.SEMANTIC_MODES else None
+        self._publish(index, companies, duplicates, semantic)
+        rss = peak_rss_mb()
+        logging.info(
+            f"BM25 index built ({self.backend} backend, {self.scoring} scoring) in "
+            f"{time.perf_counter() - start:.2f}s" + (f", peak RSS {rss:.0f} MB" if rss is not None else "")
+        )
+
+    def _build_duplicates(self, index: BM25Index, fingerprint: Optional[str]) -> NearDuplicateIndex:
+        """MinHash the corpus, reusing cached signatures when the data hasn't changed."""
+        if fingerprint is None:
+            return NearDuplicateIndex.from_index(index)
+        path = cache_file_path(self.cache_dir, self.MINHASH_PREFIX, fingerprint)
+        cached = load_arrays(path, fingerprint)
+        if cached is not None and cached["signatures"].shape == (index.n_docs, NUM_PERM):
+            return NearDuplicateIndex.from_index(index, cached["signatures"])
+        duplicates = NearDuplicateIndex.from_index(index)
+        save_arrays(path, fingerprint, {"signatures": duplicates.signatures}, self.MINHASH_PREFIX)
+        return duplicates
+
+    def _build_semantic(self, index: BM25Index) -> SemanticIndex:
+        """Fit the LSA projection, reusing the cached one while the base corpus is unchanged."""
+        start = time.perf_counter()
+        if self._fingerprint is None or index.corpus is not self._base_corpus:
+            semantic = SemanticIndex.build(index)
+        else:
+            path = cache_file_path(self.cache_dir, self.LSA_PREFIX, self._fingerprint)
+            cached = load_arrays(path, self._fingerprint)
+            if cached is not None and len(cached["doc_vecs"]) == len(index.corpus):
+                semantic = SemanticIndex.from_arrays(cached)
+                semantic = semantic.extended(index) if index.n_delta else semantic
+            else:
+                semantic = SemanticIndex.build(index)
+                arrays = semantic.to_arrays()
+                arrays["doc_vecs"] = arrays["doc_vecs"][:len(index.corpus)]
+                save_arrays(path, self._fingerprint, arrays, self.LSA_PREFIX)
+        logging.info(
+            f"Semantic index ready ({semantic.term_proj.shape[1]} dims, {len(semantic.vocab)} terms) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return semantic
+
+    def _build_impacts(self, index: BM25Index) -> ImpactIndex:
+        start = time.perf_counter()
+        impacts = ImpactIndex(index, self.impact_budget)
+        logging.info(f"Impact-ordered postings ready ({impacts.nbytes / 2**20:.1f} MB) "
+                     f"in {time.perf_counter() - start:.2f}s")
+        return impacts
+
+    def _build_speller(self, index: BM25Index) -> SpellCorrector:
+        start = time.perf_counter()
+        speller = SpellCorrector(index.vocab)
+        logging.info(f"Spelling index over {len(speller.terms)} terms built in {time.perf_counter() - start:.2f}s")
+        return speller
+
+    def _build_signatures(self, index: BM25Index) -> TermSignatures:
+        start = time.perf_counter()
+        signatures = TermSignatures.from_index(index)
+        logging.info(f"Diversity signatures ready ({signatures.nbytes / 2**20:.1f} MB) "
+                     f"in {time.perf_counter() - start:.2f}s")
+        return signatures
+
+    def _build_completer(self, index: BM25Index) -> TitleCompleter:
+        """Title prefix index over the live records of the current generation (called under the update lock)."""
+        start = time.perf_counter()
+        companies = self._state.companies
+        titles = [companies.get_field(doc, "name") or companies.get_field(doc, "title") or ""
+                  for doc in range(len(companies))]
+        completer = TitleCompleter(titles, vote_prior(companies.column("votes")), index.live)
+        logging.info(f"Title completion index over {len(completer.keys)} keys ({completer.nbytes / 2**20:.1f} MB) "
+                     f"built in {time.perf_counter() - start:.2f}s")
+        return completer
+
+    def _lazy_state(self, field: str, build) -> _SearchState:
+        """The current state, with the optional index in field built on first use."""
+        state = self._state
+        if getattr(state, field) is not None:
+            return state
+        with self._update_lock:
+            state = self._state
+            if getattr(state, field) is None:
+                # Same generation, so the version (and cached results) stay valid
+                state = state._replace(**{field: build(state.index)})
+                self._state = state
+        return state
+
+    def _mode_state(self, mode: str, diversify: bool = False) -> _SearchState:
+        """The current state, with what mode (and diversity re-ranking) needs built."""
+        needs = []
+        if mode in self.SEMANTIC_MODES:
+            needs.append(("semantic", self._build_semantic))
+        if mode == "impact":
+            needs.append(("impacts", self._build_impacts))
+        if diversify:
+            needs.append(("signatures", self._build_signatures))
+        state = self._state
+        # An update published between two builds starts a generation without the first one
+        while not all(getattr(state, field) is not None for field, _ in needs):
+            for field, build in needs:
+                state = self._lazy_state(field, build)
+        return state
+
+    def _publish(self, index: BM25Index, companies: CorpusStore,
+                 duplicates: Optional[NearDuplicateIndex] = None,
+                 semantic: Optional[SemanticIndex] = None,
+                 positions: Optional[PositionalIndex] = None,
+                 speller: Optional[SpellCorrector] = None,
+                 signatures: Optional[TermSignatures] = None) -> None:
+        if positions is None and self.phrase_boost > 0:
+            positions = PositionalIndex.from_index(index)
+        if speller is None and self.typo_weight > 0:
+            # Built up front so the first misspelt query doesn't pay for it; updates extend it
+            speller = self._build_speller(index)
+        if signatures is None and self.diversity > 0:
+            signatures = self._build_signatures(index)
+        boost = prior_boost(companies, self.priors) if any(self.priors.values()) else None
+        version = self._state.version + 1
+        shards = self._shard_pool.publish(index, version) if self._shard_pool is not None else None
+        # A single attribute assignment, so readers see either generation whole
+        self._state = _SearchState(
+            index, companies, version, FacetIndex(companies), duplicates, semantic, positions, shards,
+            speller=speller, priors=boost, signatures=signatures,
+        )
+
+    def _check_mode(self, mode: str) -> None:
+        if mode not in self.RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}', expected one of {list(self.RETRIEVAL_MODES)}")
+
+    @staticmethod
+    def _check_diversity(diversity: float) -> None:
+        if not 0.0 <= diversity <= 1.0:
+            raise ValueError(f"diversity must be between 0 and 1, got {diversity}")
+
+    def match(self, query: str, top_n: int = 5, fields: Optional[List[str]] = None,
+              filters: Optional[Dict[str, Any]] = None, collapse: bool = True,
+              mode: Optional[str] = None, fusion: Optional[Dict[str, Any]] = None,
+              diversity: Optional[float] = None, lazy: bool = False) -> List[Dict[str, Any]]:
+        """
+        Return the top_n records for a query, best first, each with a relevance_score.
+
+        Results are plain dicts holding every field of the record, or just
+        the given fields. With lazy (and no fields), they are instead
+        CompanyRecord views that decode a field only when it is read; those
+        are mappings but not dicts, and hold a reference to the shared store.
+        filters (see nlp.facets.FILTER_KEYS) restrict which documents can rank,
+        e.g. {"source": "yc"} or {"period_from": "2023", "min_votes": 500}.
+        With collapse, near-duplicate records only take one slot, held by the
+        best-ranked copy. mode picks the retrieval mode (see RETRIEVAL_MODES),
+        defaulting to the matcher's; semantic scores are cosine similarities,
+        and "impact" ranks approximately (see impact_budget) with exact BM25 scores,
+        boosted by phrase_boost and priors like "bm25". fusion overrides the
+        hybrid stage sizes and weights (see nlp.hybrid.DEFAULT_FUSION), e.g.
+        {"candidates": 100, "method": "weighted", "semantic_weight": 0.3},
+        and implies hybrid mode.
+        diversity (default the matcher's) re-ranks the top DIVERSITY_CANDIDATES
+        by maximal marginal relevance over tf-idf signatures, so results
+        that repeat ones above them move down: 0 keeps the relevance order,
+        0.3 mostly keeps it, 1 only avoids similar results. Scores stay the
+        relevance scores, so they need no longer be descending.
+        """
+        return self.match_many(
+            [query], top_n, fields=fields, filters=filters, collapse=collapse, mode=mode, fusion=fusion,
+            diversity=diversity, lazy=lazy,
+        )[0]
+
+    def match_many(self, queries: List[str], top_n: int = 5, fields: Optional[List[str]] = None,
+                   filters: Optional[Dict[str, Any]] = None, collapse: bool = True,
+                   mode: Optional[str] = None,
+                   fusion: Optional[Dict[str, Any]] = None,
+                   diversity: Optional[float] = None, lazy: bool = False) -> List[List[Dict[str, Any]]]:
+        """Match several queries at once; the sparse backend scores them in one product."""
+        mode = mode or ("hybrid" if fusion else self.retrieval)
+        self._check_mode(mode)
+        if fusion and mode != "hybrid":
+            raise ValueError(f"Fusion settings only apply to hybrid retrieval, not '{mode}'")
+        fuse = normalize_fusion(fusion) if mode == "hybrid" else ()
+        diversity = self.diversity if diversity is None else diversity
+        self._check_diversity(diversity)
+        state = self._mode_state(mode, diversify=diversity > 0)
+        flt = normalize_filters(filters)
+        collapse = collapse and state.duplicates is not None
+        timer = self._timer
+        with timer.time("tokenize", queries=len(queries)):
+            tokenized = [self.processor.tokenize(query) for query in queries]
+        # The phrase boost reads token order; semantic retrieval alone does not
+        ordered = state.positions is not None and mode in ("bm25", "hybrid")
+        keys = [self._cache_key(q_tokens, top_n, flt, collapse, mode, fuse, ordered, diversity) for q_tokens in tokenized]
+        hits = [self._cache.get(key, state.version) for key in keys]
+        missing = [i for i, hit in enumerate(hits) if hit is None]
+        if missing:
+            index = self._filtered_index(state, flt, mode, fuse)
+            pending = [tokenized[i] for i in missing]
+            if self.typo_weight > 0:
+                with timer.time("correct", queries=len(pending)):
+                    pending = self._corrected(state, pending)
+            self._raise_if_cancelled()
+            # The diversified top_n is picked from a longer relevance ranking
+            fetch = max(top_n, DIVERSITY_CANDIDATES) if diversity > 0 else top_n
+            if collapse:
+                computed = self._top_k_collapsed(index, state.duplicates, pending, fetch)
+            else:
+                with timer.time("score", queries=len(pending), mode=mode):
+                    computed = index.top_k_many(pending, fetch)
+            if diversity > 0:
+                with timer.time("diversify", queries=len(pending)):
+                    computed = [mmr_rerank(docs, scores, state.signatures.similarities(docs), top_n, diversity)
+                                for docs, scores in computed]
+            self._raise_if_cancelled()
+            for i, hit in zip(missing, computed):
+                hits[i] = hit
+                self._cache.put(keys[i], state.version, hit)
+        with timer.time("results", queries=len(queries)):
+            return [self._results(state, idxs, scores, fields=fields, lazy=lazy) for idxs, scores in hits]
+
+    def suggest(self, prefix: str, top_n: int = 8,
+                filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Complete a partly typed name to existing YC and Product Hunt titles.
 
-    def match(self, query: str, top_n: int = 5) -> List[Dict[str, Any]]:
-        q_tokens = self.processor.tokenize(query)
-        scores = self.bm25.get_scores(q_tokens)
-        top_idxs = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_n]
+        Titles starting with prefix come first, then titles with a later word
+        starting with it; within each group, Product Hunt launches rank by
+        votes and YC companies as a median launch. Repeated titles only show
+        once. The prefix index is built on first use and again after each
+        update, so a keystroke never scans the records.
 
+        Args:
+            prefix: Text typed so far, e.g. a branch heading being edited
+            top_n: Maximum number of suggestions
+            filters: Same as for match, e.g. {"source": "yc"}
+
+        Returns:
+            Dicts with the title plus source, url and votes where known, best first
+        """
+        state = self._lazy_state("completer", self._build_completer)
+        with self._timer.time("complete"):
+            mask = None
+            flt = normalize_filters(filters)
+            if flt:
+                mask = self._filter_masks.get(flt, state.version)
+                if mask is None:
+                    mask = state.facets.mask(flt)
+                    self._filter_masks.put(flt, state.version, mask)
+            docs = state.completer.complete(prefix, top_n, mask)
+            return [{"title": state.completer.titles[doc],
+                     **state.companies.materialize(doc, ["source", "url", "votes"])} for doc in docs]
+
+    def _corrected(self, state: _SearchState, queries: List[List[str]]) -> List[List[str]]:
+        """Replace tokens missing from the vocabulary by their nearest terms, down-weighted per edit."""
+        term_to_id = state.index.term_to_id
+        if all(tok in term_to_id or len(tok) < MIN_CORRECT_LEN for q_tokens in queries for tok in q_tokens):
+            return queries
+        speller = state.speller
+        df = state.index.df
+
+        def term_df(term: str) -> int:
+            tid = term_to_id.get(term)
+            return int(df[tid]) if tid is not None else 0
+
+        corrected = []
+        for q_tokens in queries:
+            tokens = []
+            for tok in q_tokens:
+                if tok in term_to_id:
+                    tokens.append(tok)
+                    continue
+                tokens.extend(WeightedToken(term, self.typo_weight ** edits)
+                              for term, edits in speller.correct(tok, term_df))
+            corrected.append(tokens)
+        return corrected
+
+    def _filtered_index(self, state: _SearchState, flt: tuple, mode: str = "bm25", fuse: tuple = ()):
+        """The index for mode, or a view of it restricted to the documents matching flt."""
+        mask = None
+        if flt:
+            mask = self._filter_masks.get(flt, state.version)
+            if mask is None:
+                mask = state.facets.mask(flt)
+                self._filter_masks.put(flt, state.version, mask)
+        if mode == "impact":
+            lexical = state.impacts
+        else:
+            # Shards score exactly like the full index, in parallel worker processes
+            lexical = state.shards if state.shards is not None else state.index
+        lexical = lexical if mask is None else lexical.restricted(mask)
+        if state.positions is not None:
+            # Only the candidates that survive BM25 pruning get their positions checked
+            lexical = PhraseBoostIndex(lexical, state.positions, self.phrase_boost)
+        if state.priors is not None:
+            lexical = PriorBoostIndex(lexical, state.priors)
+        if mode in ("bm25", "impact"):
+            return lexical
+        # Vectors of tombstoned documents are kept, so apply the BM25 index's live mask too
+        live = state.index.live
+        if live is not None:
+            mask = live if mask is None else mask & live
+        semantic = state.semantic if mask is None else state.semantic.restricted(mask)
+        return semantic if mode == "semantic" else HybridIndex(lexical, semantic, fuse)
+
+    def _top_k_collapsed(self, index, duplicates: NearDuplicateIndex,
+                         queries: List[List[str]], k: int) -> List[tuple]:
+        """Top k distinct clusters per query, over-fetching until enough survive collapsing."""
+        results: List[Optional[tuple]] = [None] * len(queries)
+        pending = list(range(len(queries)))
+        fetch = 2 * k
+        while pending:
+            retry = []
+            with self._timer.time("score", queries=len(pending), fetch=fetch):
+                ranked = index.top_k_many([queries[i] for i in pending], fetch)
+            for i, (docs, scores) in zip(pending, ranked):
+                with self._timer.time("select"):
+                    collapsed = duplicates.collapse(docs, scores, k)
+                # Fewer than fetch results means every live document was seen
+                if len(collapsed[0]) >= k or len(docs) < fetch:
+                    results[i] = collapsed
+                else:
+                    retry.append(i)
+            pending = retry
+            fetch *= 4
+        return results
+
+    @staticmethod
+    def _cache_key(q_tokens: List[str], top_n: int, flt: tuple = (), collapse: bool = False,
+                   mode: str = "bm25", fuse: tuple = (), ordered: bool = False, diversity: float = 0.0) -> tuple:
+        # Unless token order matters, reordered queries share an entry
+        tokens = tuple(q_tokens) if ordered else tuple(sorted(q_tokens))
+        return tokens, top_n, flt, collapse, mode, fuse, diversity
+
+    def close(self, drain: bool = False) -> None:
+        """
+        Stop the search threads and shard worker processes; async searches fail afterwards.
+
+        With drain, searches already submitted to them finish first instead
+        of being cancelled.
+        """
+        self._search_pool.shutdown(wait=False, cancel_futures=not drain)
+        if self._shard_pool is not None:
+            self._shard_pool.close(drain)
+
+    def cache_info(self) -> CacheInfo:
+        """Hit/miss counters and current size of the query result cache."""
+        return self._cache.info()
+
+    def stats(self) -> Dict[str, StageStats]:
+        """
+        Latency statistics per stage, empty unless timings are enabled.
+
+        Stages: "build_index" (whole startup build), "load" (reading the
+        snapshot and store, or parsing the data files, during it), "tokenize" (queries), "correct" (typo
+        correction of unknown query words), "score" (candidate scoring;
+        the inverted backend selects its top k while scoring), "select"
+        (near-duplicate collapsing), "diversify" (MMR re-ranking), "results"
+        (building the result records), "complete" (suggest), "format"
+        (format_results) and "queue" (time an amatch/amatch_many call waited
+        for a search thread).
+        """
+        return self._timer.stats()
+
+    def reset_stats(self) -> None:
+        self._timer.reset()
+
+    @staticmethod
+    def _results(state: _SearchState, top_idxs, scores, fields: Optional[List[str]] = None,
+                 lazy: bool = False) -> List[Dict[str, Any]]:
         results = []
-        for idx in top_idxs:
-            comp = self.companies[idx].copy()
-            comp["relevance_score"] = float(scores[idx])
+        for idx, score in zip(top_idxs.tolist(), scores.tolist()):
+            if lazy and fields is None:
+                comp = state.companies.record(idx)
+            else:
+                comp = state.companies.materialize(idx, fields)
+            comp["relevance_score"] = float(score)
             results.append(comp)
         return results
 
+    # --- Async API -----------------------------------
+    async def amatch(self, query: str, top_n: int = 5, fields: Optional[List[str]] = None,
+                     filters: Optional[Dict[str, Any]] = None, collapse: bool = True,
+                     mode: Optional[str] = None, fusion: Optional[Dict[str, Any]] = None,
+                     diversity: Optional[float] = None, timeout: Optional[float] = None,
+                     lazy: bool = False) -> List[Dict[str, Any]]:
+        """match for async callers (e.g. FastAPI handlers); see amatch_many for timeout."""
+        results = await self.amatch_many(
+            [query], top_n, fields=fields, filters=filters, collapse=collapse, mode=mode, fusion=fusion,
+            diversity=diversity, timeout=timeout, lazy=lazy,
+        )
+        return results[0]
+
+    async def amatch_many(self, queries: List[str], top_n: int = 5, fields: Optional[List[str]] = None,
+                          filters: Optional[Dict[str, Any]] = None, collapse: bool = True,
+                          mode: Optional[str] = None, fusion: Optional[Dict[str, Any]] = None,
+                          diversity: Optional[float] = None,
+                          timeout: Optional[float] = None, lazy: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        match_many for async callers, run on the matcher's search threads.
+
+        The event loop only awaits the result, so searches never hold up
+        other requests it serves. At most search_workers searches run at
+        once; the rest wait in line. When the caller is cancelled or timeout
+        (seconds, covering the wait in line) runs out, a search still in
+        line is dropped and a running one stops at its next stage boundary
+        (after correction, scoring or re-ranking).
+
+        Raises:
+            asyncio.TimeoutError: The search did not finish within timeout
+        """
+        cancelled = threading.Event()
+        future = self._search_pool.submit(
+            self._run_search, cancelled, time.perf_counter(), queries, top_n, fields=fields,
+            filters=filters, collapse=collapse, mode=mode, fusion=fusion, diversity=diversity, lazy=lazy,
+        )
+        try:
+            # Cancelling the wrapper cancels the pool future too, so a queued search never starts
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            cancelled.set()
+            raise
+
+    def _run_search(self, cancelled: threading.Event, submitted: float, queries: List[str], top_n: int,
+                    **options: Any) -> List[List[Dict[str, Any]]]:
+        """Search thread entry point: match_many, stopping early once cancelled is set."""
+        if self._timer.enabled:
+            self._timer.record("queue", time.perf_counter() - submitted, queries=len(queries))
+        if cancelled.is_set():
+            raise CancelledError()
+        self._search_local.cancelled = cancelled
+        try:
+            return self.match_many(queries, top_n, **options)
+        finally:
+            self._search_local.cancelled = None
+
+    def _raise_if_cancelled(self) -> None:
+        """Stop an async search whose caller gave up; a no-op for direct calls."""
+        cancelled = getattr(self._search_local, "cancelled", None)
+        if cancelled is not None and cancelled.is_set():
+            raise CancelledError()
+
+    # --- Incremental updates -------------------------
+    def add_documents(self, records: List[Dict[str, Any]], source: Optional[str] = None) -> int:
+        """
+        Index new companies/products without re-tokenizing the existing corpus.
+
+        A record whose url is already indexed replaces the old entry, so
+        re-scraped companies are updated rather than duplicated.
+
+        Args:
+            records: Company or product dictionaries as written by the scrapers
+            source: Default 'source' for records that don't carry one
+
+        Returns:
+            Number of records added
+        """
+        if not records:
+            return 0
+        for record in records:
+            if source:
+                record['source'] = record.get('source', source)
+        field_tokens = [self._tokenize_fields(record) for record in records]
+
+        with self._update_lock:
+            state = self._state
+            urls = {record.get("url") for record in records if record.get("url")}
+            index = state.index.without_documents(self._live_ids_for_urls(state, urls))
+            index = index.with_documents(field_tokens)
+            duplicates = state.duplicates.extended(index) if state.duplicates is not None else None
+            semantic = state.semantic.extended(index) if state.semantic is not None else None
+            positions = state.positions.extended(index) if state.positions is not None else None
+            speller = state.speller.extended(index.vocab) if state.speller is not None else None
+            signatures = state.signatures.extended(index) if state.signatures is not None else None
+            self._publish(index, state.companies.extended(records), duplicates, semantic, positions, speller,
+                          signatures)
+            self._compact_if_needed()
+        logging.info(f"Added {len(records)} documents to the index")
+        return len(records)
+
+    def remove_documents(self, urls: Iterable[str]) -> int:
+        """
+        Tombstone the documents with the given urls.
+
+        Returns:
+            Number of documents removed
+        """
+        with self._update_lock:
+            state = self._state
+            doc_ids = self._live_ids_for_urls(state, set(urls))
+            if doc_ids:
+                self._publish(
+                    state.index.without_documents(doc_ids), state.companies, state.duplicates,
+                    state.semantic, state.positions, state.speller, state.signatures,
+                )
+                self._compact_if_needed()
+        logging.info(f"Removed {len(doc_ids)} documents from the index")
+        return len(doc_ids)
+
+    def compact(self) -> None:
+        """Drop tombstoned documents and merge the delta segment into the main index."""
+        with self._update_lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        state = self._state
+        index, kept = state.index.compacted()
+        duplicates = state.duplicates.take(kept, index) if state.duplicates is not None else None
+        semantic = state.semantic.take(kept) if state.semantic is not None else None
+        # Compaction renumbers the vocabulary, so signatures (by term id) are signed again
+        signatures = self._build_signatures(index) if state.signatures is not None else None
+        # Spelling suggestions are checked against the current vocabulary, so the corrector carries over
+        self._publish(index, state.companies.take(kept.tolist()), duplicates, semantic, speller=state.speller,
+                      signatures=signatures)
+        logging.info(f"Compacted index to {len(kept)} documents")
+
+    def _compact_if_needed(self) -> None:
+        index = self._state.index
+        live = max(index.n_live, 1)
+        if (index.n_deleted / index.n_docs > self.COMPACT_DELETED_RATIO
+                or index.n_delta / live > self.COMPACT_DELTA_RATIO):
+            self._compact()
+
+    @staticmethod
+    def _live_ids_for_urls(state: _SearchState, urls: set) -> List[int]:
+        live = state.index.live
+        return [i for i in state.companies.ids_for("url", urls) if live is None or live[i]]
+
+    def ingest_file(self, path: str, source: Optional[str] = None) -> int:
+        """
+        Add the records of a scraper output file (.json list/by-period dict, or .jsonl).
+
+        Args:
+            path: File written by yc_scraper.py / product_hunt_scraper.py
+            source: Default 'source' for records that don't carry one
+
+        Returns:
+            Number of records added
+        """
+        if path.endswith(".jsonl"):
+            with open(path, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = list(iter_json_records(path))
+        return self.add_documents(records, source=source)
+
     def format_results(self, results: List[Dict[str, Any]]) -> str:
         """Format the results as a nice string for display."""
+        with self._timer.time("format"):
+            return self._format_results(results)
+
+    @staticmethod
+    def _format_results(results: List[Dict[str, Any]]) -> str:
         if not results:
             return "No relevant companies found."
             
@@ -177,26 +1070,129 @@ class StartupMatcher:
         return output
 
 
-# --- Integration with ideation_graph.py --------------
-def find_relevant_companies(product_idea: Dict[str, Any], top_n: int = 5) -> List[Dict[str, Any]]:
+# --- Shared matcher registry -------------------------
+# Building the index means reading every data file and tokenizing the whole
+# corpus, so each process keeps one matcher per configuration and shares it
+# between threads. `match` only reads the index, so no locking is needed once
+# a matcher is published.
+_matchers: Dict[tuple, StartupMatcher] = {}
+_matchers_lock = threading.Lock()
+_build_locks: Dict[tuple, threading.Lock] = {}
+
+
+def _registry_key(kwargs: Dict[str, Any]) -> tuple:
+    # Dict-valued settings (field weights) are frozen so the key stays hashable
+    return tuple(sorted(
+        (name, tuple(sorted(value.items())) if isinstance(value, dict) else value)
+        for name, value in kwargs.items()
+    ))
+
+
+def get_matcher(**kwargs) -> StartupMatcher:
     """
-    Take a product idea dictionary and find relevant startups from both YC and ProductHunt.
-    
+    Return the process-wide StartupMatcher for the given configuration.
+
+    The index is built on first use; concurrent callers wait for that single
+    build instead of starting their own.
+
     Args:
-        product_idea: A dictionary containing product idea details
-        top_n: Number of top matches to return
-        
+        **kwargs: Keyword arguments forwarded to StartupMatcher
+
     Returns:
-        List of relevant companies with relevance scores
+        The shared matcher instance
     """
-    # Initialize the matcher
+    key = _registry_key(kwargs)
+    matcher = _matchers.get(key)
+    if matcher is not None:
+        return matcher
+
+    with _matchers_lock:
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+    with build_lock:
+        matcher = _matchers.get(key)
+        if matcher is None:
+            matcher = StartupMatcher(**kwargs)
+            with _matchers_lock:
+                _matchers[key] = matcher
+    return matcher
+
+
+def reload_matcher(**kwargs) -> StartupMatcher:
+    """
+    Build a fresh matcher and atomically swap it into the registry.
+
+    Searches already running keep using the old instance until they finish,
+    so the corpus can be refreshed without blocking readers. Its worker
+    threads and processes are not stopped here: callers may still hold it,
+    so they shut down when the last reference to it is dropped.
+
+    Args:
+        **kwargs: Keyword arguments forwarded to StartupMatcher
+
+    Returns:
+        The newly published matcher instance
+    """
+    key = _registry_key(kwargs)
+    with _matchers_lock:
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+    with build_lock:
+        matcher = StartupMatcher(**kwargs)
+        with _matchers_lock:
+            _matchers[key] = matcher
+    logging.info("Swapped in a rebuilt startup matcher")
+    return matcher
+
+
+def warm_matcher(background: bool = False, **kwargs) -> Optional[threading.Thread]:
+    """
+    Build the shared matcher ahead of the first search.
+
+    Args:
+        background: Build in a daemon thread instead of blocking the caller
+        **kwargs: Keyword arguments forwarded to StartupMatcher
+
+    Returns:
+        The warming thread when background is True, otherwise None
+    """
+    def _warm():
+        try:
+            get_matcher(**kwargs)
+        except Exception as e:
+            logging.error(f"Failed to warm startup matcher: {e}")
+
+    if not background:
+        _warm()
+        return None
+
+    thread = threading.Thread(target=_warm, name="startup-matcher-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def clear_matchers() -> None:
+    """
+    Drop every shared matcher so the next search rebuilds from disk.
+
+    Builds already running finish first and are dropped too. Like
+    reload_matcher, dropped matchers stop their workers once unreferenced.
+    """
+    # Build locks are kept, so a caller racing the clear never starts a second
+    # build; they are only ever added, so every snapshot lists them in one order
+    with _matchers_lock:
+        build_locks = list(_build_locks.values())
+    for lock in build_locks:
+        lock.acquire()
     try:
-        matcher = StartupMatcher()
-    except Exception as e:
-        logging.error(f"Failed to initialize startup matcher: {e}")
-        return []
-    
-    # Extract relevant text from product idea
+        with _matchers_lock:
+            _matchers.clear()
+    finally:
+        for lock in build_locks:
+            lock.release()
+
+
+# --- Integration with ideation_graph.py --------------
+def _product_idea_query(product_idea: Dict[str, Any]) -> str:
+    """Build the search text for a product or concept branch."""
     query_parts = []
     
     # Check for various fields that might exist in product ideas
@@ -224,7 +1220,49 @@ def find_relevant_companies(product_idea: Dict[str, Any], top_n: int = 5) -> Lis
             query_parts.append(product_idea["productDirection"])
     
     # Build the query text
-    query_text = " ".join(query_parts)
+    return " ".join(query_parts)
+
+
+def find_relevant_companies(product_idea: Dict[str, Any], top_n: int = 5,
+                            source: Optional[Union[str, List[str]]] = None,
+                            batch: Optional[Union[str, List[str]]] = None,
+                            period_from: Optional[str] = None,
+                            period_to: Optional[str] = None,
+                            min_votes: Optional[int] = None,
+                            max_votes: Optional[int] = None,
+                            mode: Optional[str] = None,
+                            fusion: Optional[Dict[str, Any]] = None,
+                            diversity: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Take a product idea dictionary and find relevant startups from both YC and ProductHunt.
+    
+    Args:
+        product_idea: A dictionary containing product idea details
+        top_n: Number of top matches to return
+        source: Only return these sources ("yc", "producthunt")
+        batch: Only return YC companies from these batches (e.g. "W24")
+        period_from: Only Product Hunt launches from this month on ("2023" or "2023/05")
+        period_to: Only Product Hunt launches up to this month
+        min_votes: Only Product Hunt launches with at least this many votes
+        max_votes: Only Product Hunt launches with at most this many votes
+        mode: Retrieval mode ("bm25", "semantic", "hybrid" or "impact"), default the matcher's
+        fusion: Hybrid settings, e.g. {"candidates": 200, "method": "rrf", "semantic_weight": 0.5}
+        diversity: MMR trade-off between relevance and variety (0 to 1), default the matcher's
+        
+    Returns:
+        List of relevant companies with relevance scores
+    """
+    filters = {"source": source, "batch": batch, "period_from": period_from,
+               "period_to": period_to, "min_votes": min_votes, "max_votes": max_votes}
+    # Reuse the shared matcher instead of rebuilding the index per search
+    try:
+        matcher = get_matcher()
+    except Exception as e:
+        logging.error(f"Failed to initialize startup matcher: {e}")
+        return []
+    
+    # Extract relevant text from product idea
+    query_text = _product_idea_query(product_idea)
     
     # If we couldn't extract any meaningful text, return empty list
     if not query_text.strip():
@@ -236,11 +1274,72 @@ def find_relevant_companies(product_idea: Dict[str, Any], top_n: int = 5) -> Lis
     
     # Perform the matching
     try:
-        return matcher.match(query_text, top_n)
+        return matcher.match(query_text, top_n, filters=filters, mode=mode, fusion=fusion, diversity=diversity)
     except Exception as e:
         logging.error(f"Error matching companies: {e}")
         return []
 
+def find_relevant_companies_many(product_ideas: List[Dict[str, Any]], top_n: int = 5,
+                                 mode: Optional[str] = None, fusion: Optional[Dict[str, Any]] = None,
+                                 diversity: Optional[float] = None, **filters) -> List[List[Dict[str, Any]]]:
+    """
+    Find relevant startups for several product ideas with one batched search.
+    
+    Args:
+        product_ideas: Product idea dictionaries, e.g. every product branch in a mindmap
+        top_n: Number of top matches to return per idea
+        mode: Retrieval mode, as in find_relevant_companies
+        fusion: Hybrid settings, as in find_relevant_companies
+        diversity: MMR trade-off, as in find_relevant_companies
+        **filters: Same filters as find_relevant_companies, applied to every idea
+        
+    Returns:
+        One list of relevant companies per product idea, in input order
+    """
+    try:
+        matcher = get_matcher()
+    except Exception as e:
+        logging.error(f"Failed to initialize startup matcher: {e}")
+        return [[] for _ in product_ideas]
+    
+    queries = [_product_idea_query(idea) for idea in product_ideas]
+    searchable = [i for i, query in enumerate(queries) if query.strip()]
+    results: List[List[Dict[str, Any]]] = [[] for _ in product_ideas]
+    if not searchable:
+        logging.warning("No valid text extracted from product ideas for relevancy matching")
+        return results
+    
+    try:
+        matches = matcher.match_many(
+            [queries[i] for i in searchable], top_n, filters=filters, mode=mode, fusion=fusion,
+            diversity=diversity,
+        )
+    except Exception as e:
+        logging.error(f"Error matching companies: {e}")
+        return results
+    for i, companies in zip(searchable, matches):
+        results[i] = companies
+    return results
+
+
+def suggest_titles(prefix: str, top_n: int = 8, **filters) -> List[Dict[str, Any]]:
+    """
+    Suggest existing startup and product names for a heading as it is typed.
+
+    Args:
+        prefix: Text typed so far
+        top_n: Maximum number of suggestions
+        **filters: Same filters as find_relevant_companies, e.g. source="producthunt"
+
+    Returns:
+        Suggestions as returned by StartupMatcher.suggest, or [] on failure
+    """
+    try:
+        return get_matcher().suggest(prefix, top_n, filters=filters)
+    except Exception as e:
+        logging.error(f"Error completing '{prefix}': {e}")
+        return []
+
 # Add a function to display formatted results in terminal
 def display_search_results(results, branch_heading):
     """
@@ -0,0 +1,216 @@
+import copy
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from nlp.bm25_index import concat_ranges, token_weight
+
+# Latent dimensions kept from the SVD
+LSA_DIM = 256
+# Terms in fewer documents than this carry no co-occurrence signal
+MIN_DF = 2
+# Random-projection LSH: tables x hyperplanes per table (2^bits buckets each)
+LSH_TABLES = 16
+LSH_BITS = 10
+_SEED = 7
+
+
+def randomized_svd(matrix: sparse.spmatrix, rank: int, oversample: int = 10, n_iter: int = 4,
+                   seed: int = _SEED) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Truncated SVD by randomized range finding (Halko, Martinsson & Tropp).
+
+    Returns:
+        (U, S, Vt) with rank columns / values / rows
+    """
+    rng = np.random.default_rng(seed)
+    size = min(rank + oversample, min(matrix.shape))
+    q = matrix @ rng.standard_normal((matrix.shape[1], size))
+    for _ in range(n_iter):
+        # Power iterations sharpen the spectrum; re-orthonormalize to stay stable
+        q, _ = np.linalg.qr(q)
+        q = matrix @ (matrix.T @ q)
+    q, _ = np.linalg.qr(q)
+    small = np.asarray((matrix.T @ q).T)
+    u_small, s, vt = np.linalg.svd(small, full_matrices=False)
+    rank = min(rank, len(s))
+    return (q @ u_small)[:, :rank], s[:rank], vt[:rank]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class SemanticIndex:
+    """
+    Latent semantic index over the corpus: TF-IDF, truncated SVD, cosine search.
+
+    Documents and queries are TF-IDF weighted (sublinear tf) over terms
+    seen in at least MIN_DF documents, then projected onto the top LSA_DIM
+    singular directions, so documents that use related vocabulary land near
+    each other even without shared terms. Vectors are float32 and
+    L2-normalized; search goes through random-projection LSH (multi-probe,
+    one flipped bit per table) and re-ranks the candidates exactly.
+
+    Documents added later are folded in with the same projection, and the
+    view returned by restricted() applies tombstones and filters like
+    BM25Index.restricted.
+    """
+
+    def __init__(self, vocab: List[str], idf: np.ndarray, term_proj: np.ndarray, doc_vecs: np.ndarray):
+        self.vocab = vocab
+        self.term_to_col = {term: i for i, term in enumerate(vocab)}
+        self.idf = idf
+        self.term_proj = term_proj
+        self.doc_vecs = doc_vecs
+        self.live: Optional[np.ndarray] = None
+        rng = np.random.default_rng(_SEED)
+        self.planes = rng.standard_normal((LSH_TABLES, term_proj.shape[1], LSH_BITS)).astype(np.float32)
+        self._build_tables()
+
+    @classmethod
+    def build(cls, index, dim: int = LSA_DIM) -> "SemanticIndex":
+        """Fit the LSA projection on every document of a BM25 index."""
+        corpus = index.corpus
+        df = np.asarray(corpus.df, dtype=np.int64)
+        keep = np.flatnonzero(df >= MIN_DF)
+        vocab = [corpus.vocab[t] for t in keep.tolist()]
+        n_docs = len(corpus)
+        idf = (np.log((1 + n_docs) / (1 + df[keep])) + 1).astype(np.float32)
+        col_of_term = np.full(len(corpus.vocab), -1, dtype=np.int64)
+        col_of_term[keep] = np.arange(len(keep))
+        tfidf = cls._tfidf(corpus.token_ids, corpus.doc_offsets, col_of_term, idf)
+        _, _, vt = randomized_svd(tfidf, dim)
+        term_proj = np.ascontiguousarray(vt.T, dtype=np.float32)
+        semantic = cls(vocab, idf, term_proj, _normalize(np.asarray(tfidf @ term_proj, dtype=np.float32)))
+        if index.n_delta:
+            semantic = semantic.extended(index)
+        return semantic
+
+    @staticmethod
+    def _tfidf(token_ids: np.ndarray, doc_offsets: np.ndarray, col_of_term: np.ndarray,
+               idf: np.ndarray) -> sparse.csr_matrix:
+        """L2-normalized sublinear TF-IDF rows for documents given as term ids."""
+        n_docs = len(doc_offsets) - 1
+        doc_of_token = np.repeat(np.arange(n_docs, dtype=np.int64), np.diff(doc_offsets))
+        cols = col_of_term[token_ids.astype(np.int64)] if len(token_ids) else np.zeros(0, dtype=np.int64)
+        known = cols >= 0
+        matrix = sparse.csr_matrix(
+            (np.ones(int(known.sum()), dtype=np.float32), (doc_of_token[known], cols[known])),
+            shape=(n_docs, len(idf)),
+        )
+        matrix.sum_duplicates()
+        matrix.data = (1 + np.log(matrix.data)) * idf[matrix.indices]
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags(1 / norms).dot(matrix).tocsr().astype(np.float32)
+
+    # -- ANN structure --------------------------------
+    def _codes(self, vectors: np.ndarray) -> np.ndarray:
+        """Bucket code of each vector in each table, shape (tables, n)."""
+        bits = np.einsum("nd,tdb->tnb", vectors, self.planes) > 0
+        return (bits * (1 << np.arange(LSH_BITS))).sum(axis=2)
+
+    def _build_tables(self) -> None:
+        # One sorted array for all tables: table t's codes are offset by t << LSH_BITS
+        codes = self._codes(self.doc_vecs) + (np.arange(LSH_TABLES)[:, None] << LSH_BITS)
+        self._order = np.argsort(codes, axis=None, kind="stable") % len(self.doc_vecs)
+        self._sorted_codes = np.sort(codes, axis=None)
+
+    def _candidates(self, qvec: np.ndarray) -> np.ndarray:
+        """Documents sharing a bucket with the query, or one bit away, in any table."""
+        codes = self._codes(qvec[None, :])
+        flips = np.concatenate([[0], 1 << np.arange(LSH_BITS)])
+        probes = (codes ^ flips) + (np.arange(LSH_TABLES)[:, None] << LSH_BITS)
+        lo = np.searchsorted(self._sorted_codes, probes.ravel(), side="left")
+        hi = np.searchsorted(self._sorted_codes, probes.ravel(), side="right")
+        lengths = hi - lo
+        if not lengths.sum():
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(self._order[concat_ranges(lo, lengths)])
+
+    # -- queries --------------------------------------
+    def query_vector(self, q_tokens: List[str]) -> Optional[np.ndarray]:
+        """Project a tokenized query into the latent space, or None if no term is known."""
+        counts: Dict[int, int] = {}
+        # Down-weighted tokens (spelling corrections) scale their term's weight
+        scale: Dict[int, float] = {}
+        for tok in q_tokens:
+            col = self.term_to_col.get(tok)
+            if col is not None:
+                counts[col] = counts.get(col, 0) + 1
+                scale[col] = max(scale.get(col, 0.0), token_weight(tok))
+        if not counts:
+            return None
+        cols = np.fromiter(counts, dtype=np.int64, count=len(counts))
+        weights = np.array([(1 + math.log(counts[c])) * scale[c] for c in counts], dtype=np.float32) * self.idf[cols]
+        vec = weights @ self.term_proj[cols]
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else None
+
+    def top_k(self, q_tokens: List[str], k: int, exact: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the top k (doc ids, cosine similarities), ties broken by lower doc id."""
+        qvec = self.query_vector(q_tokens)
+        n_live = len(self.doc_vecs) if self.live is None else int(self.live.sum())
+        k = min(k, n_live)
+        if qvec is None or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        docs = None if exact else self._candidates(qvec)
+        if docs is not None and self.live is not None:
+            docs = docs[self.live[docs]]
+        if docs is None or len(docs) < k:
+            # Too few bucket neighbours (or exact search requested): scan every live document
+            docs = np.arange(len(self.doc_vecs)) if self.live is None else np.flatnonzero(self.live)
+        sims = self.doc_vecs[docs] @ qvec
+        if len(docs) > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+            docs, sims = docs[top], sims[top]
+        order = np.lexsort((docs, -sims))
+        return docs[order], sims[order].astype(np.float64)
+
+    def similarities(self, q_tokens: List[str], docs: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query to each of the given documents (0 if no term is known)."""
+        qvec = self.query_vector(q_tokens)
+        if qvec is None:
+            return np.zeros(len(docs))
+        return (self.doc_vecs[docs] @ qvec).astype(np.float64)
+
+    def top_k_many(self, queries: List[List[str]], k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        return [self.top_k(q_tokens, k) for q_tokens in queries]
+
+    def restricted(self, allowed: Optional[np.ndarray]) -> "SemanticIndex":
+        """Return a view that only ranks the documents where allowed is True."""
+        view = copy.copy(self)
+        view.live = allowed
+        return view
+
+    # -- updates --------------------------------------
+    def extended(self, index) -> "SemanticIndex":
+        """Fold in the documents the BM25 index gained since this one was built."""
+        n_old = len(self.doc_vecs)
+        first = n_old - len(index.corpus)
+        offsets = index.delta_offsets[first:]
+        tokens = index.delta_token_ids[offsets[0]:offsets[-1]]
+        col_of_term = np.fromiter((self.term_to_col.get(term, -1) for term in index.vocab),
+                                  dtype=np.int64, count=len(index.vocab))
+        tfidf = self._tfidf(tokens, offsets - offsets[0], col_of_term, self.idf)
+        added = _normalize(np.asarray(tfidf @ self.term_proj, dtype=np.float32))
+        return SemanticIndex(self.vocab, self.idf, self.term_proj, np.concatenate([self.doc_vecs, added]))
+
+    def take(self, kept: np.ndarray) -> "SemanticIndex":
+        """Keep the vectors of the given documents, renumbered to match a compacted index."""
+        return SemanticIndex(self.vocab, self.idf, self.term_proj, self.doc_vecs[kept])
+
+    # -- persistence ----------------------------------
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        vocab_blob = np.frombuffer("\n".join(self.vocab).encode("utf-8"), dtype=np.uint8)
+        return {"vocab": vocab_blob, "idf": self.idf, "term_proj": self.term_proj, "doc_vecs": self.doc_vecs}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "SemanticIndex":
+        blob = arrays["vocab"].tobytes().decode("utf-8")
+        return cls(blob.split("\n") if blob else [], arrays["idf"], arrays["term_proj"], arrays["doc_vecs"])
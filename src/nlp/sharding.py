@@ -0,0 +1,197 @@
+import copy
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from nlp.bm25_index import BM25Index, CollectionStats
+from nlp.index_cache import TokenizedCorpus
+
+# Index generations a worker keeps, so searches that started just before an update still finish
+KEEP_GENERATIONS = 2
+
+# --- Worker side -------------------------------------
+# Each worker process holds one shard, per index generation
+_generations: Dict[int, BM25Index] = {}
+
+
+def _keep(generation: int, shard: BM25Index) -> int:
+    _generations[generation] = shard
+    for old in sorted(_generations)[:-KEEP_GENERATIONS]:
+        del _generations[old]
+    return shard.n_docs
+
+
+def _load_shard(generation: int, index_cls: type, kwargs: Dict[str, Any], vocab: List[str],
+                token_ids: np.ndarray, doc_offsets: np.ndarray, field_len: np.ndarray,
+                stats: CollectionStats, live: Optional[np.ndarray]) -> int:
+    """Worker entry point: index a run of documents, keeping the coordinator's term ids."""
+    corpus = TokenizedCorpus(vocab, token_ids, doc_offsets, field_len=field_len)
+    return _keep(generation, index_cls(corpus, **kwargs).with_shared_stats(stats, live))
+
+
+def _refresh_shard(generation: int, stats: CollectionStats, live: Optional[np.ndarray]) -> int:
+    """Worker entry point: carry the newest shard over to a generation with new statistics."""
+    return _keep(generation, _generations[max(_generations)].with_shared_stats(stats, live))
+
+
+def _search_shard(generation: int, queries: List[List[str]], k: int,
+                  allowed: Optional[np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Worker entry point: shard-local top k per query."""
+    shard = _generations.get(generation)
+    if shard is None:
+        raise LookupError(f"Index generation {generation} was retired from the shard worker")
+    if allowed is not None:
+        shard = shard.restricted(allowed)
+    return shard.top_k_many(queries, k)
+
+
+# --- Coordinator side --------------------------------
+def _document_tokens(index: BM25Index, lo: int, hi: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Term ids and offsets of documents lo..hi, which may span the main and delta segments."""
+    n_main = len(index.corpus)
+    parts, lengths = [], []
+    if lo < n_main:
+        offsets = index.corpus.doc_offsets
+        end = min(hi, n_main)
+        parts.append(index.corpus.token_ids[offsets[lo]:offsets[end]].astype(np.int64))
+        lengths.append(np.diff(offsets[lo:end + 1]))
+    if hi > n_main:
+        offsets = index.delta_offsets
+        start = max(lo, n_main) - n_main
+        parts.append(index.delta_token_ids[offsets[start]:offsets[hi - n_main]].astype(np.int64))
+        lengths.append(np.diff(offsets[start:hi - n_main + 1]))
+    if not parts:
+        return np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+    doc_offsets = np.concatenate([[0], np.cumsum(np.concatenate(lengths))]).astype(np.int64)
+    return np.concatenate(parts), doc_offsets
+
+
+def partition(doc_len: np.ndarray, n_shards: int) -> np.ndarray:
+    """
+    Split documents into n_shards contiguous runs of about equal token count.
+
+    Returns:
+        n_shards + 1 bounds; run i is documents bounds[i]..bounds[i + 1]
+    """
+    n_docs = len(doc_len)
+    slots = np.arange(n_shards + 1)
+    if n_docs < n_shards:
+        # Fewer documents than shards: one each, the rest stay empty
+        return np.minimum(slots, n_docs)
+    cumulative = np.cumsum(doc_len)
+    cuts = np.searchsorted(cumulative, cumulative[-1] * slots[1:-1] / n_shards, side="right")
+    bounds = np.concatenate([[0], cuts, [n_docs]]).astype(np.int64)
+    # Leave at least one document per run even when a few long documents dominate
+    return np.clip(bounds, slots, n_docs - n_shards + slots)
+
+
+class ShardPool:
+    """
+    Worker processes that each hold one contiguous run of documents of the BM25 index.
+
+    Each shard is a full index over its documents, with the coordinator's
+    term ids and, via BM25Index.with_shared_stats, the collection statistics
+    (document frequencies, live count, field lengths) of the whole corpus,
+    so every score matches the single-process index exactly.
+
+    Every worker is its own single-process executor; tasks run in the order
+    they are submitted, so a search never overtakes the update before it.
+    On each publish, shards whose documents changed are re-indexed (new
+    documents join the last shard) and the others only receive the new
+    statistics and tombstones. A compacted index is re-partitioned.
+    """
+
+    def __init__(self, n_shards: int):
+        self.n_shards = n_shards
+        self._executors = [ProcessPoolExecutor(max_workers=1) for _ in range(n_shards)]
+        self._corpus: Optional[TokenizedCorpus] = None
+        self._bounds: Optional[np.ndarray] = None
+
+    def publish(self, index: BM25Index, generation: int) -> "ShardedIndex":
+        """Bring every worker to this index generation and return the index that searches them."""
+        stats = index.collection_stats()
+        rebuild = [True] * self.n_shards
+        if index.corpus is self._corpus and self._bounds is not None:
+            bounds = self._bounds.copy()
+            bounds[-1] = index.n_docs
+            rebuild = [bool(hi - lo != old_hi - old_lo) for lo, hi, old_lo, old_hi
+                       in zip(bounds, bounds[1:], self._bounds, self._bounds[1:])]
+        else:
+            bounds = partition(index.doc_len, self.n_shards)
+
+        futures = []
+        for executor, lo, hi, fresh in zip(self._executors, bounds.tolist(), bounds[1:].tolist(), rebuild):
+            live = None if index.live is None else index.live[lo:hi]
+            if fresh:
+                token_ids, doc_offsets = _document_tokens(index, lo, hi)
+                futures.append(executor.submit(
+                    _load_shard, generation, type(index), index._init_kwargs(), index.vocab,
+                    token_ids, doc_offsets, index.field_len[lo:hi], stats, live,
+                ))
+            else:
+                futures.append(executor.submit(_refresh_shard, generation, stats, live))
+        sizes = [future.result() for future in futures]
+        self._corpus, self._bounds = index.corpus, bounds
+        logging.info(f"Published index generation {generation} to {self.n_shards} shards "
+                     f"({sizes} documents, {sum(rebuild)} re-indexed)")
+        return ShardedIndex(self, index, bounds, generation)
+
+    def search(self, generation: int, bounds: np.ndarray, queries: List[List[str]], k: int,
+               allowed: Optional[np.ndarray]) -> List[List[Tuple[np.ndarray, np.ndarray]]]:
+        """Scatter the queries to every shard; per shard, its top-k lists with local doc ids."""
+        futures = [
+            executor.submit(_search_shard, generation, queries, k, None if allowed is None else allowed[lo:hi])
+            for executor, lo, hi in zip(self._executors, bounds.tolist(), bounds[1:].tolist())
+        ]
+        return [future.result() for future in futures]
+
+    def close(self, drain: bool = False) -> None:
+        """Stop the workers; with drain, searches already submitted still finish first."""
+        for executor in self._executors:
+            executor.shutdown(wait=False, cancel_futures=not drain)
+
+
+class ShardedIndex:
+    """
+    One index generation served by a ShardPool, with the retriever interface of BM25Index.
+
+    top_k_many sends the queries to all shards at once and merges their
+    partial top-k lists by score, ties broken by lower doc id, which gives
+    exactly the single-index ranking. The full index stays in the
+    coordinator for term lookups, updates and everything else.
+    """
+
+    def __init__(self, pool: ShardPool, index: BM25Index, bounds: np.ndarray, generation: int,
+                 allowed: Optional[np.ndarray] = None):
+        self.pool = pool
+        self.index = index
+        self.bounds = bounds
+        self.generation = generation
+        self.allowed = allowed
+
+    @property
+    def term_to_id(self) -> Dict[str, int]:
+        return self.index.term_to_id
+
+    def top_k_many(self, queries: List[List[str]], k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        if not queries:
+            return []
+        partials = self.pool.search(self.generation, self.bounds, queries, k, self.allowed)
+        results = []
+        for q in range(len(queries)):
+            docs = np.concatenate([partial[q][0] + lo for partial, lo in zip(partials, self.bounds.tolist())])
+            scores = np.concatenate([partial[q][1] for partial in partials])
+            order = np.lexsort((docs, -scores))[:k]
+            results.append((docs[order], scores[order]))
+        return results
+
+    def top_k(self, q_tokens: List[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.top_k_many([q_tokens], k)[0]
+
+    def restricted(self, allowed: np.ndarray) -> "ShardedIndex":
+        """Return a view that only ranks the documents where allowed is True."""
+        view = copy.copy(self)
+        view.allowed = allowed if self.allowed is None else self.allowed & allowed
+        return view
@@ -0,0 +1,147 @@
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Shorter tokens have too many close neighbours to correct reliably
+MIN_CORRECT_LEN = 4
+# Tokens this long or longer may be two edits away from their term, shorter ones one
+TWO_EDIT_LEN = 8
+# Trigram candidates checked by edit distance per token, best overlap first
+MAX_VERIFY = 40
+# Terms a misspelled token is replaced by; ties beyond the most frequent term mostly add noise
+MAX_CORRECTIONS = 1
+# Corrections remembered per corrector
+CACHE_SIZE = 10_000
+
+
+def max_edits(token: str) -> int:
+    return 2 if len(token) >= TWO_EDIT_LEN else 1
+
+
+def _trigrams(term: str) -> List[str]:
+    padded = f"^{term}$"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent transpositions).
+
+    Only cells within limit of the diagonal are computed, and the scan gives
+    up once the distance must exceed limit, returning limit + 1.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    prev2: List[int] = []
+    prev = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        cur = [over] * (len(b) + 1)
+        if i <= limit:
+            cur[0] = i
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, prev2[j - 2] + 1)
+            cur[j] = min(value, over)
+        if min(cur) > limit:
+            return over
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class SpellCorrector:
+    """
+    Maps query tokens missing from the vocabulary to the nearest vocabulary terms.
+
+    Terms are indexed by their trigrams (with ^ and $ marking the ends), as
+    one array of term numbers sorted by trigram. A token's candidates are
+    the terms sharing enough of its trigrams: one edit (an adjacent
+    transposition counts as one) changes at most four of them, so a term
+    within d edits shares all but 4d of the token's trigrams. Only the
+    best-overlapping few are checked with a bounded edit distance, and the
+    answers are cached, so a lookup costs well under a millisecond.
+
+    Terms are kept as strings, so the corrector stays valid when the index
+    renumbers its vocabulary; callers check suggestions against their own.
+    """
+
+    def __init__(self, terms: List[str]):
+        self.terms = list(terms)
+        self._known = set(self.terms)
+        gram_of: Dict[str, int] = {}
+        grams, owners = [], []
+        for i, term in enumerate(self.terms):
+            for gram in set(_trigrams(term)):
+                grams.append(gram_of.setdefault(gram, len(gram_of)))
+                owners.append(i)
+        self._gram_of = gram_of
+        grams = np.asarray(grams, dtype=np.int64)
+        order = np.argsort(grams, kind="stable")
+        self._owners = np.asarray(owners, dtype=np.int32)[order]
+        self._gram_ptr = np.zeros(len(gram_of) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(grams, minlength=len(gram_of)), out=self._gram_ptr[1:])
+        self._lengths = np.fromiter((len(term) for term in self.terms), dtype=np.int32, count=len(self.terms))
+        self._cache: Dict[str, List[Tuple[str, int]]] = {}
+
+    def extended(self, vocab: List[str]) -> "SpellCorrector":
+        """A corrector that also knows the terms of vocab it has not seen yet."""
+        added = [term for term in vocab if term not in self._known]
+        return SpellCorrector(self.terms + added) if added else self
+
+    def suggestions(self, token: str) -> List[Tuple[str, int]]:
+        """Vocabulary terms within max_edits(token), as (term, edits), closest first."""
+        cached = self._cache.get(token)
+        if cached is not None:
+            return cached
+        if len(self._cache) >= CACHE_SIZE:
+            self._cache.clear()
+        self._cache[token] = found = self._suggestions(token)
+        return found
+
+    def _suggestions(self, token: str) -> List[Tuple[str, int]]:
+        limit = max_edits(token)
+        token_grams = set(_trigrams(token))
+        grams = [self._gram_of[g] for g in token_grams if g in self._gram_of]
+        if not grams:
+            return []
+        owners = np.concatenate([self._owners[self._gram_ptr[g]:self._gram_ptr[g + 1]] for g in grams])
+        terms, shared = np.unique(owners, return_counts=True)
+        close = (shared >= len(token_grams) - 4 * limit) & (np.abs(self._lengths[terms] - len(token)) <= limit)
+        terms, shared = terms[close], shared[close]
+        best = terms[np.argsort(-shared, kind="stable")[:MAX_VERIFY]]
+        found = []
+        for term in (self.terms[t] for t in best.tolist()):
+            edits = edit_distance(token, term, limit)
+            if edits <= limit:
+                found.append((term, edits))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def correct(self, token: str, df: Callable[[str], int]) -> List[Tuple[str, int]]:
+        """
+        The closest terms to a misspelled token that occur in documents.
+
+        Args:
+            token: A query token missing from the vocabulary
+            df: Document frequency of a term in the current index (0 if absent)
+
+        Returns:
+            Up to MAX_CORRECTIONS (term, edits) pairs at the smallest distance,
+            those sharing the most trigrams with the token first, then the most frequent
+        """
+        if len(token) < MIN_CORRECT_LEN:
+            return []
+        found = [(term, edits, df(term)) for term, edits in self.suggestions(token)]
+        found = [item for item in found if item[2] > 0]
+        if not found:
+            return []
+        nearest = min(edits for _, edits, _ in found)
+        # An edit that keeps more of the token's trigrams (a dropped letter in
+        # "planer" -> "planner") beats one that rewrites the middle ("player")
+        token_grams = set(_trigrams(token))
+        found = sorted(
+            (item for item in found if item[1] == nearest),
+            key=lambda item: (-len(token_grams.intersection(_trigrams(item[0]))), -item[2], item[0]),
+        )
+        return [(term, edits) for term, edits, _ in found[:MAX_CORRECTIONS]]
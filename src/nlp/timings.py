@@ -0,0 +1,179 @@
+import json
+import logging
+import math
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+# Histogram buckets grow by 2^(1/4) (~19%) from 1 microsecond; 108 buckets reach ~2 minutes
+_MIN_SECONDS = 1e-6
+_BUCKETS_PER_DOUBLING = 4
+_N_BUCKETS = 108
+_NULL = nullcontext()
+
+TimingHook = Callable[[Dict[str, Any]], None]
+
+
+class StageStats(NamedTuple):
+    count: int
+    total_ms: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+class LatencyHistogram:
+    """
+    Fixed log-spaced histogram of durations.
+
+    Recording is O(1) and memory is constant however many samples arrive;
+    percentiles are read off the bucket bounds, so they are accurate to
+    one bucket (about 19%) and never above the largest sample.
+    """
+
+    def __init__(self):
+        self.counts = [0] * _N_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        if seconds <= _MIN_SECONDS:
+            bucket = 0
+        else:
+            bucket = min(int(math.log2(seconds / _MIN_SECONDS) * _BUCKETS_PER_DOUBLING) + 1, _N_BUCKETS - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound (seconds) of the bucket holding the q-th percentile sample."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(_MIN_SECONDS * 2 ** (bucket / _BUCKETS_PER_DOUBLING), self.max)
+        return self.max
+
+    def stats(self) -> StageStats:
+        ms = 1000.0
+        return StageStats(
+            self.count,
+            self.total * ms,
+            self.total / self.count * ms if self.count else 0.0,
+            self.percentile(50) * ms,
+            self.percentile(95) * ms,
+            self.percentile(99) * ms,
+            self.max * ms,
+        )
+
+
+class _Span:
+    """One timed block; a plain class is several times cheaper than a generator context manager."""
+    __slots__ = ("timer", "stage", "fields", "start")
+
+    def __init__(self, timer: "StageTimer", stage: str, fields: Dict[str, Any]):
+        self.timer = timer
+        self.stage = stage
+        self.fields = fields
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.timer.record(self.stage, time.perf_counter() - self.start, **self.fields)
+
+
+class StageTimer:
+    """
+    Per-stage latency histograms with an optional hook for structured logs.
+
+    When disabled, time() hands back one shared no-op context manager and
+    timed_iter() returns its argument, so instrumented code pays a method
+    call and nothing else.
+    """
+
+    def __init__(self, enabled: bool = False, hook: Optional[TimingHook] = None):
+        self.enabled = enabled
+        self.hook = hook
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, **fields: Any) -> None:
+        with self._lock:
+            hist = self._histograms.get(stage)
+            if hist is None:
+                hist = self._histograms[stage] = LatencyHistogram()
+            hist.record(seconds)
+        if self.hook is not None:
+            try:
+                self.hook({"stage": stage, "duration_ms": round(seconds * 1000, 3), **fields})
+            except Exception as e:
+                # A broken log sink must never fail a search
+                logging.warning(f"Timing hook failed: {e}")
+
+    def time(self, stage: str, **fields: Any):
+        """Context manager that records the duration of its block under stage."""
+        if not self.enabled:
+            return _NULL
+        return _Span(self, stage, fields)
+
+    def timed_iter(self, stage: str, items: Iterable) -> Iterable:
+        """Yield from items, recording the time spent producing them as one sample."""
+        if not self.enabled:
+            return items
+        return self._timed_iter(stage, items)
+
+    def _timed_iter(self, stage: str, items: Iterable) -> Iterator:
+        spent = 0.0
+        it = iter(items)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    spent += time.perf_counter() - start
+                    break
+                spent += time.perf_counter() - start
+                yield item
+        finally:
+            self.record(stage, spent)
+
+    def stats(self) -> Dict[str, StageStats]:
+        with self._lock:
+            return {stage: hist.stats() for stage, hist in self._histograms.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+def json_log_hook(logger: Optional[logging.Logger] = None, level: int = logging.INFO) -> TimingHook:
+    """A timing hook that writes each event as one JSON line, e.g. for a log shipper."""
+    logger = logger or logging.getLogger("StartupRelevancyMatcher.timings")
+
+    def hook(event: Dict[str, Any]) -> None:
+        logger.log(level, json.dumps(event, sort_keys=True))
+    return hook
+
+
+def format_stats(stats: Dict[str, StageStats], stages: Optional[List[str]] = None) -> str:
+    """Render stage statistics as a fixed-width table."""
+    lines = [f"{'stage':<12} {'count':>7} {'total ms':>10} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"]
+    for stage in stages or sorted(stats):
+        if stage not in stats:
+            continue
+        s = stats[stage]
+        lines.append(
+            f"{stage:<12} {s.count:>7} {s.total_ms:>10.1f} {s.mean_ms:>8.3f} "
+            f"{s.p50_ms:>8.3f} {s.p95_ms:>8.3f} {s.p99_ms:>8.3f} {s.max_ms:>8.3f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,113 @@
+import json
+import os
+import sys
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from nlp.relevancy_matching import StartupMatcher  # noqa: E402
+
+WORDS = (
+    "analytics platform payments invoice developer api meal planner recipe nutrition fitness tracker "
+    "workout calendar meeting notes transcript summary sales pipeline customer support ticket chat "
+    "robot warehouse inventory logistics shipping freight insurance claims health clinic patient "
+    "doctor pharmacy education course student teacher language tutor music playlist podcast video "
+    "editing camera photo design prototype marketing campaign email newsletter hiring recruiting "
+    "resume interview payroll accounting tax compliance security password identity cloud database "
+    "search index monitoring alert incident energy solar battery climate carbon farming crop drone "
+    "travel booking hotel restaurant delivery grocery fashion retail marketplace crypto wallet"
+).split()
+YC_BATCHES = ("W21", "S22", "W24")
+PH_PERIODS = ("2023/05", "2024/01")
+
+
+def _text(rng: np.random.Generator, n: int) -> str:
+    return " ".join(rng.choice(WORDS, n))
+
+
+def make_corpus(seed: int = 7, n_yc: int = 60, n_ph: int = 90) -> Dict[str, List[Dict[str, Any]]]:
+    """A small deterministic corpus: YC companies, and Product Hunt launches per month."""
+    rng = np.random.default_rng(seed)
+    yc = [{
+        "url": f"https://yc.example/{i}",
+        "title": f"{rng.choice(WORDS).title()}{i}",
+        "blurb": _text(rng, 6),
+        "description": _text(rng, 30),
+    } for i in range(n_yc)]
+    ph: Dict[str, List[Dict[str, Any]]] = {period: [] for period in PH_PERIODS}
+    for i in range(n_ph):
+        period = PH_PERIODS[i % len(PH_PERIODS)]
+        record = {
+            "url": f"https://ph.example/{i}",
+            "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}",
+            "blurb": _text(rng, 6),
+            "description": _text(rng, 25),
+            "source": "producthunt",
+            "period": period,
+        }
+        if i % 3:
+            record["votes"] = int(rng.integers(0, 3000))
+        if i < 5:
+            # Product Hunt launches of YC companies: near-duplicate records
+            record["description"] = yc[i]["description"]
+            record["blurb"] = yc[i]["blurb"]
+        ph[period].append(record)
+    return {"yc": yc, "ph": ph}
+
+
+def write_corpus(data_dir: str, corpus: Dict[str, Any]) -> str:
+    """Lay the corpus out like data/: company_details.json, YYYY_MM.json and batch_urls/."""
+    os.makedirs(os.path.join(data_dir, "batch_urls"), exist_ok=True)
+    with open(os.path.join(data_dir, "company_details.json"), "w", encoding="utf-8") as f:
+        json.dump(corpus["yc"], f)
+    for period, records in corpus["ph"].items():
+        with open(os.path.join(data_dir, period.replace("/", "_") + ".json"), "w", encoding="utf-8") as f:
+            json.dump(records, f)
+    for i, batch in enumerate(YC_BATCHES):
+        urls = [record["url"] for record in corpus["yc"][i::len(YC_BATCHES)]]
+        with open(os.path.join(data_dir, "batch_urls", f"{batch}_urls.json"), "w", encoding="utf-8") as f:
+            json.dump(urls, f)
+    return os.path.join(data_dir, "company_details.json")
+
+
+@pytest.fixture
+def corpus() -> Dict[str, Any]:
+    return make_corpus()
+
+
+@pytest.fixture
+def yc_path(tmp_path, corpus) -> str:
+    return write_corpus(str(tmp_path / "data"), corpus)
+
+
+@pytest.fixture
+def make_matcher(yc_path):
+    """Build matchers over the synthetic corpus; each is closed after the test."""
+    matchers = []
+
+    def make(**kwargs) -> StartupMatcher:
+        kwargs.setdefault("build_workers", 1)
+        kwargs.setdefault("yc_data_path", yc_path)
+        matcher = StartupMatcher(**kwargs)
+        matchers.append(matcher)
+        return matcher
+
+    yield make
+    for matcher in matchers:
+        matcher.close()
+
+
+QUERIES = [
+    "payments api for developers",
+    "meal planner recipe nutrition",
+    "meeting notes transcript summary",
+    "warehouse robot inventory",
+    "solar battery energy climate",
+    "hiring recruiting resume interview payroll",
+    "crypto wallet marketplace",
+    "podcast",
+    "unknownword",
+]
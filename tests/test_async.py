@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from conftest import QUERIES
+
+
+def _slowed(matcher, started: threading.Event, release: threading.Event):
+    """Make match_many wait for release; returns the list of query batches it was called with."""
+    calls = []
+    match_many = matcher.match_many
+
+    def slow(queries, *args, **kwargs):
+        calls.append(list(queries))
+        started.set()
+        release.wait(5)
+        return match_many(queries, *args, **kwargs)
+
+    matcher.match_many = slow
+    return calls
+
+
+def test_amatch_matches_match(make_matcher):
+    matcher = make_matcher()
+
+    async def run():
+        single = [await matcher.amatch(query, 5) for query in QUERIES]
+        many = await matcher.amatch_many(QUERIES, 5, filters={"source": "yc"})
+        return single, many
+
+    single, many = asyncio.run(run())
+    assert single == [matcher.match(query, 5) for query in QUERIES]
+    assert many == matcher.match_many(QUERIES, 5, filters={"source": "yc"})
+
+
+def test_timeout_leaves_the_pool_usable(make_matcher):
+    matcher = make_matcher(search_workers=1)
+    started, release = threading.Event(), threading.Event()
+    calls = _slowed(matcher, started, release)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await matcher.amatch("meal planner", timeout=0.05)
+        assert started.is_set()
+        release.set()
+        result = await matcher.amatch("meal planner", timeout=5)
+        assert len(calls) == 2
+        return result
+
+    assert asyncio.run(run()) == matcher.match("meal planner")
+
+
+def test_cancelled_queued_search_is_skipped(make_matcher):
+    matcher = make_matcher(search_workers=1)
+    started, release = threading.Event(), threading.Event()
+    calls = _slowed(matcher, started, release)
+
+    async def run():
+        running = asyncio.ensure_future(matcher.amatch("meal planner"))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(matcher.amatch("podcast"))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        release.set()
+        result = await running
+        # The cancelled search never ran, and the single search thread is free again
+        assert calls == [["meal planner"]]
+        assert await matcher.amatch("podcast", timeout=5) == matcher.match("podcast")
+        return result
+
+    assert asyncio.run(run()) == matcher.match("meal planner")
+
+
+def test_cancel_flag_stops_a_search_before_it_runs(make_matcher):
+    matcher = make_matcher()
+    started, release = threading.Event(), threading.Event()
+    calls = _slowed(matcher, started, release)
+    cancelled = threading.Event()
+    cancelled.set()
+    with pytest.raises(CancelledError):
+        matcher._run_search(cancelled, time.perf_counter(), ["meal planner"], 5)
+    assert calls == []
+
+
+def test_cancel_flag_stops_a_running_search_at_a_stage_boundary(make_matcher):
+    matcher = make_matcher()
+    cancelled = threading.Event()
+    correct = matcher._corrected
+
+    def cancel_then_correct(state, queries):
+        cancelled.set()
+        return correct(state, queries)
+
+    matcher._corrected = cancel_then_correct
+    with pytest.raises(CancelledError):
+        matcher._run_search(cancelled, time.perf_counter(), ["meal planner"], 5)
+    # The flag is per search: a direct call on the same thread still runs
+    assert matcher.match("meal planner")
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from conftest import WORDS
+from nlp.autocomplete import KEY_BYTES, MAX_WORD_STARTS, TitleCompleter, normalize_title
+
+TITLES = ["Meal Planner", "meal-planner pro", "Mealtime", "Notion Meal Planner", "Recipe Box",
+          "MEAL planner", "Übersicht Café", "Planner"]
+
+
+def _reference(titles, prior, prefix, k):
+    """Brute force: title starts first, then prior, shorter title, lower doc id; one doc per title."""
+    norm = normalize_title(prefix)
+    if norm and not prefix[-1].isalnum():
+        norm += " "
+    hits = []
+    for doc, title in enumerate(titles):
+        words = normalize_title(title)
+        starts = [0] + [i + 1 for i, c in enumerate(words) if c == " "][:MAX_WORD_STARTS - 1]
+        matched = [s for s in starts if words.startswith(norm, s)]
+        if norm and words and matched:
+            hits.append((-(min(matched) == 0), -prior[doc], len(words), doc, words))
+    out, seen = [], set()
+    for *_, doc, words in sorted(hits):
+        if words not in seen:
+            seen.add(words)
+            out.append(doc)
+    return out[:k]
+
+
+def test_short_prefixes_and_case_folding():
+    completer = TitleCompleter(TITLES, np.arange(len(TITLES), dtype=float))
+    # Case and punctuation are folded, so "MEAL planner" and "Meal Planner" are one title
+    assert completer.complete("meal", 10) == [5, 2, 1, 3]
+    assert completer.complete("MeAl", 10) == completer.complete("meal", 10)
+    assert completer.complete("meal ", 10) == [5, 1, 3]
+    assert completer.complete("meal-PL", 10) == [5, 1, 3]
+    assert completer.complete("plan", 10) == [7, 5, 3, 1]
+    assert completer.complete("übersicht c", 10) == [6]
+    assert completer.complete("ÜBERSICHT", 10) == [6]
+    assert completer.complete("meal", 2) == [5, 2]
+
+
+@pytest.mark.parametrize("prefix", ["", " ", "--", "zzz"])
+def test_empty_or_unknown_prefix(prefix):
+    completer = TitleCompleter(TITLES, np.zeros(len(TITLES)))
+    assert completer.complete(prefix, 5) == []
+
+
+def test_long_prefix_is_checked_before_ranking():
+    stem = "analytics platform for payments "
+    assert len(stem.encode("utf-8")) == KEY_BYTES
+    # Higher-prior titles share the first KEY_BYTES bytes but not the whole prefix
+    decoys = [stem + f"decoy {i}" for i in range(20)]
+    titles = decoys + [stem + "teams", stem + "teamwork"]
+    prior = np.concatenate([np.full(len(decoys), 100.0), [1.0, 2.0]])
+    completer = TitleCompleter(titles, prior)
+    assert completer.complete(stem + "team", 1) == [21]
+    assert completer.complete(stem + "team", 5) == [21, 20]
+    assert completer.complete(stem + "TEAMS", 5) == [20]
+    assert completer.complete(stem + "nothing", 5) == []
+    assert len(completer.complete(stem, 100)) == len(titles)
+
+
+def test_matches_brute_force():
+    rng = np.random.default_rng(11)
+    titles = [" ".join(rng.choice(WORDS, rng.integers(1, 9))).title() for _ in range(400)]
+    titles += [titles[i].upper() for i in range(0, 400, 40)]
+    prior = rng.integers(0, 5, len(titles)).astype(float)
+    completer = TitleCompleter(titles, prior)
+    prefixes = [t[:n] for t in titles[::7] for n in (1, 3, 12, KEY_BYTES - 1, KEY_BYTES + 5, len(t))]
+    prefixes += [t.split(" ", 1)[-1][:n] for t in titles[::9] for n in (2, 6, KEY_BYTES + 3)]
+    for prefix in prefixes:
+        for k in (1, 3, 10):
+            assert completer.complete(prefix, k) == _reference(titles, prior, prefix, k), prefix
@@ -0,0 +1,99 @@
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+from nlp.bm25_index import BM25FIndex, BM25Index, SparseBM25FIndex, SparseBM25Index, concat_ranges
+from nlp.index_cache import TokenizedCorpus
+
+TERMS = [f"t{i}" for i in range(40)]
+
+
+def test_concat_ranges():
+    starts = np.array([5, 0, 9, 2])
+    lengths = np.array([2, 0, 3, 1])
+    assert concat_ranges(starts, lengths).tolist() == [5, 6, 9, 10, 11, 2]
+    assert concat_ranges(np.zeros(0), np.zeros(0)).tolist() == []
+
+
+def random_docs(seed: int = 3, n_docs: int = 200):
+    rng = np.random.default_rng(seed)
+    # Zipf-like term choice, so a few terms are in most documents and get a negative idf
+    p = 1.0 / np.arange(1, len(TERMS) + 1)
+    p /= p.sum()
+    return [rng.choice(TERMS, size=rng.integers(1, 25), p=p).tolist() for _ in range(n_docs)]
+
+
+def random_queries(seed: int = 5, n: int = 40):
+    rng = np.random.default_rng(seed)
+    queries = [rng.choice(TERMS, size=rng.integers(1, 5)).tolist() for _ in range(n)]
+    return queries + [["t0"], ["t1", "t1", "t30"], ["missing"], ["t5", "missing"]]
+
+
+def assert_ranks_like(docs, scores, reference, k):
+    """docs/scores are a correct top k of the reference scores, ties in any order."""
+    expected = np.sort(reference)[::-1][:k]
+    np.testing.assert_allclose(scores, expected, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(reference[docs], scores, rtol=1e-9, atol=1e-9)
+    assert len(set(docs.tolist())) == len(docs)
+
+
+def test_inverted_matches_rank_bm25():
+    docs = random_docs()
+    index = BM25Index(TokenizedCorpus.from_token_lists(docs))
+    okapi = BM25Okapi(docs)
+    for query in random_queries():
+        reference = okapi.get_scores(query)
+        np.testing.assert_allclose(index.get_scores(query), reference, rtol=1e-9, atol=1e-9)
+        for k in (1, 5, 20):
+            assert_ranks_like(*index.top_k(query, k), reference, k)
+
+
+def test_sparse_matches_rank_bm25():
+    docs = random_docs()
+    index = SparseBM25Index(TokenizedCorpus.from_token_lists(docs))
+    okapi = BM25Okapi(docs)
+    queries = random_queries()
+    for k in (1, 5, 20):
+        for query, (top_docs, scores) in zip(queries, index.top_k_many(queries, k)):
+            reference = okapi.get_scores(query)
+            np.testing.assert_allclose(index.get_scores(query), reference, rtol=1e-9, atol=1e-9)
+            assert_ranks_like(top_docs, scores, reference, k)
+
+
+def bm25f_reference(field_docs, query, weights, field_b, k1=1.5):
+    """Simple BM25F scored term by term in Python, with rank_bm25's idf."""
+    okapi = BM25Okapi([sum(fields, []) for fields in field_docs])
+    field_len = np.array([[len(tokens) for tokens in fields] for fields in field_docs], dtype=np.float64)
+    avg_len = field_len.mean(axis=0)
+    scores = np.zeros(len(field_docs))
+    for d, fields in enumerate(field_docs):
+        norm = (1 - field_b) + field_b * field_len[d] / avg_len
+        for term in query:
+            tf = sum(w * tokens.count(term) / n for tokens, w, n in zip(fields, weights, norm))
+            if tf:
+                scores[d] += okapi.idf[term] * tf * (k1 + 1) / (tf + k1)
+    return scores
+
+
+def test_bm25f_with_one_field_matches_rank_bm25():
+    docs = random_docs()
+    okapi = BM25Okapi(docs)
+    for cls in (BM25FIndex, SparseBM25FIndex):
+        index = cls(TokenizedCorpus.from_token_lists(docs))
+        for query in random_queries():
+            reference = okapi.get_scores(query)
+            np.testing.assert_allclose(index.get_scores(query), reference, rtol=1e-9, atol=1e-9)
+            assert_ranks_like(*index.top_k(query, 10), reference, 10)
+
+
+def test_bm25f_matches_reference():
+    rng = np.random.default_rng(11)
+    bodies = random_docs()
+    field_docs = [[rng.choice(TERMS[:15], size=rng.integers(1, 4)).tolist(), body] for body in bodies]
+    weights, field_b = [3.0, 1.0], [0.5, 0.8]
+    corpus = TokenizedCorpus.from_field_token_lists(field_docs)
+    for cls in (BM25FIndex, SparseBM25FIndex):
+        index = cls(corpus, field_weights=weights, field_b=field_b)
+        for query in random_queries()[:20]:
+            reference = bm25f_reference(field_docs, query, weights, np.array(field_b))
+            np.testing.assert_allclose(index.get_scores(query), reference, rtol=1e-9, atol=1e-9)
+            assert_ranks_like(*index.top_k(query, 10), reference, 10)
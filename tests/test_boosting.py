@@ -0,0 +1,66 @@
+import numpy as np
+
+from nlp.bm25_index import BM25Index
+from nlp.index_cache import TokenizedCorpus
+from nlp.positional_index import PHRASE_CANDIDATES, PhraseBoostIndex, PositionalIndex
+from nlp.priors import PRIOR_CANDIDATES, PriorBoostIndex
+
+
+class CountingIndex:
+    """Wraps an index and records the k of every top_k_many call."""
+
+    def __init__(self, index):
+        self.index = index
+        self.calls = []
+
+    @property
+    def term_to_id(self):
+        return self.index.term_to_id
+
+    def top_k_many(self, queries, k):
+        if queries:
+            self.calls.append(k)
+        return self.index.top_k_many(queries, k)
+
+
+def _boosted(n_docs=PHRASE_CANDIDATES * 5):
+    docs = [["meal", "planner", "recipe"], ["planner", "for", "meal"], ["meal", "kit"]]
+    docs += [["filler", f"word{i}"] for i in range(n_docs - len(docs))]
+    index = BM25Index(TokenizedCorpus.from_token_lists(docs))
+    counting = CountingIndex(index)
+    return index, counting, PhraseBoostIndex(counting, PositionalIndex.from_index(index), weight=1.0)
+
+
+def test_few_matches_need_one_fetch():
+    index, counting, boosted = _boosted()
+    docs, scores = boosted.top_k(["meal", "planner"], 10)
+    assert counting.calls == [PHRASE_CANDIDATES]
+    assert docs[0] == 0 and len(docs) == 10
+    assert np.all(scores[3:] == 0)
+
+
+def test_matches_exhaustive_boost():
+    index, counting, boosted = _boosted()
+    q = ["meal", "planner"]
+    all_docs = np.arange(index.n_docs)
+    q_ids = [index.term_to_id[t] for t in q]
+    exact = index.exact_scores(q_ids, all_docs) * (1.0 + boosted.positions.proximity(q_ids, all_docs))
+    order = np.lexsort((all_docs, -exact))[:5]
+    docs, scores = boosted.top_k(q, 5)
+    assert docs.tolist() == all_docs[order].tolist()
+    np.testing.assert_allclose(scores, exact[order])
+
+
+def test_prior_boost_matches_exhaustive():
+    index, counting, _ = _boosted()
+    boost = np.linspace(0.0, 2.0, index.n_docs)
+    boosted = PriorBoostIndex(counting, boost)
+    q = ["meal", "planner", "word7"]
+    all_docs = np.arange(index.n_docs)
+    q_ids = [index.term_to_id[t] for t in q]
+    exact = index.exact_scores(q_ids, all_docs) * (1.0 + boost)
+    order = np.lexsort((all_docs, -exact))[:10]
+    docs, scores = boosted.top_k(q, 10)
+    assert docs.tolist() == all_docs[order].tolist()
+    np.testing.assert_allclose(scores, exact[order])
+    assert counting.calls == [PRIOR_CANDIDATES]
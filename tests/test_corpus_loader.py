@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from nlp.corpus_loader import iter_json_array
+
+RECORDS = [
+    {"name": "Café über 東京", "emoji": "\U0001f680 launch", "url": "https://x.io/a"},
+    {"quote": "say \"hi\"\n\\ back\\", "unicode": "\\u00e9 stays escaped"},
+    {"nested": {"tags": ["a", {"deep": [1, 2.5, None, True]}], "empty": {}}, "list": []},
+    [],
+    "plain string",
+    12345,
+    -0.25e3,
+    None,
+]
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "data.json"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64])
+def test_elements_split_across_chunks(tmp_path, indent, chunk_size):
+    # ensure_ascii=False keeps multi-byte characters in the file next to
+    # escapes, so tiny chunks cut through both
+    text = json.dumps(RECORDS, indent=indent, ensure_ascii=False)
+    path = _write(tmp_path, text)
+    assert list(iter_json_array(path, chunk_size=chunk_size)) == RECORDS
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("[]", []),
+    (" \n[ ]\n", []),
+    ("[1]", [1]),
+    ('[ "a" , {"b": [1, 2]} ]', ["a", {"b": [1, 2]}]),
+])
+def test_small_arrays(tmp_path, text, expected):
+    for chunk_size in (1, 4, 1 << 16):
+        assert list(iter_json_array(_write(tmp_path, text), chunk_size=chunk_size)) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "{}",
+    '"[1]"',
+    "[1,,2]",
+    "[,1]",
+    "[1,]",
+    "[1, 2,]",
+    "[,]",
+    "[1 2]",
+    '[{"a": 1} {"b": 2}]',
+    "[1, nope]",
+    '[{"a": }]',
+])
+def test_malformed_arrays_raise(tmp_path, text):
+    for chunk_size in (1, 3, 1 << 16):
+        with pytest.raises(ValueError):
+            list(iter_json_array(_write(tmp_path, text), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize("cut", [1, 2, 10, -30, -2, -1])
+def test_truncated_arrays_raise(tmp_path, cut):
+    text = json.dumps(RECORDS, ensure_ascii=False)
+    path = _write(tmp_path, text[:cut])
+    for chunk_size in (1, 7, 1 << 16):
+        with pytest.raises(ValueError):
+            list(iter_json_array(path, chunk_size=chunk_size))
+
+
+def test_elements_before_an_error_are_yielded(tmp_path):
+    elements = iter_json_array(_write(tmp_path, '[{"a": 1}, 2,, 3]'), chunk_size=2)
+    assert next(elements) == {"a": 1}
+    assert next(elements) == 2
+    with pytest.raises(ValueError):
+        next(elements)
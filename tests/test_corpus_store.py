@@ -0,0 +1,47 @@
+import glob
+import json
+import os
+import pickle
+
+from nlp.corpus_store import STORE_PREFIX, CompanyRecord, CorpusStore
+
+
+def _records(matcher):
+    return [matcher.companies.materialize(doc) for doc in range(len(matcher.companies))]
+
+
+def test_store_load_matches_build(make_matcher, corpus):
+    built = make_matcher()
+    assert len(built.companies) == len(corpus["yc"]) + sum(len(r) for r in corpus["ph"].values())
+    loaded = make_matcher()
+    assert _records(loaded) == _records(built)
+    assert loaded.companies.get_field(0, "batch") in ("W21", "S22", "W24")
+
+
+def test_corrupt_store_is_rebuilt(make_matcher):
+    built = make_matcher()
+    expected = _records(built)
+    (store,) = glob.glob(os.path.join(built.cache_dir, STORE_PREFIX + "*"))
+    for name in os.listdir(store):
+        if name.endswith(".npy"):
+            with open(os.path.join(store, name), "r+b") as f:
+                f.truncate(10)
+    assert CorpusStore.load(store) is None
+    assert _records(make_matcher()) == expected
+    assert CorpusStore.load(store) is not None
+    # Only the published store is left, no temp directories
+    assert os.listdir(built.cache_dir).count(os.path.basename(store)) == 1
+    assert not [name for name in os.listdir(built.cache_dir) if name.endswith(".tmp")]
+
+
+def test_results_are_plain_dicts(make_matcher):
+    matcher = make_matcher()
+    results = matcher.match("meal planner recipe")
+    assert results and all(type(r) is dict for r in results)
+    assert json.loads(json.dumps(results)) == results
+    assert pickle.loads(pickle.dumps(results)) == results
+    assert all(type(r) is dict for r in matcher.match_many(["meal planner", "podcast"])[1])
+
+    lazy = matcher.match("meal planner recipe", lazy=True)
+    assert all(isinstance(r, CompanyRecord) for r in lazy)
+    assert [dict(r) for r in lazy] == results
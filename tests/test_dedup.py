@@ -0,0 +1,47 @@
+from collections import defaultdict
+
+import numpy as np
+
+# PH launches 0-4 copy the blurb and description of YC companies 0-4 (see make_corpus)
+N_COPIES = 5
+
+
+def _pairs():
+    return [{f"https://yc.example/{i}", f"https://ph.example/{i}"} for i in range(N_COPIES)]
+
+
+def test_only_the_copies_are_clustered(make_matcher):
+    matcher = make_matcher()
+    canonical = matcher._state.duplicates.canonical
+    clusters = defaultdict(set)
+    for doc, root in enumerate(canonical.tolist()):
+        clusters[root].add(matcher.companies.get_field(doc, "url"))
+    merged = [urls for urls in clusters.values() if len(urls) > 1]
+    assert sorted(merged, key=sorted) == sorted(_pairs(), key=sorted)
+    assert matcher._state.duplicates.n_clusters == len(canonical) - N_COPIES
+
+
+def test_copies_collapse_to_one_result(make_matcher, corpus):
+    matcher = make_matcher()
+    pairs = _pairs()
+    for i in range(N_COPIES):
+        query = corpus["yc"][i]["description"]
+        full = [r["url"] for r in matcher.match(query, 10, fields=["url"], collapse=False)]
+        assert set(full[:2]) == pairs[i]
+        collapsed = [r["url"] for r in matcher.match(query, 10, fields=["url"])]
+        # One copy takes the best-ranked slot, the rest of the ranking moves up
+        assert collapsed[0] == full[0]
+        assert collapsed[1:9] == full[2:]
+        for pair in pairs:
+            assert len(pair & set(collapsed)) <= 1
+
+
+def test_collapse_keeps_the_best_ranked_member(make_matcher):
+    duplicates = make_matcher()._state.duplicates
+    canonical = duplicates.canonical
+    yc_doc, ph_doc = np.flatnonzero(canonical == canonical[np.flatnonzero(canonical != np.arange(len(canonical)))[0]])
+    docs = np.array([ph_doc, 7, yc_doc, 9])
+    scores = np.array([4.0, 3.0, 2.0, 1.0])
+    kept, kept_scores = duplicates.collapse(docs, scores, 3)
+    assert kept.tolist() == [ph_doc, 7, 9]
+    assert kept_scores.tolist() == [4.0, 3.0, 1.0]
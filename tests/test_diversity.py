@@ -0,0 +1,47 @@
+import numpy as np
+
+from nlp.bm25_index import BM25Index
+from nlp.diversity import TermSignatures
+from nlp.index_cache import TokenizedCorpus
+
+
+def _rows(signatures, docs):
+    return [(signatures.terms[signatures.ptr[d]:signatures.ptr[d + 1]].tolist(),
+             signatures.weights[signatures.ptr[d]:signatures.ptr[d + 1]].tolist()) for d in docs]
+
+
+def test_documents_of_zero_idf_terms_have_zero_similarity():
+    # "common" is in every document, so its idf is 0 and document 0 has no weight at all
+    index = BM25Index(TokenizedCorpus.from_token_lists(
+        [["common"], ["common", "meal", "planner"], ["common", "meal", "kit"]]))
+    similarity = TermSignatures.from_index(index).similarities(np.array([0, 1, 2]))
+    assert np.isfinite(similarity).all()
+    assert similarity[0].tolist() == [0.0, 0.0, 0.0]
+    assert 0 < similarity[1, 2] < 1
+
+
+def test_extended_signs_new_documents_like_a_rebuild():
+    index = BM25Index(TokenizedCorpus.from_token_lists([["meal", "planner"], ["meal", "kit"], ["robot"]]))
+    signatures = TermSignatures.from_index(index)
+    added = index.with_documents([[["robot", "arm", "arm"]], [["meal", "robot"]]])
+    extended = signatures.extended(added)
+    rebuilt = TermSignatures.from_index(added)
+    assert len(extended.ptr) == len(rebuilt.ptr)
+    assert _rows(extended, [0, 1, 2]) == _rows(signatures, [0, 1, 2])
+    np.testing.assert_equal(_rows(extended, [3, 4]), _rows(rebuilt, [3, 4]))
+    assert signatures.extended(added).extended(added).ptr.tolist() == extended.ptr.tolist()
+
+
+def test_signatures_follow_updates(make_matcher):
+    matcher = make_matcher(diversity=0.5)
+    signatures = matcher._state.signatures
+    assert signatures is not None
+    matcher.match("meal planner recipe", diversity=0.5)
+    assert matcher._state.signatures is signatures
+    matcher.add_documents([{"name": "Zeppelinworks", "description": "airship charter booking",
+                            "url": "https://example.com/zeppelin"}], source="yc")
+    assert len(matcher._state.signatures.ptr) - 1 == matcher.bm25.n_docs
+    matcher.compact()
+    assert len(matcher._state.signatures.ptr) - 1 == matcher.bm25.n_docs
+    results = matcher.match("airship booking", diversity=0.5, fields=["url"])
+    assert results[0]["url"] == "https://example.com/zeppelin"
@@ -0,0 +1,91 @@
+import pytest
+
+from conftest import PH_PERIODS, QUERIES, YC_BATCHES
+
+FILTERS = [
+    {"source": "yc"},
+    {"source": ["producthunt", "YC"]},
+    {"batch": "w21"},
+    {"batch": ["S22", "W24"], "source": "yc"},
+    {"period_from": "2024"},
+    {"period_to": "2023/12"},
+    {"period_from": "2023/05", "period_to": "2023/05", "min_votes": 1000},
+    {"min_votes": 500, "max_votes": 2000},
+    {"max_votes": 100},
+    {"source": "producthunt", "min_votes": 1},
+]
+
+
+def facts(corpus):
+    """Per url: (source, batch, YYYYMM period or None, votes or None), from the raw records."""
+    out = {}
+    for i, record in enumerate(corpus["yc"]):
+        out[record["url"]] = ("yc", YC_BATCHES[i % len(YC_BATCHES)], None, None)
+    for period in PH_PERIODS:
+        for record in corpus["ph"][period]:
+            out[record["url"]] = ("producthunt", None, int(period.replace("/", "")), record.get("votes"))
+    return out
+
+
+def _month(bound, last):
+    """YYYYMM of "YYYY/MM", or of the first (last) month of "YYYY"."""
+    year, _, month = str(bound).partition("/")
+    return int(year) * 100 + (int(month) if month else 12 if last else 1)
+
+
+def allowed(fact, filters):
+    source, batch, period, votes = fact
+    sources = [filters["source"]] if isinstance(filters.get("source"), str) else filters.get("source")
+    if sources is not None and source not in {s.lower() for s in sources}:
+        return False
+    batches = [filters["batch"]] if isinstance(filters.get("batch"), str) else filters.get("batch")
+    if batches is not None and (batch is None or batch not in {b.upper() for b in batches}):
+        return False
+    if "period_from" in filters or "period_to" in filters:
+        lo = _month(filters.get("period_from", "0001"), last=False)
+        hi = _month(filters.get("period_to", "9999"), last=True)
+        if period is None or not lo <= period <= hi:
+            return False
+    if "min_votes" in filters or "max_votes" in filters:
+        if votes is None or not filters.get("min_votes", 0) <= votes <= filters.get("max_votes", votes):
+            return False
+    return True
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_filtered_results_are_the_allowed_part_of_the_ranking(make_matcher, corpus, filters):
+    matcher = make_matcher(dedup=False)
+    fact = facts(corpus)
+    n_allowed = sum(allowed(f, filters) for f in fact.values())
+    assert n_allowed > 0
+    for query in QUERIES[:-1]:
+        ranking = matcher.match(query, len(fact), fields=["url"], collapse=False)
+        expected = [r["url"] for r in ranking if allowed(fact[r["url"]], filters) and r["relevance_score"] > 0]
+        got = matcher.match(query, len(fact), filters=filters, fields=["url"], collapse=False)
+        assert all(allowed(fact[r["url"]], filters) for r in got)
+        assert len(got) == n_allowed
+        assert [r["url"] for r in got if r["relevance_score"] > 0] == expected
+
+
+def test_filter_without_matches(make_matcher):
+    matcher = make_matcher()
+    assert matcher.match("meal planner", filters={"source": "yc", "min_votes": 1}) == []
+
+
+@pytest.mark.parametrize("filters", [
+    {"source": 1},
+    {"source": ["yc", None]},
+    {"source": {"yc": True}},
+    {"batch": [2021]},
+    {"batch": b"W21"},
+    {"min_votes": [1]},
+    {"max_votes": "many"},
+    {"period_from": "May 2023"},
+    {"votes": 1},
+])
+def test_malformed_filters_raise_value_error(make_matcher, filters):
+    matcher = make_matcher()
+    with pytest.raises(ValueError):
+        matcher.match("meal planner", filters=filters)
+    with pytest.raises(ValueError):
+        matcher.suggest("meal", filters=filters)
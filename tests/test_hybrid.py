@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from nlp.bm25_index import BM25Index
+from nlp.hybrid import DEFAULT_FUSION, HybridIndex, normalize_fusion
+from nlp.index_cache import TokenizedCorpus
+from nlp.semantic_index import SemanticIndex
+from test_bm25_index import random_docs
+
+# Hand-checked example: BM25 matches docs 0-2, doc 3 only comes from the semantic index
+LEXICAL = {0: 3.0, 1: 2.0, 2: 1.0}
+SIMILARITY = np.array([0.1, 0.9, 0.5, 0.95])
+
+
+class _Lexical:
+    def top_k_many(self, queries, k):
+        docs = np.array(sorted(LEXICAL, key=LEXICAL.get, reverse=True) + [3])[:k]
+        return [(docs, np.array([LEXICAL.get(d, 0.0) for d in docs.tolist()])) for _ in queries]
+
+
+class _Semantic:
+    def __init__(self):
+        self.calls = []
+
+    def top_k(self, q_tokens, k):
+        self.calls.append(k)
+        docs = np.argsort(-SIMILARITY, kind="stable")[:k]
+        return docs, SIMILARITY[docs]
+
+    def similarities(self, q_tokens, docs):
+        return SIMILARITY[docs]
+
+
+def _hybrid(**fusion):
+    return HybridIndex(_Lexical(), _Semantic(), normalize_fusion(fusion))
+
+
+def test_rrf_fusion():
+    # rrf_k=1, equal weights: lexical ranks 0,1,2 and semantic ranks 1,2,0 give
+    # doc0 (1/2 + 1/4) / 2, doc1 (1/3 + 1/2) / 2, doc2 (1/4 + 1/3) / 2
+    docs, scores = _hybrid(method="rrf", rrf_k=1).top_k(["q"], 3)
+    assert docs.tolist() == [1, 0, 2]
+    np.testing.assert_allclose(scores, [5 / 12, 3 / 8, 7 / 24])
+
+
+def test_weighted_fusion():
+    # Max-normalized: lexical 1, 2/3, 1/3; semantic 1/9, 1, 5/9
+    docs, scores = _hybrid(method="weighted", semantic_weight=0.2).top_k(["q"], 3)
+    assert docs.tolist() == [0, 1, 2]
+    np.testing.assert_allclose(scores, [0.8 + 0.2 / 9, 0.8 * 2 / 3 + 0.2, 0.8 / 3 + 0.2 * 5 / 9])
+    # All weight on similarity follows the semantic order; none follows BM25
+    assert _hybrid(method="weighted", semantic_weight=1.0).top_k(["q"], 3)[0].tolist() == [1, 2, 0]
+    assert _hybrid(method="weighted", semantic_weight=0.0).top_k(["q"], 3)[0].tolist() == [0, 1, 2]
+
+
+def test_semantic_backfill_when_bm25_matches_fewer_than_k():
+    hybrid = _hybrid(method="rrf", rrf_k=1)
+    docs, scores = hybrid.top_k(["q"], 4)
+    assert hybrid.semantic.calls == [4]
+    # Semantic ranks over all four: 3, 1, 2, 0. Doc 3 has no lexical part, and ties with doc 2
+    assert docs.tolist() == [0, 1, 2, 3]
+    np.testing.assert_allclose(scores, [(1 / 2 + 1 / 5) / 2, 1 / 3, 1 / 4, 1 / 4])
+    # Enough BM25 matches: the semantic index is only asked for similarities
+    hybrid.top_k(["q"], 3)
+    assert hybrid.semantic.calls == [4]
+
+
+def test_query_bm25_cannot_match_follows_the_semantic_index():
+    class Unmatched(_Lexical):
+        def top_k_many(self, queries, k):
+            # BM25 pads an out-of-vocabulary query's results with zero scores
+            return [(np.arange(min(k, 4)), np.zeros(min(k, 4))) for _ in queries]
+
+    for method in ("rrf", "weighted"):
+        hybrid = HybridIndex(Unmatched(), _Semantic(), normalize_fusion({"method": method}))
+        docs, scores = hybrid.top_k(["unknownword"], 3)
+        assert docs.tolist() == [3, 1, 2]
+        assert np.all(scores > 0)
+
+
+def test_backfill_with_real_indexes():
+    index = BM25Index(TokenizedCorpus.from_token_lists(random_docs()))
+    semantic = SemanticIndex.build(index, dim=16)
+    hybrid = HybridIndex(index, semantic, normalize_fusion(None))
+    query = ["t39"]
+    matched = set(np.flatnonzero(index.get_scores(query) > 0).tolist())
+    assert 0 < len(matched) < 20
+    docs, scores = hybrid.top_k(query, 20)
+    assert len(set(docs.tolist())) == 20
+    # Under RRF every BM25 match outranks every document that only the semantic index found
+    assert set(docs[:len(matched)].tolist()) == matched
+    assert np.all(np.diff(scores) <= 0)
+    # Terms neither index knows give no results rather than padding
+    assert [d.tolist() for d in hybrid.top_k(["missing"], 5)] == [[], []]
+
+
+@pytest.mark.parametrize("fusion", [{"method": "max"}, {"semantic_weight": 1.5}, {"candidates": 0}, {"rrf": 60}])
+def test_invalid_fusion_settings(fusion):
+    with pytest.raises(ValueError):
+        normalize_fusion(fusion)
+    assert dict(normalize_fusion(None)) == DEFAULT_FUSION
@@ -0,0 +1,41 @@
+import numpy as np
+
+from nlp.bm25_index import BM25Index
+from nlp.impact_index import ImpactIndex
+from nlp.index_cache import TokenizedCorpus
+
+
+def _index(n_docs=300):
+    # Every document has "common", repeated a varying number of times, so its impacts spread out
+    docs = [["common"] * (1 + i % 7) + [f"word{i % 13}"] * (1 + i % 3) for i in range(n_docs)]
+    return BM25Index(TokenizedCorpus.from_token_lists(docs))
+
+
+def test_unfiltered_matches_exact_for_one_term():
+    index = _index()
+    docs, scores = ImpactIndex(index, budget=50).top_k(["common"], 10)
+    exact_docs, exact_scores = index.top_k(["common"], 10)
+    assert docs.tolist() == exact_docs.tolist()
+    np.testing.assert_allclose(scores, exact_scores)
+
+
+def test_filtered_recall_with_small_budget():
+    index = _index()
+    mask = np.zeros(index.n_docs, dtype=bool)
+    mask[::10] = True
+    impacts = ImpactIndex(index, budget=20).restricted(mask)
+    for query in (["common"], ["common", "word3"]):
+        docs, scores = impacts.top_k(query, 5)
+        exact_docs, exact_scores = index.restricted(mask).top_k(query, 5)
+        assert mask[docs].all()
+        assert docs.tolist() == exact_docs.tolist()
+        np.testing.assert_allclose(scores, exact_scores)
+
+
+def test_filter_with_few_matches_falls_back_to_exact():
+    index = _index()
+    mask = np.zeros(index.n_docs, dtype=bool)
+    mask[[3, 150]] = True
+    docs, scores = ImpactIndex(index, budget=5).restricted(mask).top_k(["common"], 5)
+    assert sorted(docs.tolist()) == [3, 150]
+    assert (scores > 0).all()
@@ -0,0 +1,62 @@
+import glob
+import os
+
+import numpy as np
+
+from conftest import QUERIES
+import nlp.relevancy_matching as relevancy_matching
+from nlp.index_cache import SNAPSHOT_PREFIX, load_arrays, save_arrays
+
+
+def _urls(matcher):
+    return [[r["url"] for r in results] for results in matcher.match_many(QUERIES, 5)]
+
+
+def test_snapshot_load_matches_build(make_matcher):
+    built = make_matcher()
+    snapshots = glob.glob(os.path.join(built.cache_dir, SNAPSHOT_PREFIX + "*"))
+    assert len(snapshots) == 1
+    loaded = make_matcher()
+    assert loaded.bm25.corpus.vocab == built.bm25.corpus.vocab
+    assert np.array_equal(loaded.bm25.corpus.token_ids, built.bm25.corpus.token_ids)
+    assert _urls(loaded) == _urls(built)
+
+
+def test_corrupt_snapshot_is_rebuilt(make_matcher):
+    built = make_matcher()
+    expected = _urls(built)
+    (snapshot,) = glob.glob(os.path.join(built.cache_dir, SNAPSHOT_PREFIX + "*"))
+    with open(snapshot, "rb") as f:
+        data = f.read()
+    for corrupt in (data[:len(data) // 2], data[:100], b""):
+        with open(snapshot, "wb") as f:
+            f.write(corrupt)
+        rebuilt = make_matcher()
+        assert _urls(rebuilt) == expected
+    # The rebuild wrote a readable snapshot again
+    assert _urls(make_matcher()) == expected
+    assert os.path.getsize(snapshot) == len(data)
+
+
+def test_save_arrays_leaves_no_temp_files(tmp_path):
+    path = str(tmp_path / "cache" / "bm25_abc.npz")
+    assert save_arrays(path, "abc", {"values": np.arange(5)}, "bm25_")
+    assert save_arrays(path, "abc", {"values": np.arange(6)}, "bm25_")
+    assert os.listdir(tmp_path / "cache") == ["bm25_abc.npz"]
+    assert load_arrays(path, "abc")["values"].tolist() == list(range(6))
+    assert load_arrays(path, "other") is None
+
+
+def test_parallel_build_matches_serial_build(make_matcher, monkeypatch):
+    serial = make_matcher(use_snapshot=False)
+    # Small chunks so the corpus is split across many worker tasks
+    monkeypatch.setattr(relevancy_matching, "MIN_DOCS_PER_BUILD_WORKER", 16)
+    parallel = make_matcher(use_snapshot=False, build_workers=2)
+    expected, merged = serial.bm25.corpus, parallel.bm25.corpus
+    assert len(expected) > 4 * 16
+    assert merged.vocab == expected.vocab
+    assert np.array_equal(merged.token_ids, expected.token_ids)
+    assert np.array_equal(merged.doc_len, expected.doc_len)
+    assert np.array_equal(merged.field_len, expected.field_len)
+    assert np.array_equal(merged.df, expected.df)
+    assert _urls(parallel) == _urls(serial)
@@ -0,0 +1,31 @@
+from nlp.query_cache import QueryCache
+
+
+def test_newer_version_drops_entries():
+    cache = QueryCache(maxsize=4)
+    cache.put("a", 1, [1])
+    assert cache.get("a", 1) == [1]
+    assert cache.get("a", 2) is None
+    cache.put("a", 1, [1])
+    assert cache.info().currsize == 0
+
+
+def test_older_version_misses_without_clearing():
+    cache = QueryCache(maxsize=4)
+    cache.put("a", 2, [2])
+    assert cache.get("a", 1) is None
+    cache.put("b", 1, [1])
+    info = cache.info()
+    assert (info.version, info.currsize) == (2, 1)
+    assert cache.get("a", 2) == [2]
+    assert cache.get("b", 2) is None
+
+
+def test_lru_eviction():
+    cache = QueryCache(maxsize=2)
+    cache.put("a", 0, 1)
+    cache.put("b", 0, 2)
+    cache.get("a", 0)
+    cache.put("c", 0, 3)
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 0) == 1 and cache.get("c", 0) == 3
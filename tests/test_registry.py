@@ -0,0 +1,118 @@
+import gc
+import threading
+import time
+import weakref
+
+import pytest
+
+from nlp import relevancy_matching
+from nlp.relevancy_matching import StartupMatcher, clear_matchers, get_matcher, reload_matcher
+
+
+@pytest.fixture
+def registry(yc_path, monkeypatch):
+    """Registry settings for the test corpus; counts index builds and how many run at once."""
+    builds = {"count": 0, "running": 0, "max_running": 0}
+    lock = threading.Lock()
+    build_index = StartupMatcher._build_index
+
+    def counted(self):
+        with lock:
+            builds["count"] += 1
+            builds["running"] += 1
+            builds["max_running"] = max(builds["max_running"], builds["running"])
+        try:
+            time.sleep(0.05)
+            build_index(self)
+        finally:
+            with lock:
+                builds["running"] -= 1
+
+    monkeypatch.setattr(StartupMatcher, "_build_index", counted)
+    created = []
+    init = StartupMatcher.__init__
+
+    def tracked(self, *args, **kwargs):
+        created.append(weakref.ref(self))
+        init(self, *args, **kwargs)
+
+    monkeypatch.setattr(StartupMatcher, "__init__", tracked)
+    yield {"yc_data_path": yc_path, "build_workers": 1}, builds
+    clear_matchers()
+    for ref in created:
+        if ref() is not None:
+            ref().close()
+    relevancy_matching._build_locks.clear()
+
+
+def _in_threads(fn, n=8):
+    results, threads = [None] * n, []
+    for i in range(n):
+        threads.append(threading.Thread(target=lambda i=i: results.__setitem__(i, fn())))
+        threads[-1].start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_get_matcher_builds_once(registry):
+    settings, builds = registry
+    matchers = _in_threads(lambda: get_matcher(**settings))
+    assert all(matcher is matchers[0] for matcher in matchers)
+    assert builds["count"] == 1
+    assert get_matcher(**settings) is matchers[0]
+
+
+def test_reload_swaps_atomically_and_keeps_the_old_matcher_usable(registry):
+    settings = dict(registry[0], shards=2, cache_size=0)
+    old = get_matcher(**settings)
+    expected = old.match("meal planner recipe")
+    seen, stop = set(), threading.Event()
+
+    def read():
+        while not stop.is_set():
+            matcher = get_matcher(**settings)
+            seen.add(id(matcher))
+            assert matcher.match("meal planner recipe") == expected
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    new = reload_matcher(**settings)
+    stop.set()
+    for reader in readers:
+        reader.join()
+    assert new is not old and get_matcher(**settings) is new
+    assert seen <= {id(old), id(new)}
+    # A caller still holding the old sharded matcher can keep searching
+    assert old.match("meal planner recipe") == expected
+    assert new.match("meal planner recipe") == expected
+
+    # Once the last reference is gone, the old matcher (and its workers) go away
+    ref = weakref.ref(old)
+    del old
+    gc.collect()
+    assert ref() is None
+
+
+def test_clear_forces_a_rebuild(registry):
+    settings, builds = registry
+    first = get_matcher(**settings)
+    clear_matchers()
+    second = get_matcher(**settings)
+    assert second is not first
+    assert builds["count"] == 2
+
+
+def test_clear_during_a_build_never_starts_a_second_one(registry):
+    settings, builds = registry
+    building = threading.Thread(target=get_matcher, kwargs=settings)
+    building.start()
+    while builds["running"] == 0:
+        time.sleep(0.001)
+    clear_matchers()
+    matchers = _in_threads(lambda: get_matcher(**settings), n=4)
+    building.join()
+    assert all(matcher is matchers[0] for matcher in matchers)
+    assert builds["max_running"] == 1
+    assert builds["count"] == 2
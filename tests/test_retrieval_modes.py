@@ -0,0 +1,16 @@
+import pytest
+
+from conftest import QUERIES
+
+
+def _ranked(results):
+    return [(r["url"], round(r["relevance_score"], 6)) for r in results]
+
+
+@pytest.mark.parametrize("filters", [None, {"source": "yc"}, {"source": "producthunt", "min_votes": 100}])
+def test_impact_with_full_budget_matches_bm25(make_matcher, filters):
+    matcher = make_matcher(impact_budget=10 ** 6, phrase_boost=0.5, priors={"recency": 0.2, "popularity": 0.3})
+    for query in QUERIES:
+        bm25 = matcher.match(query, top_n=5, filters=filters, mode="bm25", fields=["url"])
+        impact = matcher.match(query, top_n=5, filters=filters, mode="impact", fields=["url"])
+        assert _ranked(impact) == _ranked(bm25)
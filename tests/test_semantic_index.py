@@ -0,0 +1,98 @@
+import threading
+
+import numpy as np
+import pytest
+
+from conftest import QUERIES
+from nlp.bm25_index import BM25Index
+from nlp.index_cache import TokenizedCorpus
+from nlp.semantic_index import SemanticIndex
+from test_bm25_index import TERMS, random_docs
+
+
+@pytest.fixture(scope="module")
+def docs():
+    return random_docs(n_docs=300)
+
+
+@pytest.fixture(scope="module")
+def semantic(docs):
+    return SemanticIndex.build(BM25Index(TokenizedCorpus.from_token_lists(docs)), dim=16)
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    calls = []
+    build = SemanticIndex.build.__func__
+
+    def counted(cls, index, *args, **kwargs):
+        calls.append(index)
+        return build(cls, index, *args, **kwargs)
+
+    monkeypatch.setattr(SemanticIndex, "build", classmethod(counted))
+    return calls
+
+
+def test_built_once_on_first_semantic_search(make_matcher, builds):
+    matcher = make_matcher()
+    assert matcher._state.semantic is None
+    matcher.match_many(QUERIES, 5, mode="bm25")
+    assert not builds
+
+    barrier = threading.Barrier(4)
+
+    def search(mode):
+        barrier.wait()
+        matcher.match(QUERIES[0], 5, mode=mode)
+
+    threads = [threading.Thread(target=search, args=(mode,)) for mode in ("semantic", "hybrid") * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    version = matcher.version
+    matcher.match_many(QUERIES, 5, mode="semantic")
+    assert len(builds) == 1 and matcher.version == version
+    # A new matcher over the same data reuses the cached projection
+    assert make_matcher().match_many(QUERIES, 5, mode="semantic") == matcher.match_many(QUERIES, 5, mode="semantic")
+    assert len(builds) == 1
+
+
+def test_candidates_hold_the_exact_top_1_for_a_document_text(docs, semantic):
+    checked = 0
+    for doc, tokens in enumerate(docs):
+        qvec = semantic.query_vector(tokens)
+        if qvec is None:
+            continue
+        exact_docs, exact_sims = semantic.top_k(tokens, 1, exact=True)
+        assert exact_sims[0] == pytest.approx(1.0, abs=1e-4)
+        assert exact_docs[0] in semantic._candidates(qvec)
+        # Documents with the same terms can tie with it up to rounding
+        assert semantic.top_k(tokens, 1)[1] == pytest.approx(exact_sims, abs=1e-6)
+        checked += 1
+    assert checked > len(docs) // 2
+
+
+def test_falls_back_to_exact_search_with_too_few_candidates(docs, semantic, monkeypatch):
+    queries = [docs[i] for i in range(0, 60, 6)] + [TERMS[:3], ["t7", "t21"]]
+    n_docs = len(docs)
+    for tokens in queries:
+        qvec = semantic.query_vector(tokens)
+        k = len(semantic._candidates(qvec)) + 1
+        if k <= n_docs:
+            got, expected = semantic.top_k(tokens, k), semantic.top_k(tokens, k, exact=True)
+            assert got[0].tolist() == expected[0].tolist()
+        # A filtered view keeps too few candidates, so the allowed documents are scanned
+        allowed = np.zeros(n_docs, dtype=bool)
+        allowed[::50] = True
+        docs_, sims = semantic.restricted(allowed).top_k(tokens, 5)
+        expected_docs, _ = semantic.restricted(allowed).top_k(tokens, 5, exact=True)
+        assert docs_.tolist() == expected_docs.tolist()
+        assert allowed[docs_].all() and len(docs_) == 5
+
+    monkeypatch.setattr(SemanticIndex, "_candidates", lambda self, qvec: np.zeros(0, dtype=np.int64))
+    for tokens in queries:
+        got, expected = semantic.top_k(tokens, 3), semantic.top_k(tokens, 3, exact=True)
+        assert got[0].tolist() == expected[0].tolist()
+        assert len(got[0]) == 3
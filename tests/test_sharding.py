@@ -0,0 +1,29 @@
+from conftest import QUERIES
+
+
+def _ranked(results):
+    return [(r["url"], round(r["relevance_score"], 9)) for r in results]
+
+
+def test_sharded_results_match_single_process(make_matcher):
+    single = make_matcher()
+    sharded = make_matcher(shards=3)
+    assert sharded._state.shards is not None
+    for filters in (None, {"source": "producthunt"}, {"batch": ["W21", "S22"]}):
+        for query in QUERIES:
+            assert (_ranked(sharded.match(query, 10, filters=filters, fields=["url"]))
+                    == _ranked(single.match(query, 10, filters=filters, fields=["url"])))
+    assert ([_ranked(r) for r in sharded.match_many(QUERIES, 5, fields=["url"])]
+            == [_ranked(r) for r in single.match_many(QUERIES, 5, fields=["url"])])
+
+
+def test_sharded_results_match_after_updates(make_matcher, corpus):
+    single = make_matcher()
+    sharded = make_matcher(shards=2)
+    added = [{"name": "Meal Robot", "description": "robot that cooks from a meal planner",
+              "url": "https://example.com/meal-robot"}]
+    for matcher in (single, sharded):
+        matcher.remove_documents([record["url"] for record in corpus["yc"][:5]])
+        matcher.add_documents([dict(record) for record in added], source="yc")
+    for query in QUERIES:
+        assert _ranked(sharded.match(query, 10, fields=["url"])) == _ranked(single.match(query, 10, fields=["url"]))
@@ -0,0 +1,53 @@
+from nlp.spelling import SpellCorrector
+
+
+def _urls(results):
+    return [r["url"] for r in results]
+
+
+def test_speller_is_built_with_the_index(make_matcher):
+    matcher = make_matcher()
+    speller = matcher._state.speller
+    assert speller is not None
+    assert _urls(matcher.match("recipie planer", fields=["url"])) == _urls(matcher.match("recipe planner", fields=["url"]))
+    # Correcting a query never rebuilds or replaces the corrector
+    assert matcher._state.speller is speller
+
+
+def test_speller_follows_updates(make_matcher):
+    matcher = make_matcher()
+    speller = matcher._state.speller
+    matcher.remove_documents([matcher.companies.get_field(0, "url")])
+    assert matcher._state.speller is speller
+    matcher.add_documents([{"name": "Zeppelinworks", "description": "airship charter booking",
+                            "url": "https://example.com/zeppelin"}], source="yc")
+    assert matcher._state.speller is not speller
+    assert _urls(matcher.match("zepelinworks", fields=["url"]))[0] == "https://example.com/zeppelin"
+
+
+def test_no_speller_without_correction(make_matcher):
+    assert make_matcher(typo_weight=0)._state.speller is None
+
+
+def test_ties_prefer_the_term_sharing_more_trigrams():
+    corrector = SpellCorrector(["planner", "player", "plane", "recipe"])
+    counts = {"planner": 3, "player": 50, "plane": 1, "recipe": 9}
+
+    def df(term):
+        return counts.get(term, 0)
+
+    # planner (an inserted letter) and player (a substitution) are both one edit away;
+    # planner keeps five of the token's six trigrams, player only three
+    assert sorted(corrector.suggestions("planer")) == [("plane", 1), ("planner", 1), ("player", 1)]
+    assert corrector.correct("planer", df) == [("planner", 1)]
+    # Terms missing from the documents are skipped; plane still keeps more trigrams than player
+    counts["planner"] = 0
+    assert corrector.correct("planer", df) == [("plane", 1)]
+    assert corrector.correct("recipie", df) == [("recipe", 1)]
+
+
+def test_equal_overlap_falls_back_to_frequency():
+    corrector = SpellCorrector(["cart", "card"])
+    assert corrector.correct("carx", {"cart": 1, "card": 2}.__getitem__) == [("card", 1)]
+    assert corrector.correct("carx", {"cart": 2, "card": 1}.__getitem__) == [("cart", 1)]
+    assert corrector.correct("carx", {"cart": 0, "card": 0}.__getitem__) == []
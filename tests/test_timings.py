@@ -0,0 +1,29 @@
+import json
+import logging
+
+from nlp.timings import StageStats, format_stats
+
+
+def test_json_timings_from_environment(make_matcher, monkeypatch, caplog):
+    monkeypatch.setenv("MATCHER_TIMINGS", "json")
+    matcher = make_matcher()
+    with caplog.at_level(logging.INFO, logger="StartupRelevancyMatcher.timings"):
+        matcher.match("meal planner recipe")
+    events = [json.loads(r.getMessage()) for r in caplog.records if r.name == "StartupRelevancyMatcher.timings"]
+    assert "score" in {event["stage"] for event in events}
+    assert "score" in matcher.stats()
+
+
+def test_timings_off_by_default(make_matcher, monkeypatch):
+    monkeypatch.delenv("MATCHER_TIMINGS", raising=False)
+    matcher = make_matcher()
+    matcher.match("meal planner recipe")
+    assert matcher.stats() == {}
+
+
+def test_format_stats():
+    stats = {"score": StageStats(3, 3.0, 1.0, 0.9, 1.5, 1.6, 1.7), "select": StageStats(3, 0.3, 0.1, 0.1, 0.1, 0.1, 0.1)}
+    lines = format_stats(stats, ["score", "missing"]).splitlines()
+    assert lines[0].split()[:2] == ["stage", "count"]
+    assert lines[1].split() == ["score", "3", "3.0", "1.000", "0.900", "1.500", "1.600", "1.700"]
+    assert len(lines) == 2
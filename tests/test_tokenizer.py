@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from conftest import WORDS
+from nlp.relevancy_matching import TextPreprocessor
+
+TEXTS = [
+    "",
+    "   ",
+    "AI-powered meal planner for busy parents!",
+    "We can't, won't and shouldn't; they'd've said it's fine.",
+    "You cannot miss it: gonna, wanna, gotta, gimme, lemme know.",
+    "CANNOT Gonna WANNA",
+    "Ship 3x faster with GPT-4, 24/7 support & 99.9% uptime.",
+    "v2.0 launched on 2024-01-15 (beta) -- $49/mo",
+    "Café naïve résumé über straße Ångström",
+    "日本語 テキスト mixed with English words",
+    "Emoji 🚀 rockets and ✨ sparkles",
+    "snake_case and camelCase and kebab-case",
+    "email me at founder@example.com or visit https://example.com/path?q=1",
+    "\"Quoted\" 'single' «guillemets» — em-dash … ellipsis",
+    "tabs\tand\nnewlines\r\nmixed",
+    "Don't stop the machine's learning; it's users' data.",
+    "O'Reilly's rock'n'roll y'all",
+    "1st 2nd 3rd 10th place, 42 numbers 3.14",
+]
+
+
+@pytest.fixture(scope="module")
+def tokenizers():
+    return TextPreprocessor("regex"), TextPreprocessor("nltk")
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_regex_matches_nltk(tokenizers, text):
+    fast, reference = tokenizers
+    assert fast.tokenize(text) == reference.tokenize(text)
+
+
+def test_regex_matches_nltk_on_random_text(tokenizers):
+    fast, reference = tokenizers
+    rng = np.random.default_rng(1)
+    extras = ["cannot", "gonna", "wanna", "it's", "don't", "3d", "b2b", "co-op", "naïve", "!", "?", ","]
+    for _ in range(200):
+        text = " ".join(rng.choice(list(WORDS) + extras, size=rng.integers(1, 30)))
+        assert fast.tokenize(text) == reference.tokenize(text)
+
+
+def test_stem_cache_does_not_change_tokens():
+    cached, uncached = TextPreprocessor("regex"), TextPreprocessor("regex", cache_stems=False)
+    for text in TEXTS:
+        assert cached.tokenize(text) == uncached.tokenize(text)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from rank_bm25 import BM25Okapi
+
+from nlp.bm25_index import BM25FIndex, BM25Index, SparseBM25Index
+from nlp.index_cache import TokenizedCorpus
+from conftest import QUERIES, write_corpus
+from test_bm25_index import assert_ranks_like, random_docs, random_queries
+
+BACKENDS = [BM25Index, SparseBM25Index, BM25FIndex]
+
+
+def updated(cls, docs):
+    """Index of the first 150 docs, then add the rest and remove every 7th, as (index, live doc ids)."""
+    index = cls(TokenizedCorpus.from_token_lists(docs[:150]))
+    index = index.with_documents([[tokens] for tokens in docs[150:175]])
+    index = index.without_documents(range(0, 175, 7))
+    index = index.with_documents([[tokens] for tokens in docs[175:]])
+    live = [d for d in range(len(docs)) if d >= 175 or d % 7]
+    return index, np.array(live)
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_updates_score_like_a_rebuild(cls):
+    docs = random_docs()
+    index, live = updated(cls, docs)
+    okapi = BM25Okapi([docs[d] for d in live])
+    for query in random_queries():
+        reference = np.zeros(len(docs))
+        reference[live] = okapi.get_scores(query)
+        np.testing.assert_allclose(index.get_scores(query), reference, rtol=1e-9, atol=1e-9)
+        top_docs, scores = index.top_k(query, 10)
+        assert np.isin(top_docs, live).all()
+        # Removed documents must never rank, even below zero-score live ones
+        reference[np.setdiff1d(np.arange(len(docs)), live)] = -1.0
+        assert_ranks_like(top_docs, scores, reference, 10)
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_compaction_matches_a_rebuild(cls):
+    docs = random_docs()
+    index, live = updated(cls, docs)
+    compacted, kept = index.compacted()
+    assert kept.tolist() == live.tolist()
+    rebuilt = cls(TokenizedCorpus.from_token_lists([docs[d] for d in live]))
+    for query in random_queries():
+        np.testing.assert_allclose(compacted.get_scores(query), rebuilt.get_scores(query), rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(compacted.top_k(query, 10)[1], rebuilt.top_k(query, 10)[1], rtol=1e-9, atol=1e-9)
+
+
+def _scored(results):
+    """Scores best first, and the url of every result scoring above the last one (ties may swap)."""
+    scores = [round(r["relevance_score"], 9) for r in results]
+    return scores, {r["url"] for r, score in zip(results, scores) if score > scores[-1]}
+
+
+def test_matcher_updates_match_a_fresh_build(make_matcher, corpus, tmp_path):
+    matcher = make_matcher(dedup=False)
+    added = [{"name": f"Added {i}", "description": f"meal planner robot payments {i}",
+              "url": f"https://example.com/added/{i}"} for i in range(5)]
+    matcher.remove_documents([record["url"] for record in corpus["yc"][:10]])
+    matcher.add_documents([dict(record) for record in added], source="yc")
+
+    corpus["yc"] = corpus["yc"][10:] + added
+    fresh = make_matcher(yc_data_path=write_corpus(str(tmp_path / "fresh"), corpus), dedup=False)
+    assert len(fresh.companies) == matcher.bm25.n_live
+    for query in QUERIES:
+        assert _scored(matcher.match(query, 10, fields=["url"])) == _scored(fresh.match(query, 10, fields=["url"]))